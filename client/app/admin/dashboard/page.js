@@ -8,27 +8,45 @@ export default function AdminDashboard() {
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    async function fetchDashboardData() {
-      try {
-        const response = await fetch('http://localhost:5000/api/admin/dashboard', {
-          credentials: 'include',
-        });
-        
-        if (!response.ok) {
-          throw new Error('Failed to fetch dashboard data');
-        }
-        
-        const data = await response.json();
-        setDashboardData(data);
-      } catch (err) {
-        console.error('Error fetching dashboard data:', err);
-        setError(err.message);
-      } finally {
+    // The server sends the dashboard once, then pushes new detections and counter
+    // changes; EventSource reconnects (and gets a fresh snapshot) on its own
+    const source = new EventSource('http://localhost:5000/api/admin/dashboard/stream', {
+      withCredentials: true,
+    });
+
+    source.addEventListener('snapshot', (event) => {
+      setDashboardData(JSON.parse(event.data));
+      setError(null);
+      setLoading(false);
+    });
+
+    source.addEventListener('detection', (event) => {
+      const { log, counters } = JSON.parse(event.data);
+      setDashboardData((data) => data && {
+        ...data,
+        total_detections: data.total_detections + (counters.total_detections || 0),
+        recent_detections: [log, ...data.recent_detections].slice(0, 10),
+      });
+    });
+
+    source.addEventListener('counters', (event) => {
+      const counters = JSON.parse(event.data);
+      setDashboardData((data) => data && {
+        ...data,
+        total_users: data.total_users + (counters.total_users || 0),
+      });
+    });
+
+    source.onerror = () => {
+      // CLOSED means the server refused the stream (e.g. not logged in as admin)
+      if (source.readyState === EventSource.CLOSED) {
+        console.error('Dashboard stream closed');
+        setError('Failed to fetch dashboard data');
         setLoading(false);
       }
-    }
+    };
 
-    fetchDashboardData();
+    return () => source.close();
   }, []);
 
   if (loading) {
@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_login import LoginManager
 from flask_migrate import Migrate
@@ -7,14 +7,33 @@ from domain.models.user import User
 from presentation.api.detection_routes import detection_bp
 from presentation.api.admin_routes import admin_bp
 from presentation.api.user_routes import user_bp
-from presentation.api.manual_calculation_routes import manual_calculation_bp
+from presentation.api.manual_calculation_routes import manual_calculation_bp, model_info_bp
+from presentation.api.video_detection_routes import video_detection_bp
+from core.events import event_bus
+from core.exceptions import RateLimitError
+from core.rate_limit import rate_limiter
+from core.tracing import tracer
 from config import config_by_name
 import os
 
-def create_app(config_name='development'):
+# Blueprints served by each app role. 'api' covers the cheap JSON routes plus
+# /api/detect (I/O-bound on the upstream inference), 'vision' the CPU-heavy
+# manual calculation and video decoding, so the two can run in separate worker pools.
+BLUEPRINTS_BY_ROLE = {
+    'api': [detection_bp, admin_bp, user_bp, model_info_bp],
+    'vision': [manual_calculation_bp, video_detection_bp],
+}
+BLUEPRINTS_BY_ROLE['all'] = BLUEPRINTS_BY_ROLE['api'] + BLUEPRINTS_BY_ROLE['vision']
+
+def create_app(config_name='development', role=None):
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
     
+    role = role or app.config.get('APP_ROLE', 'all')
+    if role not in BLUEPRINTS_BY_ROLE:
+        raise ValueError(f"Unknown app role: {role}")
+    app.config['APP_ROLE'] = role
+    
     # Initialize CORS
     CORS(app, supports_credentials=True)
     
@@ -32,15 +51,29 @@ def create_app(config_name='development'):
     def load_user(user_id):
         return User.query.get(int(user_id))
     
-    # Register blueprints
-    app.register_blueprint(detection_bp)
-    app.register_blueprint(admin_bp)
-    app.register_blueprint(user_bp)
-    app.register_blueprint(manual_calculation_bp)
+    # Initialize rate limiting
+    rate_limiter.init_app(app)
+    
+    # Initialize the live update feed
+    event_bus.init_app(app)
+    
+    # Initialize request tracing (no-op unless TRACING_ENABLED)
+    tracer.init_app(app)
+    
+    @app.errorhandler(RateLimitError)
+    def handle_rate_limit(error):
+        response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+        response.status_code = error.status_code
+        response.headers['Retry-After'] = str(error.retry_after)
+        return response
+    
+    # Register blueprints for this role
+    for blueprint in BLUEPRINTS_BY_ROLE[role]:
+        app.register_blueprint(blueprint)
     
     @app.route('/health')
     def health_check():
-        return {'status': 'ok'}
+        return {'status': 'ok', 'role': role}
     
     return app
 
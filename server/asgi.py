@@ -0,0 +1,29 @@
+"""
+ASGI entry point for the async serving mode.
+
+/api/detect is served natively async: the upstream inference is awaited, so a
+single process can hold hundreds of in-flight detections. Every other path is
+handed to the regular Flask app, so the existing blueprints keep working.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import os
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from app import create_app
+from presentation.api.async_detection_routes import build_async_detection_routes
+
+def create_asgi_app(config_name='development'):
+    flask_app = create_app(config_name)
+    
+    routes = build_async_detection_routes(flask_app)
+    # Everything not handled natively falls through to the Flask blueprints
+    routes.append(Mount('/', app=WSGIMiddleware(flask_app)))
+    
+    asgi_app = Starlette(routes=routes)
+    asgi_app.state.flask_app = flask_app
+    return asgi_app
+
+application = create_asgi_app(os.getenv('FLASK_ENV', 'development'))
@@ -0,0 +1,74 @@
+"""
+Run the manual calculation over a directory or zip of images for model auditing.
+
+Writes one JSON object per image (NDJSON) as soon as it is ready, so memory
+stays flat however many images there are. Inference results are cached by
+image digest, so re-running an audit over the same images only repeats the
+local analysis:
+
+    python batch_manual_calculation.py audit_images/ -o results.ndjson --workers 4
+    python batch_manual_calculation.py audit.zip --quality fast > results.ndjson
+"""
+import os
+import sys
+import time
+import argparse
+
+# Set up command line argument parsing
+parser = argparse.ArgumentParser(description='Batch manual calculation for model auditing')
+parser.add_argument('source', help='Directory or .zip file of images')
+parser.add_argument('--output', '-o', default='-', help='NDJSON output file (default: stdout)')
+parser.add_argument('--workers', '-w', type=int, default=os.cpu_count() or 1,
+                    help='Processes for the calculation stages (0 = run in this process)')
+parser.add_argument('--quality', choices=['fast', 'full'], default='full', help='Manual calculation quality mode')
+parser.add_argument('--detail', choices=['summary', 'full'], default='summary',
+                    help='Record detail; summary leaves out static text, kernels and pixel samples')
+parser.add_argument('--analysis-size', type=int, default=320, help='Longest image side of the geometric stages in fast mode')
+parser.add_argument('--prediction-cache', default='sqlite:///instance/prediction_cache.db',
+                    help="Inference result cache URI ('memory://' or 'sqlite:///path')")
+
+def main():
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.source):
+        print(f"❌ Error: {args.source} does not exist", file=sys.stderr)
+        sys.exit(1)
+    
+    from domain.services.manual_calculation_service import ManualCalculationService
+    from infrastructure.image_sources import count_images, iter_images
+    from infrastructure.prediction_cache import create_prediction_cache
+    from core.serialization import dumps
+    from presentation.schemas.manual_calculation_schema import manual_calculation_to_dict
+    
+    service = ManualCalculationService(
+        process_pool_workers=args.workers,
+        analysis_size=args.analysis_size,
+        prediction_cache=create_prediction_cache(args.prediction_cache)
+    )
+    total = count_images(args.source)
+    print(f"Processing {total} images from {args.source} with {args.workers} workers", file=sys.stderr)
+    
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    done = errors = cached = 0
+    started = time.perf_counter()
+    try:
+        for record in service.process_batch(iter_images(args.source), args.quality):
+            output.write(dumps(manual_calculation_to_dict(record, args.detail)) + b"\n")
+            output.flush()
+            
+            done += 1
+            errors += "error" in record
+            cached += bool(record.get("cached_prediction"))
+            if done % 50 == 0 or done == total:
+                rate = done / (time.perf_counter() - started)
+                print(f"  {done}/{total} images ({rate:.1f}/s), {cached} cached predictions, {errors} errors",
+                      file=sys.stderr)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    
+    print(f"✅ Done: {done} images, {errors} errors", file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
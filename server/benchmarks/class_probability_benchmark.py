@@ -0,0 +1,103 @@
+"""
+Benchmark of the vectorized class probability scoring against the original loop.
+
+Generates random color analyses (color percentages plus k-means dominant
+clusters), checks that ManualCalculationService gives the same per-class
+probabilities as the per-flag loop it used before, then times scoring M
+images both ways:
+
+    python benchmarks/class_probability_benchmark.py
+    python benchmarks/class_probability_benchmark.py --sizes 1 100 10000
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.flag_registry import FLAGS, flag_palette_arrays
+from domain.services.manual_calculation_service import ManualCalculationService
+from domain.vision.class_scoring import class_probabilities, color_histograms, dominant_color_counts
+
+parser = argparse.ArgumentParser(description='Benchmark class probability scoring')
+parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 1000])
+parser.add_argument('--check', type=int, default=5000, help='Random analyses compared with the loop')
+parser.add_argument('--seed', type=int, default=0)
+
+COLORS = ["red", "green", "blue", "white", "yellow", "black", "other"]
+
+def legacy_probabilities(color_analysis):
+    """The loop previously in ManualCalculationService._calculate_class_probabilities"""
+    color_percentages = color_analysis.get("color_percentages", {})
+    dominant_colors = color_analysis.get("dominant_colors", [])
+    class_probs = {}
+    for flag_class, metadata in FLAGS.items():
+        expected_colors = metadata.colors
+        color_match_score, total_expected = 0, 0
+        for color, expected_pct in metadata.expected_color_distribution.items():
+            actual_pct = color_percentages.get(color, 0) / 100
+            match_quality = 1 - min(1, abs(expected_pct - actual_pct) / max(expected_pct, 0.01))
+            color_match_score += match_quality * expected_pct
+            total_expected += expected_pct
+        if total_expected > 0:
+            color_match_score = color_match_score / total_expected
+        dominant_color_match = 0
+        if dominant_colors and expected_colors:
+            matched_colors = sum(1 for c in dominant_colors if c["color_name"] in expected_colors)
+            dominant_color_match = matched_colors / len(expected_colors)
+        final_match_score = 0.7 * color_match_score + 0.3 * dominant_color_match
+        class_probs[flag_class] = round(min(0.95, max(0.05, final_match_score)), 2)
+    return class_probs
+
+def random_analysis(rng):
+    shares = rng.dirichlet(np.ones(len(COLORS)) * rng.uniform(0.2, 2))
+    clusters = rng.choice(COLORS, size=int(rng.integers(0, 6)))
+    return {
+        "color_percentages": {c: round(float(p) * 100, 2) for c, p in zip(COLORS, shares)},
+        "dominant_colors": [{"color_name": str(c)} for c in clusters]
+    }
+
+def main():
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    service = ManualCalculationService()
+
+    analyses = [random_analysis(rng) for _ in range(args.check)]
+    vectorized = service._calculate_class_probabilities_batch(analyses, ["indonesia"] * len(analyses))
+    mismatches = sum(
+        v["probabilities"] != legacy_probabilities(a) for a, v in zip(analyses, vectorized)
+    )
+    print(f"Checked {len(analyses)} analyses, {mismatches} mismatches")
+
+    # "matrix" is the scoring alone; "batch" also builds the per-class response dicts
+    color_names = service.color_lookup.color_names
+    arrays = flag_palette_arrays(color_names)
+    print(f"\n{'images':>7} {'loop ms':>10} {'batch ms':>10} {'matrix ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        batch = [random_analysis(rng) for _ in range(size)]
+
+        start = time.perf_counter()
+        for analysis in batch:
+            legacy_probabilities(analysis)
+        loop_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        service._calculate_class_probabilities_batch(batch, ["indonesia"] * size)
+        batch_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        class_probabilities(
+            color_histograms([a["color_percentages"] for a in batch], color_names),
+            dominant_color_counts([a["dominant_colors"] for a in batch], color_names),
+            *arrays
+        )
+        matrix_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{size:>7} {loop_ms:>10.2f} {batch_ms:>10.2f} {matrix_ms:>10.2f} {loop_ms / matrix_ms:>7.1f}x")
+
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark of the compiled HSV color lookup table against the original rules.
+
+Checks that domain.vision.color_lut gives the same color name as the
+per-pixel threshold loop the manual calculation used before, on every hue
+combined with the saturation/value values around each threshold plus random
+pixels, then times classifying the 10% sample of an image both ways:
+
+    python benchmarks/color_lut_benchmark.py
+    python benchmarks/color_lut_benchmark.py --size 1280
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.vision.color_lut import HSV_COLOR_RANGES, HsvColorLookup
+
+parser = argparse.ArgumentParser(description='Benchmark HSV color classification')
+parser.add_argument('--size', type=int, default=640, help='Square image side in pixels')
+parser.add_argument('--random-pixels', type=int, default=200000)
+parser.add_argument('--seed', type=int, default=0)
+
+def legacy_classify(hsv):
+    """The rules previously in ManualCalculationService._classify_color_hsv"""
+    h, s, v = hsv
+    if v < 30:
+        return "black"
+    if s < 30 and v > 200:
+        return "white"
+    for color, ranges in HSV_COLOR_RANGES.items():
+        for range_dict in ranges:
+            lower, upper = range_dict["lower"], range_dict["upper"]
+            if (lower[0] <= h <= upper[0] and
+                lower[1] <= s <= upper[1] and
+                lower[2] <= v <= upper[2]):
+                return color
+    return "other"
+
+def threshold_values():
+    """Every saturation/value bound used by the rules, with its neighbours"""
+    bounds = {0, 255, 30, 200}
+    for ranges in HSV_COLOR_RANGES.values():
+        for range_dict in ranges:
+            bounds.update(int(b) for b in range_dict["lower"][1:])
+            bounds.update(int(b) for b in range_dict["upper"][1:])
+    return sorted({min(255, max(0, b + d)) for b in bounds for d in (-1, 0, 1)})
+
+def main():
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    start = time.perf_counter()
+    lookup = HsvColorLookup(HSV_COLOR_RANGES)
+    print(f"Table built in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({lookup.table.nbytes / 2**20:.0f} MiB)")
+
+    values = threshold_values()
+    h, s, v = np.meshgrid(np.arange(256), values, values, indexing='ij')
+    edge_pixels = np.stack([h.ravel(), s.ravel(), v.ravel()], axis=1).astype(np.uint8)
+    random_pixels = rng.integers(0, 256, size=(args.random_pixels, 3), dtype=np.uint8)
+    pixels = np.concatenate([edge_pixels, random_pixels])
+
+    codes = lookup.classify(pixels)
+    mismatches = sum(
+        lookup.color_names[code] != legacy_classify(pixel)
+        for pixel, code in zip(pixels, codes)
+    )
+    print(f"Checked {len(pixels)} pixels, {mismatches} mismatches")
+
+    # The 10% sample _analyze_colors classifies
+    image_hsv = rng.integers(0, 180, size=(args.size, args.size, 3), dtype=np.uint8)
+    samples = image_hsv.reshape(-1, 3)[::10]
+
+    start = time.perf_counter()
+    legacy_counts = {}
+    for pixel in samples:
+        color = legacy_classify(pixel)
+        legacy_counts[color] = legacy_counts.get(color, 0) + 1
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    lut_counts = {k: c for k, c in lookup.counts(samples).items() if c}
+    lut_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n{len(samples)} samples of a {args.size}x{args.size} image")
+    print(f"{'method':<14} {'ms':>10}")
+    print(f"{'legacy loop':<14} {legacy_ms:>10.2f}")
+    print(f"{'lookup table':<14} {lut_ms:>10.2f}")
+    print(f"speedup {legacy_ms / lut_ms:.0f}x, counts equal: {legacy_counts == lut_counts}")
+
+    sys.exit(1 if mismatches or legacy_counts != lut_counts else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Near-duplicate lookup benchmark.
+
+Fills a HammingIndex with random 64-bit hashes and compares lookup latency
+with a brute-force popcount over every stored hash, checking both agree:
+
+    python benchmarks/hash_index_benchmark.py
+    python benchmarks/hash_index_benchmark.py --size 1000000 --max-distance 4
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.vision.hash_index import HammingIndex, _popcount
+
+parser = argparse.ArgumentParser(description='Benchmark near-duplicate hash lookup')
+parser.add_argument('--size', type=int, default=1000000, help='Number of stored hashes')
+parser.add_argument('--queries', type=int, default=1000, help='Number of lookups')
+parser.add_argument('--max-distance', type=int, default=4, help='Max Hamming distance for a match')
+parser.add_argument('--seed', type=int, default=0)
+
+def random_hashes(rng, n):
+    return rng.integers(0, 2**63, size=n, dtype=np.int64).astype(np.uint64) ^ \
+        (rng.integers(0, 2, size=n, dtype=np.uint64) << np.uint64(63))
+
+def flip_bits(rng, value, n_bits):
+    for bit in rng.choice(64, size=n_bits, replace=False):
+        value ^= 1 << int(bit)
+    return value
+
+def brute_force(hashes, value, max_distance):
+    distances = _popcount(hashes ^ np.uint64(value))
+    best = int(np.argmin(distances))
+    return (best, int(distances[best])) if distances[best] <= max_distance else None
+
+def main():
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    hashes = random_hashes(rng, args.size)
+
+    start = time.perf_counter()
+    index = HammingIndex(max_distance=args.max_distance)
+    index.add_many((int(h) for h in hashes), range(args.size))
+    build_s = time.perf_counter() - start
+    print(f"Indexed {len(index)} hashes in {build_s:.1f} s")
+
+    # Half the queries are perturbed copies of stored hashes, half are random misses
+    targets = rng.integers(0, args.size, size=args.queries // 2)
+    queries = [flip_bits(rng, int(hashes[t]), int(rng.integers(0, args.max_distance + 1))) for t in targets]
+    queries += [int(h) for h in random_hashes(rng, args.queries - len(queries))]
+
+    start = time.perf_counter()
+    indexed = [index.lookup(q) for q in queries]
+    index_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    start = time.perf_counter()
+    brute = [brute_force(hashes, q, args.max_distance) for q in queries]
+    brute_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    # Ids may differ on ties, distances must not
+    mismatches = sum(
+        (a is None) != (b is None) or (a is not None and a[1] != b[1])
+        for a, b in zip(indexed, brute)
+    )
+    hits = sum(r is not None for r in indexed)
+
+    print(f"{'method':<12} {'ms/lookup':>10}")
+    print(f"{'MIH index':<12} {index_ms:>10.3f}")
+    print(f"{'brute force':<12} {brute_ms:>10.3f}")
+    print(f"\nspeedup {brute_ms / index_ms:.0f}x, {hits}/{len(queries)} hits, {mismatches} mismatches")
+
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
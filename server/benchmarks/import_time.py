@@ -0,0 +1,80 @@
+"""
+Import-time benchmark for worker startup.
+
+Runs `python -X importtime -c "import app; app.create_app(...)"` in a fresh
+interpreter, prints the slowest top-level imports and checks that the heavy
+vision stack is not loaded by workers that only serve CRUD routes:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 1500   # non-zero exit on regression
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded lazily on first vision request; importing any of these at startup is a regression
+HEAVY_MODULES = ['cv2', 'numpy', 'sklearn', 'inference_sdk', 'onnxruntime']
+
+parser = argparse.ArgumentParser(description='Measure app import time')
+parser.add_argument('--config', default='testing', help='Config name passed to create_app')
+parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to show')
+parser.add_argument('--budget-ms', type=float, default=None, help='Fail when the total exceeds this')
+
+def run_importtime(config_name):
+    code = (
+        "import sys, app; app.create_app(%r); "
+        "print(','.join(m for m in %r if m in sys.modules))" % (config_name, HEAVY_MODULES)
+    )
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SERVER_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+    
+    loaded_heavy = [m for m in proc.stdout.strip().split(',') if m]
+    return parse_importtime(proc.stderr), loaded_heavy
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def main():
+    args = parser.parse_args()
+    rows, loaded_heavy = run_importtime(args.config)
+    
+    # Depth 0 rows are imported directly by the interpreter, so their cumulative
+    # times add up to the total; depth 1 rows are what `app` itself pulls in
+    total_ms = sum(r[2] for r in rows if r[3] == 0) / 1000
+    top_level = [r for r in rows if r[3] <= 1]
+    
+    print(f"Total import time: {total_ms:.1f} ms ({len(rows)} modules)")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us, _ in sorted(top_level, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    
+    failed = False
+    if loaded_heavy:
+        print(f"\nFAIL: heavy modules imported at startup: {', '.join(loaded_heavy)}")
+        failed = True
+    else:
+        print(f"\nOK: none of {', '.join(HEAVY_MODULES)} imported at startup")
+    
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms exceeds the {args.budget_ms:.1f} ms budget")
+        failed = True
+    
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Concurrency vs. latency load test for /api/detect.
+
+Posts the same image at increasing concurrency levels and reports throughput
+and latency percentiles for each level. Start the stub inference server and
+the app under test first (see stub_inference_server.py), then:
+
+    python benchmarks/load_test_detect.py --url http://127.0.0.1:5000/api/detect \
+        --image path/to/flag.jpg --concurrency 1 10 50 100 200
+
+Run it once against the WSGI server and once against `uvicorn asgi:application`
+to compare the two serving modes. Disable rate limiting on the target
+(RATELIMIT_ENABLED=false) or the 429s will dominate the numbers.
+"""
+import argparse
+import asyncio
+import time
+import aiohttp
+import cv2
+import numpy as np
+
+parser = argparse.ArgumentParser(description='Load test the detection endpoint')
+parser.add_argument('--url', default='http://127.0.0.1:5000/api/detect')
+parser.add_argument('--image', help='Image to upload (a synthetic flag is used when omitted)')
+parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50, 100, 200])
+parser.add_argument('--requests-per-client', type=int, default=5)
+
+def synthetic_flag():
+    """Red-over-white bicolour, encoded as JPEG"""
+    img = np.full((400, 600, 3), 255, np.uint8)
+    img[:200] = (0, 0, 255)
+    return cv2.imencode('.jpg', img)[1].tobytes()
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_level(session, url, image_bytes, concurrency, requests_per_client):
+    latencies = []
+    errors = 0
+    
+    async def client():
+        nonlocal errors
+        for _ in range(requests_per_client):
+            form = aiohttp.FormData()
+            form.add_field('image', image_bytes, filename='flag.jpg', content_type='image/jpeg')
+            start = time.perf_counter()
+            async with session.post(url, data=form) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000
+    }
+
+async def main_async(args):
+    if args.image:
+        with open(args.image, 'rb') as f:
+            image_bytes = f.read()
+    else:
+        image_bytes = synthetic_flag()
+    
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        print(f"{'conc':>6} {'reqs':>6} {'errs':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for concurrency in args.concurrency:
+            r = await run_level(session, args.url, image_bytes, concurrency, args.requests_per_client)
+            print(f"{r['concurrency']:>6} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>9.1f} "
+                  f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+
+def main():
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
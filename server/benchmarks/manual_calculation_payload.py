@@ -0,0 +1,79 @@
+"""
+Payload benchmark for the manual calculation response.
+
+Builds a manual calculation result for a synthetic flag with N predicted
+boxes, then reports the response size and serialization time of the full
+and summary detail levels, with the standard library encoder (what jsonify
+uses) and with core.serialization.dumps (orjson when installed):
+
+    python benchmarks/manual_calculation_payload.py
+    python benchmarks/manual_calculation_payload.py --boxes 1 10 100 --repeat 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.serialization import dumps, orjson
+from domain.manual_calculation_explanations import EDUCATIONAL_NOTE
+from domain.services.manual_calculation_service import ManualCalculationService
+from presentation.schemas.manual_calculation_schema import manual_calculation_to_dict
+
+parser = argparse.ArgumentParser(description='Measure manual calculation payload size and encode time')
+parser.add_argument('--boxes', type=int, nargs='+', default=[1, 10, 100])
+parser.add_argument('--repeat', type=int, default=100, help='Encodes timed per configuration')
+parser.add_argument('--quality', default='full', choices=['fast', 'full'])
+
+def synthetic_flag(size=640):
+    """Red over white, the two-band layout the geometric stages expect"""
+    image = np.full((size, size, 3), 255, np.uint8)
+    image[:size // 2] = (0, 0, 255)
+    return image
+
+def model_results(boxes, rng):
+    predictions = [{
+        "x": float(rng.uniform(100, 540)), "y": float(rng.uniform(100, 540)),
+        "width": float(rng.uniform(50, 400)), "height": float(rng.uniform(50, 300)),
+        "confidence": float(rng.uniform(0.3, 0.99)), "class": "indonesia",
+        "class_id": 0, "detection_id": f"box-{i}"
+    } for i in range(boxes)]
+    return {"predictions": predictions, "time": 0.05, "image": {"width": 640, "height": 640}}
+
+def time_encode(encode, payload, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(payload)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def stdlib_dumps(payload):
+    return json.dumps(payload).encode('utf-8')
+
+def main():
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+    rng = np.random.default_rng(0)
+    service = ManualCalculationService()
+    image = synthetic_flag()
+
+    encoder = 'orjson' if orjson is not None else 'json (orjson not installed)'
+    print(f"Fast encoder: {encoder}")
+    print(f"\n{'boxes':>6} {'detail':>8} {'bytes':>10} {'json ms':>9} {'fast ms':>9}")
+    for boxes in args.boxes:
+        results = model_results(boxes, rng)
+        steps = service._calculate_steps(image, results, args.quality)
+        steps["educational_note"] = dict(EDUCATIONAL_NOTE)
+        result = {"model_prediction": results, "manual_calculation": steps}
+
+        for detail in ('full', 'summary'):
+            payload = manual_calculation_to_dict(result, detail)
+            json_ms = time_encode(stdlib_dumps, payload, args.repeat)
+            fast_ms = time_encode(dumps, payload, args.repeat)
+            print(f"{boxes:>6} {detail:>8} {len(dumps(payload)):>10} {json_ms:>9.3f} {fast_ms:>9.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Accuracy vs latency of the manual calculation quality modes.
+
+For every labelled image, runs the geometric stages (Hough pattern matching
+and contour shape analysis) in "full" and "fast" mode and reports:
+
+- latency of the two stages for one request (including their edge and
+  color tables)
+- top-1 accuracy when the label is guessed as the flag class whose expected
+  pattern and shape score highest
+- mean absolute difference of the fast scores from the full ones
+
+Images are read from DIR/<class>/*.jpg|png, with the class taken from the
+folder name; the whole image is used as the flag box. Without --images a
+set of synthetic striped flags with JPEG noise is rendered instead:
+
+    python benchmarks/manual_calculation_quality.py
+    python benchmarks/manual_calculation_quality.py --images ~/flags --analysis-size 256
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import warnings
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.services.manual_calculation_service import ManualCalculationService
+
+parser = argparse.ArgumentParser(description='Compare manual calculation quality modes')
+parser.add_argument('--images', default=None, help='Directory with one sub-folder of images per class')
+parser.add_argument('--analysis-size', type=int, default=320, help='Longest side used in fast mode')
+parser.add_argument('--per-class', type=int, default=5, help='Synthetic images per class')
+parser.add_argument('--seed', type=int, default=0)
+
+# BGR colors and stripe layouts (top to bottom, relative heights) for synthetic flags
+RED, WHITE, BLUE = (38, 17, 206), (255, 255, 255), (99, 38, 0)
+YELLOW, GREEN = (0, 209, 254), (53, 178, 52)
+SYNTHETIC_FLAGS = {
+    "indonesia": [(RED, 1), (WHITE, 1)],
+    "thailand": [(RED, 1), (WHITE, 1), (BLUE, 2), (WHITE, 1), (RED, 1)],
+    "myanmar": [(YELLOW, 1), (GREEN, 1), (RED, 1)],
+    "laos": [(RED, 1), (BLUE, 2), (RED, 1)],
+    "vietnam": [(RED, 1)],
+}
+
+def render_flag(layout, rng):
+    """Draw a 3:2 striped flag on a random background, JPEG round-tripped"""
+    canvas = np.full((640, 640, 3), rng.integers(60, 200, size=3), dtype=np.uint8)
+    x1, y1, x2, y2 = 40, 107, 600, 533
+    total = sum(weight for _, weight in layout)
+    top = y1
+    for color, weight in layout:
+        bottom = top + round((y2 - y1) * weight / total)
+        canvas[top:bottom, x1:x2] = color
+        top = bottom
+    noise = rng.normal(0, 6, canvas.shape)
+    canvas = np.clip(canvas + noise, 0, 255).astype(np.uint8)
+    encoded = cv2.imencode('.jpg', canvas, [cv2.IMWRITE_JPEG_QUALITY, int(rng.integers(60, 95))])[1]
+    box = {"x": (x1 + x2) / 2, "y": (y1 + y2) / 2, "width": x2 - x1, "height": y2 - y1}
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR), box
+
+def load_images(args):
+    """Return [(label, 640x640 image, box)]"""
+    rng = np.random.default_rng(args.seed)
+    if args.images is None:
+        return [(label, *render_flag(layout, rng))
+                for label, layout in SYNTHETIC_FLAGS.items() for _ in range(args.per_class)]
+
+    samples = []
+    for path in sorted(glob.glob(os.path.join(args.images, '*', '*'))):
+        if not path.lower().endswith(('.jpg', '.jpeg', '.png')):
+            continue
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            continue
+        image = cv2.resize(image, (640, 640))
+        samples.append((os.path.basename(os.path.dirname(path)).lower(), image,
+                        {"x": 320, "y": 320, "width": 640, "height": 640}))
+    return samples
+
+def geometric_pass(service, image, box, color_analysis, flag_class, quality, region_stats=None):
+    """Run the pattern and shape stages as a request for `flag_class` would"""
+    geometry_image, geometry_box, scale = service._geometry_inputs(image, box, quality)
+    if region_stats is None:
+        region_stats = service._build_region_stats(geometry_image)
+    pattern = service._pattern_matching(geometry_image, color_analysis, flag_class,
+                                        geometry_box, region_stats, scale)
+    shape = service._analyze_shape(geometry_image, geometry_box, flag_class, region_stats, scale)
+    return (pattern["pattern_score"], shape["shape_score"]), region_stats
+
+def geometric_scores(service, image, box, color_analysis, label, quality):
+    """
+    Score every known class with the pattern and shape stages.
+
+    Returns:
+        tuple: ({class: (pattern_score, shape_score)}, seconds for one request-sized pass)
+    """
+    start = time.perf_counter()
+    label_scores, region_stats = geometric_pass(service, image, box, color_analysis, label, quality)
+    elapsed = time.perf_counter() - start
+
+    scores = {label: label_scores}
+    for flag_class in service.flag_metadata:
+        if flag_class != label:
+            scores[flag_class], _ = geometric_pass(service, image, box, color_analysis,
+                                                   flag_class, quality, region_stats)
+    return scores, elapsed
+
+def main():
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+    service = ManualCalculationService(analysis_size=args.analysis_size)
+    samples = load_images(args)
+    print(f"{len(samples)} images, fast mode at {args.analysis_size}px")
+
+    results = {quality: {"correct": 0, "seconds": []} for quality in ("full", "fast")}
+    pattern_diffs, shape_diffs = [], []
+    for label, image, box in samples:
+        color_analysis = service._analyze_colors(image, label)
+        per_mode = {}
+        for quality in ("full", "fast"):
+            scores, elapsed = geometric_scores(service, image, box, color_analysis, label, quality)
+            per_mode[quality] = scores
+            results[quality]["seconds"].append(elapsed)
+            guess = max(scores, key=lambda c: sum(scores[c]))
+            results[quality]["correct"] += guess == label
+
+        for flag_class in per_mode["full"]:
+            pattern_diffs.append(abs(per_mode["full"][flag_class][0] - per_mode["fast"][flag_class][0]))
+            shape_diffs.append(abs(per_mode["full"][flag_class][1] - per_mode["fast"][flag_class][1]))
+
+    print(f"\n{'quality':<8} {'ms/image':>9} {'top-1 acc':>10}")
+    for quality, r in results.items():
+        print(f"{quality:<8} {np.mean(r['seconds']) * 1000:>9.2f} {r['correct'] / len(samples):>10.2%}")
+
+    speedup = np.mean(results["full"]["seconds"]) / np.mean(results["fast"]["seconds"])
+    print(f"\nfast is {speedup:.1f}x faster; mean |fast - full| "
+          f"pattern score {np.mean(pattern_diffs):.3f}, shape score {np.mean(shape_diffs):.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Throughput/latency curve of the detection micro-batcher.
+
+Closed-loop clients (threads) each send requests one after another to a
+MicroBatcher in front of a synthetic model: a two-layer dense network on a
+downsampled image, plus a fixed per-call overhead that stands in for kernel
+launches or the inference RPC. Batch size 1 is the unbatched baseline:
+
+    python benchmarks/micro_batching_benchmark.py
+    python benchmarks/micro_batching_benchmark.py --clients 1 8 32 --batch-sizes 1 4 16 \
+        --latencies-ms 2 10 --workers 2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infrastructure.micro_batcher import MicroBatcher
+
+parser = argparse.ArgumentParser(description='Benchmark the inference micro-batcher')
+parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16])
+parser.add_argument('--latencies-ms', type=float, nargs='+', default=[5])
+parser.add_argument('--workers', type=int, default=1, help='Batcher worker threads')
+parser.add_argument('--requests', type=int, default=400, help='Requests per configuration')
+parser.add_argument('--overhead-ms', type=float, default=5, help='Fixed cost of each model call')
+parser.add_argument('--input-size', type=int, default=32, help='Side of the downsampled model input')
+parser.add_argument('--hidden', type=int, default=1024)
+
+class SyntheticModel:
+    """Dense layers whose weights are streamed once per call, so batching amortizes them"""
+
+    def __init__(self, input_size, hidden, overhead_ms, classes=10):
+        rng = np.random.default_rng(0)
+        self.input_size = input_size
+        self.overhead = overhead_ms / 1000
+        self.w1 = rng.standard_normal((input_size * input_size * 3, hidden), dtype=np.float32) * 0.01
+        self.w2 = rng.standard_normal((hidden, classes), dtype=np.float32) * 0.01
+
+    def forward(self, images):
+        time.sleep(self.overhead)
+        x = np.stack(images).reshape(len(images), -1)
+        logits = np.maximum(x @ self.w1, 0) @ self.w2
+        return [{"class_id": int(row.argmax()), "confidence": float(row.max())} for row in logits]
+
+def timeit_forward(model, image, batch_size):
+    start = time.perf_counter()
+    model.forward([image] * batch_size)
+    return time.perf_counter() - start
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def run_level(batcher, image, clients, total_requests):
+    per_client = max(1, total_requests // clients)
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        own = []
+        for _ in range(per_client):
+            start = time.perf_counter()
+            batcher.run(image)
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies
+
+def main():
+    args = parser.parse_args()
+    model = SyntheticModel(args.input_size, args.hidden, args.overhead_ms)
+    image = np.random.default_rng(1).random((args.input_size, args.input_size, 3), dtype=np.float32)
+
+    one, sixteen = (min(timeit_forward(model, image, size) for _ in range(5)) for size in (1, 16))
+    print(f"Model call: {one * 1000:.2f} ms for 1 image, {sixteen * 1000:.2f} ms for 16")
+
+    print(f"\n{'clients':>7} {'batch':>6} {'wait ms':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for latency_ms in args.latencies_ms:
+        for batch_size in args.batch_sizes:
+            for clients in args.clients:
+                batcher = MicroBatcher(model.forward, max_batch_size=batch_size,
+                                       max_latency_ms=latency_ms, workers=args.workers)
+                throughput, latencies = run_level(batcher, image, clients, args.requests)
+                print(f"{clients:>7} {batch_size:>6} {latency_ms:>8.1f} {throughput:>9.1f} "
+                      f"{percentile(latencies, 50) * 1000:>8.2f} {percentile(latencies, 99) * 1000:>8.2f} "
+                      f"{batcher.stats()['mean_batch_size']:>11.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Near-duplicate safety check over rendered flags.
+
+Renders every flag of the registry (plus European tricolours that share
+their stripe layouts), encodes each as the original upload and as
+re-compressed / resized copies, and applies the same test DetectionService
+uses before reusing a stored prediction (hash distance, aspect ratio and
+colour signature):
+
+    python benchmarks/near_duplicate_flags.py
+    python benchmarks/near_duplicate_flags.py --algorithm phash --max-distance 6
+
+Exits non-zero when two different flags would be treated as the same image;
+also reports the copies of one flag that would not be reused.
+"""
+import argparse
+import itertools
+import os
+import sys
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from domain.flag_registry import FLAG_NAMES
+from domain.vision.image_hash import color_difference, compute_image_hash
+from domain.vision.hash_index import _popcount
+
+parser = argparse.ArgumentParser(description='Check that distinct flags never match as near-duplicates')
+parser.add_argument('--algorithm', default='dhash', choices=['dhash', 'phash'])
+parser.add_argument('--max-distance', type=int, default=Config.NEAR_DUPLICATE_MAX_DISTANCE)
+parser.add_argument('--max-color-difference', type=int, default=Config.NEAR_DUPLICATE_MAX_COLOR_DIFFERENCE)
+parser.add_argument('--max-aspect-difference', type=float, default=Config.NEAR_DUPLICATE_MAX_ASPECT_DIFFERENCE)
+
+# BGR
+RED, WHITE, BLUE, YELLOW = (38, 17, 206), (255, 255, 255), (107, 39, 0), (0, 209, 252)
+GREEN, BLACK, ORANGE, GOLD = (69, 140, 0), (0, 0, 0), (62, 136, 255), (0, 206, 255)
+WIDTH = 600
+
+
+def stripes(height, ratio, colors, weights=None, vertical=False):
+    """Equal (or weighted) stripes, top to bottom or hoist to fly"""
+    weights = weights or [1] * len(colors)
+    image = np.zeros((height, int(round(height * ratio)), 3), np.uint8)
+    length = image.shape[1] if vertical else height
+    bounds = np.round(np.cumsum([0] + weights) / sum(weights) * length).astype(int)
+    for color, start, end in zip(colors, bounds[:-1], bounds[1:]):
+        if vertical:
+            image[:, start:end] = color
+        else:
+            image[start:end] = color
+    return image
+
+
+def star(image, center, radius, color):
+    angles = np.arange(10) * np.pi / 5 - np.pi / 2
+    radii = np.where(np.arange(10) % 2 == 0, radius, radius * 0.4)
+    points = np.stack([center[0] + radii * np.cos(angles), center[1] + radii * np.sin(angles)], axis=1)
+    cv2.fillPoly(image, [points.astype(np.int32)], color)
+    return image
+
+
+def render_flags():
+    h = int(WIDTH / 1.5)
+    flags = {}
+
+    flags['indonesia'] = stripes(h, 1.5, [RED, WHITE])
+
+    image = stripes(h, 1.5, [RED, WHITE])
+    cv2.circle(image, (110, 100), 60, WHITE, -1)
+    cv2.circle(image, (135, 100), 58, RED, -1)
+    for k in range(5):
+        angle = -np.pi / 2 + k * 2 * np.pi / 5
+        star(image, (int(190 + 32 * np.cos(angle)), int(100 + 32 * np.sin(angle))), 10, WHITE)
+    flags['singapore'] = image
+
+    image = stripes(WIDTH // 2, 2.0, [RED, WHITE] * 7)
+    cv2.rectangle(image, (0, 0), (300, int(WIDTH // 2 * 8 / 14)), BLUE, -1)
+    cv2.circle(image, (110, 85), 60, YELLOW, -1)
+    cv2.circle(image, (130, 85), 52, BLUE, -1)
+    star(image, (215, 85), 38, YELLOW)
+    flags['malaysia'] = image
+
+    flags['thailand'] = stripes(h, 1.5, [RED, WHITE, BLUE, WHITE, RED], [1, 1, 2, 1, 1])
+
+    flags['vietnam'] = star(stripes(h, 1.5, [RED]), (WIDTH // 2, h // 2), 120, YELLOW)
+
+    image = stripes(WIDTH // 2, 2.0, [BLUE, RED])
+    cv2.fillPoly(image, [np.array([[0, 0], [260, 150], [0, 300]], np.int32)], WHITE)
+    cv2.circle(image, (85, 150), 32, YELLOW, -1)
+    flags['philippines'] = image
+
+    flags['myanmar'] = star(stripes(h, 1.5, [YELLOW, GREEN, RED]), (WIDTH // 2, h // 2 + 15), 150, WHITE)
+
+    image = stripes(WIDTH // 2, 2.0, [YELLOW])
+    cv2.fillPoly(image, [np.array([[0, 60], [WIDTH, 210], [WIDTH, 260], [0, 110]], np.int32)], WHITE)
+    cv2.fillPoly(image, [np.array([[0, 110], [WIDTH, 260], [WIDTH, 300], [0, 150]], np.int32)], BLACK)
+    cv2.circle(image, (WIDTH // 2, 150), 60, RED, -1)
+    flags['brunei'] = image
+
+    image = stripes(h, 1.5, [BLUE, RED, BLUE], [1, 2, 1])
+    cv2.rectangle(image, (200, 130), (400, 270), WHITE, -1)
+    flags['cambodia'] = image
+
+    image = stripes(h, 1.5, [RED, BLUE, RED], [1, 2, 1])
+    cv2.circle(image, (WIDTH // 2, h // 2), 80, WHITE, -1)
+    flags['laos'] = image
+
+    # Not in the registry, but share layouts with each other and with registry flags
+    flags['france'] = stripes(h, 1.5, [BLUE, WHITE, RED], vertical=True)
+    flags['italy'] = stripes(h, 1.5, [GREEN, WHITE, RED], vertical=True)
+    flags['ireland'] = stripes(WIDTH // 2, 2.0, [GREEN, WHITE, ORANGE], vertical=True)
+    flags['germany'] = stripes(360, 5 / 3, [BLACK, RED, GOLD])
+    flags['russia'] = stripes(h, 1.5, [WHITE, BLUE, RED])
+    flags['monaco'] = stripes(480, 1.25, [RED, WHITE])
+
+    assert set(FLAG_NAMES) <= set(flags), "render every registry flag"
+    return flags
+
+
+def copies(image):
+    """The upload itself plus re-compressed and resized copies of it"""
+    h, w = image.shape[:2]
+    yield 'original', cv2.imencode('.png', image)[1].tobytes()
+    yield 'jpeg q60', cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 60])[1].tobytes()
+    yield 'half size q75', cv2.imencode('.jpg', cv2.resize(image, (w // 2, h // 2), interpolation=cv2.INTER_AREA),
+                                         [cv2.IMWRITE_JPEG_QUALITY, 75])[1].tobytes()
+    yield '1.5x q90', cv2.imencode('.jpg', cv2.resize(image, (w * 3 // 2, h * 3 // 2)),
+                                    [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def compare(a, b):
+    """(hash distance, aspect ratio difference, colour difference) of two compute_image_hash results"""
+    distance = int(_popcount(np.array([a[0] ^ b[0]], np.uint64))[0])
+    aspect = abs(a[1] / a[2] - b[1] / b[2]) / (b[1] / b[2])
+    return distance, aspect, color_difference(a[3], b[3])
+
+
+def main():
+    args = parser.parse_args()
+    hashed = {
+        name: [(label, compute_image_hash(data, args.algorithm)) for label, data in copies(image)]
+        for name, image in render_flags().items()
+    }
+
+    def matches(a, b):
+        distance, aspect, color = compare(a, b)
+        return distance <= args.max_distance and aspect <= args.max_aspect_difference \
+            and color <= args.max_color_difference
+
+    collisions = []
+    hash_only = 0
+    for (name, variants), (other, other_variants) in itertools.combinations(hashed.items(), 2):
+        for (label, a), (other_label, b) in itertools.product(variants, other_variants):
+            if compare(a, b)[0] <= args.max_distance:
+                hash_only += 1
+            if matches(a, b):
+                collisions.append(f"{name} ({label}) ~ {other} ({other_label}): {compare(a, b)}")
+
+    missed = []
+    for name, variants in hashed.items():
+        original = variants[0][1]
+        for label, copy in variants[1:]:
+            if not matches(copy, original):
+                missed.append(f"{name} ({label}): {compare(copy, original)}")
+
+    print(f"{len(hashed)} flags, {args.algorithm}, max distance {args.max_distance}, "
+          f"max colour difference {args.max_color_difference}, max aspect difference {args.max_aspect_difference}")
+    print(f"cross-flag pairs within the hash distance alone: {hash_only}")
+    print(f"copies not recognised as their original: {len(missed)}")
+    for line in missed:
+        print(f"  {line}")
+
+    if collisions:
+        print(f"FAIL: {len(collisions)} cross-flag matches (hash distance, aspect difference, colour difference)")
+        for line in collisions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("OK: no two different flags match")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark of the vectorized NMS engine against the original per-pair loop.
+
+For 10/100/1000 random candidate boxes it checks that domain.vision.nms gives
+the same keep / iou_with_previous / overlapping_with output as the loop the
+manual calculation used before, then times both:
+
+    python benchmarks/nms_benchmark.py
+"""
+import argparse
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.vision.nms import boxes_from_predictions, nms, soft_nms
+
+parser = argparse.ArgumentParser(description='Benchmark NMS implementations')
+parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+parser.add_argument('--repeat', type=int, default=5)
+
+def legacy_iou(box1, box2):
+    x1_1 = box1["x"] - box1["width"] / 2
+    y1_1 = box1["y"] - box1["height"] / 2
+    x2_1 = box1["x"] + box1["width"] / 2
+    y2_1 = box1["y"] + box1["height"] / 2
+    x1_2 = box2["x"] - box2["width"] / 2
+    y1_2 = box2["y"] - box2["height"] / 2
+    x2_2 = box2["x"] + box2["width"] / 2
+    y2_2 = box2["y"] + box2["height"] / 2
+    x1_i, y1_i = max(x1_1, x1_2), max(y1_1, y1_2)
+    x2_i, y2_i = min(x2_1, x2_2), min(y2_1, y2_2)
+    if x2_i < x1_i or y2_i < y1_i:
+        return 0.0
+    intersection = (x2_i - x1_i) * (y2_i - y1_i)
+    union = (x2_1 - x1_1) * (y2_1 - y1_1) + (x2_2 - x1_2) * (y2_2 - y1_2) - intersection
+    return intersection / union if union > 0 else 0.0
+
+def legacy_nms(predictions, threshold=0.45):
+    """The loop previously in ManualCalculationService._simulate_nms"""
+    sorted_preds = sorted(predictions, key=lambda x: x["confidence"], reverse=True)
+    results, kept_boxes = [], []
+    for pred in sorted_preds:
+        max_iou, overlapping_with = 0, None
+        for j, kept_box in enumerate(kept_boxes):
+            iou = legacy_iou(pred, kept_box)
+            if iou > max_iou:
+                max_iou, overlapping_with = iou, j + 1
+        keep = not max_iou > threshold
+        if keep:
+            kept_boxes.append(pred)
+        results.append((round(max_iou, 2) if overlapping_with else "-", overlapping_with, keep))
+    return results
+
+def vectorized_nms(predictions, threshold=0.45):
+    boxes = boxes_from_predictions(predictions)
+    scores = [p["confidence"] for p in predictions]
+    r = nms(boxes, scores, iou_threshold=threshold)
+    results = []
+    for position in range(len(r["order"])):
+        overlapping = int(r["overlapping_with"][position])
+        results.append((
+            round(float(r["max_iou"][position]), 2) if overlapping >= 0 else "-",
+            overlapping + 1 if overlapping >= 0 else None,
+            bool(r["keep"][position])
+        ))
+    return results
+
+def random_predictions(n, rng):
+    # Clustered around a few objects, like raw detector candidates
+    centres = rng.uniform(100, 540, size=(max(1, n // 20), 2))
+    picks = centres[rng.integers(0, len(centres), size=n)] + rng.normal(0, 15, size=(n, 2))
+    sizes = rng.uniform(40, 200, size=(n, 2))
+    confidences = rng.uniform(0.05, 0.99, size=n)
+    return [
+        {"x": float(x), "y": float(y), "width": float(w), "height": float(h), "confidence": float(c)}
+        for (x, y), (w, h), c in zip(picks, sizes, confidences)
+    ]
+
+def main():
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    
+    print(f"{'boxes':>6} {'legacy ms':>10} {'vector ms':>10} {'soft ms':>9} {'speedup':>8}  same output")
+    for n in args.sizes:
+        predictions = random_predictions(n, rng)
+        same = legacy_nms(predictions) == vectorized_nms(predictions)
+        
+        legacy = min(timeit.repeat(lambda: legacy_nms(predictions), number=1, repeat=args.repeat))
+        vector = min(timeit.repeat(lambda: vectorized_nms(predictions), number=1, repeat=args.repeat))
+        boxes = boxes_from_predictions(predictions)
+        scores = [p["confidence"] for p in predictions]
+        soft = min(timeit.repeat(lambda: soft_nms(boxes, scores), number=1, repeat=args.repeat))
+        
+        print(f"{n:>6} {legacy * 1000:>10.2f} {vector * 1000:>10.2f} {soft * 1000:>9.2f} "
+              f"{legacy / vector:>7.1f}x  {same}")
+
+if __name__ == '__main__':
+    main()
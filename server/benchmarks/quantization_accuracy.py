@@ -0,0 +1,130 @@
+"""
+Accuracy regression check of the INT8 flag model against the fp32 model.
+
+Runs both local models over a fixture set of images (directory or zip) and
+treats the fp32 predictions as reference. For each image the boxes are
+matched greedily by IoU within the same class, and the report gives:
+
+    top-1 agreement   images whose highest-confidence class is the same
+    box recall        reference boxes found by INT8 (same class, IoU >= --iou)
+    box precision     INT8 boxes that match a reference box
+    confidence delta  mean |fp32 - int8| confidence over matched boxes
+    latency           per image for each model, with the thread settings given
+
+Exits non-zero when top-1 agreement or box recall fall below the limits:
+
+    python benchmarks/quantization_accuracy.py fixtures/flags/ \
+        --fp32 models/flag_yolov8n.onnx --min-top1 0.98 --min-recall 0.95 --intra-op-threads 2
+"""
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.vision.nms import boxes_from_predictions, iou_matrix
+from infrastructure.external.local_inference_client import LocalInferenceClient, quantized_model_path
+from infrastructure.image_sources import iter_images
+
+parser = argparse.ArgumentParser(description='Compare INT8 and fp32 model predictions')
+parser.add_argument('images', help='Directory or .zip of fixture images')
+parser.add_argument('--fp32', default=os.path.join('models', 'flag_yolov8n.onnx'))
+parser.add_argument('--int8', help='Quantized model (default: <fp32>.int8.onnx)')
+parser.add_argument('--iou', type=float, default=0.5, help='IoU for two boxes to count as the same detection')
+parser.add_argument('--min-top1', type=float, default=0.98)
+parser.add_argument('--min-recall', type=float, default=0.95)
+parser.add_argument('--intra-op-threads', type=int, default=0)
+parser.add_argument('--inter-op-threads', type=int, default=0)
+
+def top_class(predictions):
+    return max(predictions, key=lambda p: p["confidence"])["class"] if predictions else None
+
+def match_boxes(reference, candidate, iou_threshold):
+    """Greedy same-class matching by IoU; returns [(reference_index, candidate_index, iou)]"""
+    if not reference or not candidate:
+        return []
+    ious = iou_matrix(boxes_from_predictions(reference), boxes_from_predictions(candidate))
+    same_class = np.array([[r["class"] == c["class"] for c in candidate] for r in reference])
+    ious = np.where(same_class, ious, 0.0)
+
+    matches = []
+    while True:
+        r, c = np.unravel_index(np.argmax(ious), ious.shape)
+        if ious[r, c] < iou_threshold:
+            return matches
+        matches.append((int(r), int(c), float(ious[r, c])))
+        ious[r, :] = 0
+        ious[:, c] = 0
+
+def timed_detect(client, image):
+    start = time.perf_counter()
+    result = client.detect_flag(image)
+    return result["predictions"], time.perf_counter() - start
+
+def main():
+    args = parser.parse_args()
+    threads = dict(intra_op_threads=args.intra_op_threads, inter_op_threads=args.inter_op_threads)
+    fp32 = LocalInferenceClient(model_path=args.fp32, precision='fp32', **threads)
+    int8 = LocalInferenceClient(model_path=args.int8 or quantized_model_path(args.fp32), precision='int8', **threads)
+    # Load both sessions (and run one pass) outside the timed loop
+    blank = np.full((640, 640, 3), 255, np.uint8)
+    for client in (fp32, int8):
+        client.detect_flag(blank)
+
+    images = top1_agree = reference_boxes = candidate_boxes = matched = 0
+    confidence_deltas, fp32_times, int8_times = [], [], []
+    disagreements = []
+    for name, image_bytes in iter_images(args.images):
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            continue
+
+        reference, fp32_time = timed_detect(fp32, image)
+        candidate, int8_time = timed_detect(int8, image)
+        fp32_times.append(fp32_time)
+        int8_times.append(int8_time)
+
+        images += 1
+        if top_class(reference) == top_class(candidate):
+            top1_agree += 1
+        else:
+            disagreements.append((name, top_class(reference), top_class(candidate)))
+
+        matches = match_boxes(reference, candidate, args.iou)
+        reference_boxes += len(reference)
+        candidate_boxes += len(candidate)
+        matched += len(matches)
+        confidence_deltas.extend(abs(reference[r]["confidence"] - candidate[c]["confidence"]) for r, c, _ in matches)
+
+    if not images:
+        print(f"No readable images in {args.images}")
+        sys.exit(1)
+
+    top1 = top1_agree / images
+    recall = matched / reference_boxes if reference_boxes else 1.0
+    precision = matched / candidate_boxes if candidate_boxes else 1.0
+    print(f"Images: {images}, fp32 boxes: {reference_boxes}, int8 boxes: {candidate_boxes}")
+    print(f"Top-1 agreement:  {top1:.4f}")
+    print(f"Box recall:       {recall:.4f}")
+    print(f"Box precision:    {precision:.4f}")
+    print(f"Confidence delta: {np.mean(confidence_deltas) if confidence_deltas else 0:.4f} mean")
+    print(f"Latency ms:       fp32 p50 {np.median(fp32_times) * 1000:.1f}, "
+          f"int8 p50 {np.median(int8_times) * 1000:.1f} "
+          f"({np.median(fp32_times) / np.median(int8_times):.2f}x)")
+    for name, expected, got in disagreements[:20]:
+        print(f"  top-1 differs: {name}: fp32 {expected}, int8 {got}")
+
+    failed = False
+    if top1 < args.min_top1:
+        print(f"FAIL: top-1 agreement {top1:.4f} below {args.min_top1}")
+        failed = True
+    if recall < args.min_recall:
+        print(f"FAIL: box recall {recall:.4f} below {args.min_recall}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Local stand-in for the Roboflow inference endpoint.
+
+Answers the v0 `POST /<project>/<version>` call with a fixed prediction after
+a configurable delay, so load tests measure our serving stack rather than the
+upstream model:
+
+    python benchmarks/stub_inference_server.py --port 9001 --latency-ms 300
+    ROBOFLOW_API_URL=http://127.0.0.1:9001 uvicorn asgi:application --port 5000
+"""
+import argparse
+import asyncio
+from aiohttp import web
+
+parser = argparse.ArgumentParser(description='Stub inference server for load tests')
+parser.add_argument('--host', default='127.0.0.1')
+parser.add_argument('--port', type=int, default=9001)
+parser.add_argument('--latency-ms', type=float, default=300, help='Simulated inference time per request')
+
+STUB_RESULT = {
+    "inference_id": "stub",
+    "time": 0.0,
+    "image": {"width": 640, "height": 640},
+    "predictions": [
+        {"x": 320, "y": 320, "width": 400, "height": 260,
+         "confidence": 0.91, "class": "Indonesia", "class_id": 2,
+         "detection_id": "stub-detection"}
+    ]
+}
+
+def create_stub_app(latency_ms):
+    async def infer(request):
+        await request.read()
+        await asyncio.sleep(latency_ms / 1000)
+        return web.json_response(dict(STUB_RESULT, time=latency_ms / 1000))
+    
+    app = web.Application(client_max_size=32 * 1024 * 1024)
+    app.router.add_post('/{project}/{version}', infer)
+    return app
+
+def main():
+    args = parser.parse_args()
+    web.run_app(create_stub_app(args.latency_ms), host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
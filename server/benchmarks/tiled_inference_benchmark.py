@@ -0,0 +1,126 @@
+"""
+Recall and cost of tiled inference on large photos with small flags.
+
+Generates cluttered high-resolution scenes with a few small red-and-white
+flags, then "detects" them with a stand-in model that, like the real one,
+only sees its input resized to 640 px and misses flags smaller than a few
+pixels at that scale. Reports recall and model calls for the whole-image
+pass, for all tiles, and for tiles after the flag-color prefilter:
+
+    python benchmarks/tiled_inference_benchmark.py
+    python benchmarks/tiled_inference_benchmark.py --size 6000 4000 --flag-width 20 --scenes 10
+"""
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.vision.nms import boxes_from_predictions, iou_matrix
+from domain.vision.tiling import flag_color_pixels, merge_tile_predictions, tile_grid
+
+parser = argparse.ArgumentParser(description='Benchmark tiled inference')
+parser.add_argument('--size', type=int, nargs=2, default=[4000, 3000], metavar=('WIDTH', 'HEIGHT'))
+parser.add_argument('--scenes', type=int, default=5)
+parser.add_argument('--flags', type=int, default=6, help='Flags per scene')
+parser.add_argument('--flag-width', type=int, default=30)
+parser.add_argument('--tile-size', type=int, default=640)
+parser.add_argument('--overlap', type=float, default=0.2)
+parser.add_argument('--min-pixels', type=int, default=64, help='Prefilter threshold (TILE_MIN_FLAG_COLOR_PIXELS)')
+parser.add_argument('--min-model-pixels', type=int, default=20, help='Smallest red area the stand-in model detects')
+parser.add_argument('--seed', type=int, default=0)
+
+def make_scene(rng, width, height, flags, flag_width, distractors=8):
+    """
+    Low-saturation clutter, a few large saturated blue/green patches (signs,
+    cars) and small Indonesia-style flags; returns (image, ground truth boxes)
+    """
+    grey = rng.integers(60, 200, (height // 8, width // 8, 1))
+    tint = rng.integers(-15, 16, (height // 8, width // 8, 3))
+    image = cv2.resize(np.clip(grey + tint, 0, 255).astype(np.uint8), (width, height),
+                       interpolation=cv2.INTER_LINEAR)
+    for _ in range(distractors):
+        x, y = int(rng.integers(0, width - 200)), int(rng.integers(0, height - 120))
+        image[y:y + 120, x:x + 200] = (200, 80, 0) if rng.random() < 0.5 else (40, 160, 40)
+    flag_height = flag_width * 2 // 3
+    truth = []
+    for _ in range(flags):
+        x = int(rng.integers(0, width - flag_width))
+        y = int(rng.integers(0, height - flag_height))
+        image[y:y + flag_height // 2, x:x + flag_width] = (0, 0, 255)
+        image[y + flag_height // 2:y + flag_height, x:x + flag_width] = (255, 255, 255)
+        truth.append([x, y, x + flag_width, y + flag_height // 2])
+    return image, np.array(truth, dtype=np.float64)
+
+class StandInModel:
+    """Finds red blobs after resizing its input to 640 px, as a 640-input detector would"""
+
+    def __init__(self, input_size, min_pixels):
+        self.input_size = input_size
+        self.min_pixels = min_pixels
+        self.calls = 0
+
+    def detect_flags(self, images):
+        self.calls += len(images)
+        return [{"predictions": self._detect(image)} for image in images]
+
+    def _detect(self, image):
+        height, width = image.shape[:2]
+        scale = self.input_size / max(height, width)
+        small = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        mask = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_BGR2HSV), (0, 100, 100), (10, 255, 255))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        return [
+            {"x": (x + w / 2) / scale, "y": (y + h / 2) / scale, "width": w / scale, "height": h / scale,
+             "confidence": 0.9, "class": "Indonesia"}
+            for x, y, w, h, area in stats[1:count] if area >= self.min_pixels
+        ]
+
+def recall(predictions, truth, threshold=0.5):
+    if not predictions:
+        return 0.0
+    ious = iou_matrix(truth, boxes_from_predictions(predictions))
+    return float((ious.max(axis=1) >= threshold).mean())
+
+def run(model, image, tiles):
+    start = time.perf_counter()
+    inputs = [image] + [np.ascontiguousarray(image[y1:y2, x1:x2]) for x1, y1, x2, y2 in tiles]
+    results = model.detect_flags(inputs)
+    offsets = [(0, 0)] + [(x1, y1) for x1, y1, _, _ in tiles]
+    return merge_tile_predictions(results, offsets), time.perf_counter() - start
+
+def main():
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    width, height = args.size
+    tiles = tile_grid(width, height, args.tile_size, args.overlap)
+    print(f"{width}x{height} scenes, {len(tiles)} tiles of {args.tile_size} px, {args.flags} flags "
+          f"of {args.flag_width} px each")
+
+    rows = {"whole image": [], "all tiles": [], "prefiltered tiles": []}
+    prefilter_ms = []
+    for _ in range(args.scenes):
+        image, truth = make_scene(rng, width, height, args.flags, args.flag_width)
+
+        start = time.perf_counter()
+        pixels = flag_color_pixels(image, tiles)
+        active = [tile for tile, count in zip(tiles, pixels) if count >= args.min_pixels]
+        prefilter_ms.append((time.perf_counter() - start) * 1000)
+
+        for name, selected in (("whole image", []), ("all tiles", tiles), ("prefiltered tiles", active)):
+            model = StandInModel(args.tile_size, args.min_model_pixels)
+            predictions, elapsed = run(model, image, selected)
+            rows[name].append((recall(predictions, truth), model.calls, elapsed))
+
+    print(f"\n{'mode':>18} {'recall':>7} {'calls':>6} {'ms':>8}")
+    for name, values in rows.items():
+        r, calls, elapsed = np.mean(values, axis=0)
+        print(f"{name:>18} {r:>7.3f} {calls:>6.1f} {elapsed * 1000:>8.1f}")
+    print(f"\nPrefilter: {np.mean(prefilter_ms):.1f} ms per image")
+
+if __name__ == '__main__':
+    main()
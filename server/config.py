@@ -10,6 +10,118 @@ class Config:
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI') or 'mysql+pymysql://root:@localhost/flag_detection'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Rate limiting settings
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    # memory:// keeps buckets per worker, sqlite:///path shares them between workers
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI') or 'memory://'
+    # Token buckets per endpoint scope: (burst capacity, tokens refilled per second)
+    RATELIMIT_BUCKETS = {
+        'detect': (10, 0.5),
+        'manual_calculation': (3, 0.1),
+        'manual_calculation_batch': (2, 1 / 300),
+        'detect_video': (2, 1 / 120)
+    }
+    # Detection requests allowed per UTC day, counted per client in daily_usage (0 disables);
+    # a video is charged one request per inferred frame
+    DAILY_DETECTION_QUOTA = int(os.environ.get('DAILY_DETECTION_QUOTA', 500))
+    ANONYMOUS_DAILY_DETECTION_QUOTA = int(os.environ.get('ANONYMOUS_DAILY_DETECTION_QUOTA', 50))
+    
+    # Reuse the prediction of a perceptually near-identical earlier upload (off by
+    # default: check benchmarks/near_duplicate_flags.py before enabling or retuning)
+    NEAR_DUPLICATE_ENABLED = os.environ.get('NEAR_DUPLICATE_ENABLED', 'false').lower() == 'true'
+    # Max Hamming distance between 64-bit hashes to count as the same image
+    NEAR_DUPLICATE_MAX_DISTANCE = int(os.environ.get('NEAR_DUPLICATE_MAX_DISTANCE', 4))
+    # A hash match is only reused if no cell of the 12x12 colour grid differs by more
+    # than this in one Lab channel (0-255) and the aspect ratios differ by at most this share
+    NEAR_DUPLICATE_MAX_COLOR_DIFFERENCE = int(os.environ.get('NEAR_DUPLICATE_MAX_COLOR_DIFFERENCE', 16))
+    NEAR_DUPLICATE_MAX_ASPECT_DIFFERENCE = float(os.environ.get('NEAR_DUPLICATE_MAX_ASPECT_DIFFERENCE', 0.05))
+    # How often each worker picks up hashes stored by other workers
+    NEAR_DUPLICATE_REFRESH_SECONDS = int(os.environ.get('NEAR_DUPLICATE_REFRESH_SECONDS', 30))
+    # Perceptual hash used for near-duplicate lookups: 'dhash' or 'phash'
+    IMAGE_HASH_ALGORITHM = os.environ.get('IMAGE_HASH_ALGORITHM', 'dhash')
+    # Identical uploads arriving while one is in flight wait for its inference
+    DETECTION_COALESCING_ENABLED = os.environ.get('DETECTION_COALESCING_ENABLED', 'true').lower() == 'true'
+    # Group concurrent detections into one inference call (worth it with a batching inference server)
+    INFERENCE_BATCHING_ENABLED = os.environ.get('INFERENCE_BATCHING_ENABLED', 'false').lower() == 'true'
+    # A batch is sent once it holds this many images...
+    INFERENCE_BATCH_MAX_SIZE = int(os.environ.get('INFERENCE_BATCH_MAX_SIZE', 8))
+    # ...or this long after its first image arrived
+    INFERENCE_BATCH_MAX_LATENCY_MS = float(os.environ.get('INFERENCE_BATCH_MAX_LATENCY_MS', 10))
+    # Batches in flight at once, per worker process
+    INFERENCE_BATCH_WORKERS = int(os.environ.get('INFERENCE_BATCH_WORKERS', 1))
+    # Sliced inference for /api/detect (per request with ?tiled=true, or for every request)
+    TILED_INFERENCE_DEFAULT = os.environ.get('TILED_INFERENCE_DEFAULT', 'false').lower() == 'true'
+    # Tile side in pixels (the model input size) and the share neighbouring tiles overlap
+    TILE_SIZE = int(os.environ.get('TILE_SIZE', 640))
+    TILE_OVERLAP = float(os.environ.get('TILE_OVERLAP', 0.2))
+    # Tiles with fewer saturated red/green/blue/yellow pixels than this are skipped
+    TILE_MIN_FLAG_COLOR_PIXELS = int(os.environ.get('TILE_MIN_FLAG_COLOR_PIXELS', 64))
+    # Intersection over the smaller box above which same-class tile detections are merged
+    TILE_MERGE_THRESHOLD = float(os.environ.get('TILE_MERGE_THRESHOLD', 0.5))
+    
+    # Video detection: frames past this are not read (about 10 minutes at 30 fps)
+    VIDEO_MAX_FRAMES = int(os.environ.get('VIDEO_MAX_FRAMES', 18000))
+    # Only every n-th frame is decoded and examined for scene changes
+    VIDEO_FRAME_STRIDE = int(os.environ.get('VIDEO_FRAME_STRIDE', 2))
+    # Thumbnail difference (0-1) from the last inferred frame that triggers a new inference
+    VIDEO_SCENE_CHANGE_THRESHOLD = float(os.environ.get('VIDEO_SCENE_CHANGE_THRESHOLD', 0.08))
+    # Inference runs at least this often even in a static shot
+    VIDEO_MAX_INFERENCE_INTERVAL_SECONDS = float(os.environ.get('VIDEO_MAX_INFERENCE_INTERVAL_SECONDS', 2.0))
+    
+    # Which routes this process serves: 'all', 'api' (CRUD, auth, detection) or
+    # 'vision' (manual calculation); run one pool per role behind the proxy
+    APP_ROLE = os.environ.get('APP_ROLE', 'all')
+    # Run manual calculation stages in this many child processes (0 = in the request thread)
+    VISION_PROCESS_POOL_WORKERS = int(os.environ.get('VISION_PROCESS_POOL_WORKERS', 0))
+    # Default manual calculation quality ('fast' or 'full'; requests may override)
+    # and the longest image side used by the geometric stages in fast mode
+    MANUAL_CALCULATION_QUALITY = os.environ.get('MANUAL_CALCULATION_QUALITY', 'full')
+    MANUAL_CALCULATION_ANALYSIS_SIZE = int(os.environ.get('MANUAL_CALCULATION_ANALYSIS_SIZE', 320))
+    # Default response detail: 'full' or 'summary' (no static text, kernels or pixel samples)
+    MANUAL_CALCULATION_DETAIL = os.environ.get('MANUAL_CALCULATION_DETAIL', 'full')
+    # Largest zip accepted by the batch endpoint (the CLI has no limit)
+    MANUAL_CALCULATION_BATCH_MAX_IMAGES = int(os.environ.get('MANUAL_CALCULATION_BATCH_MAX_IMAGES', 5000))
+    # Inference results reused for identical images: 'memory://' or 'sqlite:///path/to.db'
+    PREDICTION_CACHE_URI = os.environ.get('PREDICTION_CACHE_URI', 'memory://')
+    
+    # Live admin dashboard feed: memory:// only reaches listeners on the worker that
+    # wrote the detection, sqlite:///path (relative to the instance folder) reaches
+    # every worker on the host and is only written while a dashboard is open
+    # (gunicorn.conf.py defaults it to sqlite:///events.db with several workers)
+    EVENT_BROKER_URI = os.environ.get('EVENT_BROKER_URI') or 'memory://'
+    # Keep-alive comment interval, so proxies do not close an idle stream
+    ADMIN_STREAM_HEARTBEAT_SECONDS = float(os.environ.get('ADMIN_STREAM_HEARTBEAT_SECONDS', 15))
+    # Streams end after this long and the browser reconnects, freeing the worker thread
+    ADMIN_STREAM_MAX_SECONDS = int(os.environ.get('ADMIN_STREAM_MAX_SECONDS', 300))
+    # Open streams per worker process, each holding one of its GUNICORN_THREADS; dashboards
+    # over the cap get one snapshot per reconnect, every ADMIN_STREAM_POLL_SECONDS
+    ADMIN_STREAM_MAX_PER_WORKER = int(os.environ.get('ADMIN_STREAM_MAX_PER_WORKER', 1))
+    ADMIN_STREAM_POLL_SECONDS = float(os.environ.get('ADMIN_STREAM_POLL_SECONDS', 30))
+    
+    # Drift monitoring: the recent window compared with the baseline days before it
+    DRIFT_WINDOW_HOURS = int(os.environ.get('DRIFT_WINDOW_HOURS', 24))
+    DRIFT_BASELINE_DAYS = int(os.environ.get('DRIFT_BASELINE_DAYS', 7))
+    # Population stability index above which a distribution shift is a warning / an alert
+    DRIFT_PSI_WARNING = float(os.environ.get('DRIFT_PSI_WARNING', 0.1))
+    DRIFT_PSI_ALERT = float(os.environ.get('DRIFT_PSI_ALERT', 0.25))
+    # Distributions with fewer samples than this in either period are not judged
+    # (below it, sampling noise alone pushes the PSI toward the warning level)
+    DRIFT_MIN_SAMPLES = int(os.environ.get('DRIFT_MIN_SAMPLES', 200))
+    # Hourly drift counters older than this are deleted as each new hour's first requests are counted
+    DRIFT_RETENTION_DAYS = int(os.environ.get('DRIFT_RETENTION_DAYS', 60))
+    
+    # Request tracing: spans for upload parsing, decoding, inference, analysis stages and SQL
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'false').lower() == 'true'
+    # Share of requests traced; requests with a sampled traceparent header are always traced
+    TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0.01))
+    # memory://, file://path/to/traces.jsonl (OTLP/JSON lines) or an OTLP/HTTP collector URL
+    TRACING_EXPORTER_URI = os.environ.get('TRACING_EXPORTER_URI') or 'file://instance/traces.jsonl'
+    
+    # Startup settings used by the production entry point (wsgi.py)
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'true').lower() == 'true'
+    # Also send one real inference upstream during warmup (billed like any other call)
+    WARMUP_REMOTE_INFERENCE = os.environ.get('WARMUP_REMOTE_INFERENCE', 'false').lower() == 'true'
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -21,6 +133,7 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    RATELIMIT_ENABLED = False
 
 # Configuration dictionary
 config_by_name = {
@@ -0,0 +1,36 @@
+from flask import current_app
+from infrastructure.event_broker import create_event_broker
+
+
+class EventBus:
+    """
+    Publish/subscribe for live updates (the admin dashboard stream).
+
+    Writers publish small events after committing; the broker that carries
+    them is pluggable (see infrastructure.event_broker) and chosen by the
+    EVENT_BROKER_URI config entry.
+    """
+
+    def __init__(self, app=None):
+        self.broker = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.broker = create_event_broker(app.config.get('EVENT_BROKER_URI'), app.instance_path)
+        app.extensions['event_bus'] = self
+
+    def publish(self, event_type, data):
+        """Publish an event; failures are logged, never raised into the writer's request"""
+        if self.broker is None:
+            return
+        try:
+            self.broker.publish(event_type, data)
+        except Exception as e:
+            current_app.logger.warning(f"Could not publish {event_type} event: {str(e)}")
+
+    def subscribe(self):
+        return self.broker.subscribe()
+
+
+event_bus = EventBus()
@@ -16,4 +16,12 @@ class ForbiddenError(ApiError):
     
 class NotFoundError(ApiError):
     """Raised when a resource is not found"""
-    status_code = 404
\ No newline at end of file
+    status_code = 404
+    
+class RateLimitError(ApiError):
+    """Raised when a client exceeds its rate limit or daily quota"""
+    status_code = 429
+    
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
\ No newline at end of file
@@ -0,0 +1,52 @@
+import hashlib
+import threading
+from flask import current_app, request
+from core.serialization import dumps
+
+_static_bodies = {}
+_static_bodies_lock = threading.Lock()
+
+
+def static_json_response(key, build, max_age=86400):
+    """
+    JSON response for data that only changes with a deploy.
+
+    build() runs and is serialized once per process; the response carries a
+    strong ETag of the body and a long private max-age, and a request whose
+    If-None-Match matches gets a bodiless 304.
+    """
+    entry = _static_bodies.get(key)
+    if entry is None:
+        with _static_bodies_lock:
+            entry = _static_bodies.get(key)
+            if entry is None:
+                body = dumps(build())
+                entry = _static_bodies[key] = (body, hashlib.sha256(body).hexdigest()[:32])
+
+    body, etag = entry
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'private, max-age={max_age}'
+    return response.make_conditional(request)
+
+
+def version_etag(*parts):
+    """Weak ETag value for a page derived from cheap version data (latest id, row count, page)"""
+    return "-".join(str(part) for part in parts)
+
+
+def is_not_modified(etag):
+    """True when the client's If-None-Match already holds the weak `etag`"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified(etag):
+    response = current_app.response_class(status=304)
+    return with_version_etag(response, etag)
+
+
+def with_version_etag(response, etag):
+    """Tag a per-user response; no-cache makes the browser revalidate it on every use"""
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,106 @@
+import functools
+import math
+from datetime import datetime, timedelta
+from flask import current_app, request
+from flask_login import current_user
+from core.exceptions import RateLimitError
+from domain.models.daily_usage import DailyUsage
+from infrastructure.database import bump_counter, db
+from infrastructure.rate_limit_store import create_rate_limit_store
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter keyed by user id (or IP for anonymous clients).
+
+    Bucket sizes per scope come from the RATELIMIT_BUCKETS config entry and
+    the bucket state lives in a pluggable store (see infrastructure.rate_limit_store).
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.store = create_rate_limit_store(app.config.get('RATELIMIT_STORAGE_URI'))
+        app.extensions['rate_limiter'] = self
+
+    def check(self, scope, key):
+        """Consume one token for `key` in `scope`, raising RateLimitError when empty"""
+        buckets = current_app.config.get('RATELIMIT_BUCKETS', {})
+        if scope not in buckets:
+            return
+
+        capacity, refill_rate = buckets[scope]
+        allowed, _, retry_after = self.store.consume(f"{scope}:{key}", capacity, refill_rate)
+
+        if not allowed:
+            raise RateLimitError(
+                "Too many requests, please slow down",
+                retry_after=max(1, math.ceil(retry_after))
+            )
+
+
+rate_limiter = RateLimiter()
+
+
+def client_key(user_id=None, ip_address=None):
+    """Identify the caller by user id when logged in, otherwise by IP address"""
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{ip_address}"
+
+
+def check_daily_quota(user_id=None, ip_address=None, cost=1):
+    """
+    Charge `cost` detection requests to the caller's quota for today (UTC),
+    raising RateLimitError when it was already used up (cost=0 only checks).
+
+    Every request is charged, including those that detect nothing, since each
+    one can cost an upstream inference. Usage is one daily_usage row per
+    client and day; logged in users are counted by user_id, anonymous clients
+    by ip_address.
+    """
+    if user_id is not None:
+        quota = current_app.config.get('DAILY_DETECTION_QUOTA')
+    else:
+        quota = current_app.config.get('ANONYMOUS_DAILY_DETECTION_QUOTA')
+
+    if not quota:
+        return
+
+    now = datetime.utcnow()
+    key = {'client_key': client_key(user_id, ip_address), 'day': now.date()}
+    if cost:
+        bump_counter(DailyUsage, key, count=cost)
+    used = db.session.query(DailyUsage.count).filter_by(**key).scalar() or 0
+    db.session.commit()
+
+    if used - cost >= quota:
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        seconds_to_reset = (day_start + timedelta(days=1) - now).total_seconds()
+        raise RateLimitError(
+            f"Daily detection quota of {quota} reached",
+            retry_after=max(1, math.ceil(seconds_to_reset))
+        )
+
+
+def rate_limit(scope, daily_quota=False, quota_cost=1):
+    """
+    Decorator applying the token bucket for `scope` and optionally the daily quota,
+    charging `quota_cost` requests up front (0 for views that charge as they go).
+
+    Raises RateLimitError, which the app turns into a 429 with Retry-After.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            if current_app.config.get('RATELIMIT_ENABLED', True):
+                user_id = current_user.id if current_user.is_authenticated else None
+                rate_limiter.check(scope, client_key(user_id, request.remote_addr))
+                if daily_quota:
+                    check_daily_quota(user_id, request.remote_addr, quota_cost)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
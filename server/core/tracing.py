@@ -0,0 +1,239 @@
+"""
+Request tracing.
+
+A sampled request gets a root span; code below it opens child spans with
+`tracer.span(name)` (or the `traced` decorator) and SQL statements get one
+span each. The current span lives in a context variable, so spans nest
+across function calls and async awaits without being passed around. An
+incoming W3C `traceparent` header continues the caller's trace and keeps its
+sampling decision; other requests are sampled at TRACING_SAMPLE_RATE.
+Unsampled requests create no spans, so `tracer.span` costs one context
+variable lookup. Finished spans go to a pluggable exporter (see
+infrastructure.trace_exporter).
+"""
+import contextvars
+import functools
+import os
+import random
+import re
+import time
+from contextlib import nullcontext
+from flask import g, request
+from infrastructure.trace_exporter import create_span_exporter
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+# Longest SQL statement text kept on a db.query span
+_MAX_STATEMENT_LENGTH = 500
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    __slots__ = ('exporter', 'name', 'kind', 'trace_id', 'span_id', 'parent_id',
+                 'attributes', 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, exporter, name, trace_id, parent_id=None, kind='internal', attributes=None):
+        self.exporter = exporter
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.error = str(exc) or type(exc).__name__
+        self.attributes['exception.type'] = type(exc).__name__
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        self.exporter.export(self)
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+def parse_traceparent(header):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None"""
+    match = _TRACEPARENT.match((header or '').strip().lower())
+    if match is None or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class Tracer:
+    def __init__(self, app=None):
+        self.exporter = None
+        self.sample_rate = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['tracer'] = self
+        if not app.config.get('TRACING_ENABLED', False):
+            self.exporter = None
+            return
+
+        self.sample_rate = app.config.get('TRACING_SAMPLE_RATE', 0.01)
+        self.exporter = create_span_exporter(
+            app.config.get('TRACING_EXPORTER_URI'),
+            f"flag-detection-{app.config.get('APP_ROLE', 'all')}"
+        )
+        _instrument_sqlalchemy()
+
+        app.before_request(self._start_request)
+        app.after_request(self._tag_response)
+        app.teardown_request(self._end_request)
+
+    def start_trace(self, name, traceparent=None, attributes=None):
+        """Root span for an incoming request, or None when the request is not sampled"""
+        if self.exporter is None:
+            return None
+
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return None
+        return Span(self.exporter, name, trace_id, parent_id, kind='server', attributes=attributes)
+
+    def activate(self, span):
+        """Make `span` the current span; returns the token for deactivate"""
+        return _current_span.set(span)
+
+    def deactivate(self, token):
+        _current_span.reset(token)
+
+    def current_span(self):
+        return _current_span.get()
+
+    def span(self, name, kind='internal', **attributes):
+        """
+        Context manager for a child span of the current span; outside a sampled
+        trace it records nothing and yields None
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return _NO_SPAN
+        return _ActiveSpan(Span(parent.exporter, name, parent.trace_id, parent.span_id, kind, attributes))
+
+    def _start_request(self):
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        span = self.start_trace(f"{request.method} {rule}", request.headers.get('traceparent'), {
+            'http.method': request.method,
+            'http.route': rule,
+            'http.request_content_length': request.content_length or 0
+        })
+        if span is not None:
+            g.trace_span = span
+            g.trace_token = _current_span.set(span)
+
+    def _tag_response(self, response):
+        span = g.get('trace_span')
+        if span is not None:
+            span.set_attribute('http.status_code', response.status_code)
+            # Lets a client find its request in the trace store
+            response.headers['traceresponse'] = span.traceparent
+        return response
+
+    def _end_request(self, exc):
+        span = g.pop('trace_span', None)
+        if span is None:
+            return
+        if exc is not None:
+            span.record_exception(exc)
+        try:
+            _current_span.reset(g.pop('trace_token'))
+        except ValueError:
+            # Torn down from another context (e.g. after a streamed response)
+            pass
+        span.end()
+
+
+class _ActiveSpan:
+    """Makes a span current for the duration of a with block and ends it on exit"""
+    __slots__ = ('span', 'token')
+
+    def __init__(self, span):
+        self.span = span
+        self.token = None
+
+    def __enter__(self):
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.span.record_exception(exc)
+        _current_span.reset(self.token)
+        self.span.end()
+        return False
+
+
+_NO_SPAN = nullcontext()
+
+tracer = Tracer()
+
+
+def traced(name):
+    """Decorator running the function in a child span called `name`"""
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return f(*args, **kwargs)
+            with tracer.span(name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+_sqlalchemy_instrumented = False
+
+
+def _instrument_sqlalchemy():
+    """One client span per SQL statement executed inside a sampled trace"""
+    global _sqlalchemy_instrumented
+    if _sqlalchemy_instrumented:
+        return
+    _sqlalchemy_instrumented = True
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        context._trace_span = Span(parent.exporter, 'db.query', parent.trace_id, parent.span_id, 'client', {
+            'db.system': conn.dialect.name,
+            'db.statement': statement[:_MAX_STATEMENT_LENGTH],
+            'db.executemany': executemany
+        })
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, '_trace_span', None)
+        if span is not None:
+            context._trace_span = None
+            span.set_attribute('db.rows', cursor.rowcount)
+            span.end()
+
+    @event.listens_for(Engine, 'handle_error')
+    def _handle_error(exception_context):
+        span = getattr(exception_context.execution_context, '_trace_span', None)
+        if span is not None:
+            exception_context.execution_context._trace_span = None
+            span.record_exception(exception_context.original_exception)
+            span.end()
@@ -0,0 +1,94 @@
+import os
+import time
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from infrastructure.database import db
+
+
+def check_migrations(app):
+    """
+    Warn when the database is not at the latest Alembic revision.
+
+    The production entry point never calls db.create_all(); the schema is
+    owned by `flask db upgrade`, so a stale database is only reported here.
+    """
+    migrate = app.extensions['migrate'].migrate
+    directory = os.path.join(app.root_path, 'migrations')
+    script = ScriptDirectory.from_config(migrate.get_config(directory))
+
+    try:
+        with db.engine.connect() as connection:
+            current_heads = set(MigrationContext.configure(connection).get_current_heads())
+    except Exception as e:
+        app.logger.warning(f"Could not read the database migration state: {str(e)}")
+        return False
+
+    expected_heads = set(script.get_heads())
+    if current_heads != expected_heads:
+        app.logger.warning(
+            f"Database is at revision {sorted(current_heads) or 'none'} but the latest is "
+            f"{sorted(expected_heads)}; run `flask db upgrade`"
+        )
+        return False
+    return True
+
+
+def warmup_app(app, started_at=None):
+    """
+    Prepare a freshly created app before it starts serving.
+
+    Meant to run once in the gunicorn master (preload_app) so the services
+    built at import time and the caches primed here are shared copy-on-write
+    by every forked worker.
+
+    Args:
+        app: Flask application
+        started_at: time.perf_counter() value taken at process start, used to
+            report the total cold-start time
+
+    Returns:
+        dict: seconds spent in each startup phase
+    """
+    from presentation.api.detection_routes import detection_service
+    from presentation.api.manual_calculation_routes import get_manual_calc_service
+
+    timings = {}
+    phase_start = time.perf_counter()
+    if started_at is not None:
+        timings['import_and_create_app'] = phase_start - started_at
+
+    with app.app_context():
+        check_migrations(app)
+        timings['migration_check'] = time.perf_counter() - phase_start
+
+        role = app.config.get('APP_ROLE', 'all')
+        if app.config.get('WARMUP_ENABLED', True):
+            if role in ('all', 'api'):
+                phase_start = time.perf_counter()
+                detection_service.roboflow_client.client
+                timings['inference_client_init'] = time.perf_counter() - phase_start
+
+                if app.config.get('WARMUP_REMOTE_INFERENCE', False):
+                    phase_start = time.perf_counter()
+                    try:
+                        import numpy as np
+
+                        image = np.full((640, 640, 3), 255, dtype=np.uint8)
+                        detection_service.roboflow_client.detect_flag(image)
+                    except Exception as e:
+                        app.logger.warning(f"Warmup inference failed: {str(e)}")
+                    timings['remote_inference_warmup'] = time.perf_counter() - phase_start
+
+            if role in ('all', 'vision'):
+                # Force the lazily loaded vision stack (cv2, sklearn, flag metadata
+                # and HSV tables) in before forking
+                phase_start = time.perf_counter()
+                get_manual_calc_service().warmup()
+                timings['manual_calculation_warmup'] = time.perf_counter() - phase_start
+
+    if started_at is not None:
+        timings['total_cold_start'] = time.perf_counter() - started_at
+
+    app.config['STARTUP_TIMINGS'] = {k: round(v, 3) for k, v in timings.items()}
+    app.logger.info(f"Startup timings (s): {app.config['STARTUP_TIMINGS']}")
+    return timings
@@ -0,0 +1,109 @@
+"""
+Registry of the flag classes the detection model knows.
+
+Built once at import and shared by every service in the process. Entries are
+immutable, with aspect ratios already parsed; NumPy views of the expected
+palettes (for scoring all flags at once) are built on first use so that
+importing the registry doesn't load the vision stack.
+"""
+import functools
+from dataclasses import dataclass
+from types import MappingProxyType
+
+
+@dataclass(frozen=True)
+class FlagSpec:
+    name: str
+    display_name: str
+    colors: tuple
+    pattern: str
+    aspect_ratio: str
+    # aspect_ratio parsed to width / height
+    aspect_ratio_value: float
+    expected_color_distribution: MappingProxyType
+    orientation: str
+    line_pattern: str
+    expected_lines: int
+
+
+def _parse_ratio(ratio_str, default=1.5):
+    """'3:2' -> 1.5"""
+    if ":" not in ratio_str:
+        return default
+    w_ratio, h_ratio = map(int, ratio_str.split(":"))
+    return w_ratio / h_ratio if h_ratio > 0 else default
+
+
+def _flag(name, colors, pattern, aspect_ratio, expected_color_distribution,
+          line_pattern, expected_lines, orientation="horizontal"):
+    return FlagSpec(
+        name=name,
+        display_name=name.capitalize(),
+        colors=tuple(colors),
+        pattern=pattern,
+        aspect_ratio=aspect_ratio,
+        aspect_ratio_value=_parse_ratio(aspect_ratio),
+        expected_color_distribution=MappingProxyType(dict(expected_color_distribution)),
+        orientation=orientation,
+        line_pattern=line_pattern,
+        expected_lines=expected_lines
+    )
+
+
+# Listed in the order the manual calculation has always used; score ties keep it
+FLAGS = MappingProxyType({spec.name: spec for spec in (
+    _flag("indonesia", ["red", "white"], "2 horizontal stripes (red-white)", "3:2",
+          {"red": 0.5, "white": 0.5}, "horizontal", 1),  # One line separating two stripes
+    _flag("malaysia", ["blue", "red", "white", "yellow"], "14 horizontal stripes with canton", "2:1",
+          {"blue": 0.25, "red": 0.40, "white": 0.25, "yellow": 0.1}, "horizontal", 13),  # 14 stripes means 13 lines
+    _flag("singapore", ["red", "white"], "2 horizontal stripes with crescent and stars", "3:2",
+          {"red": 0.5, "white": 0.5}, "horizontal", 1),
+    _flag("thailand", ["red", "white", "blue"], "5 horizontal stripes", "3:2",
+          {"red": 0.33, "white": 0.33, "blue": 0.33}, "horizontal", 4),  # 5 stripes means 4 lines
+    _flag("vietnam", ["red", "yellow"], "red with yellow star", "3:2",
+          {"red": 0.95, "yellow": 0.05}, "none", 0),
+    _flag("philippines", ["blue", "red", "white", "yellow"], "horizontal bicolor with triangle", "1:2",
+          {"blue": 0.5, "red": 0.5, "white": 0.1, "yellow": 0.05}, "horizontal+diagonal", 2),  # 1 horizontal + 1 diagonal
+    _flag("myanmar", ["yellow", "green", "red"], "3 horizontal stripes with star", "3:2",
+          {"yellow": 0.33, "green": 0.33, "red": 0.33}, "horizontal", 2),
+    _flag("brunei", ["yellow", "white", "black"], "yellow with diagonal stripes and emblem", "1:2",
+          {"yellow": 0.8, "white": 0.1, "black": 0.1}, "diagonal", 2),  # Diagonal stripes
+    _flag("cambodia", ["blue", "red", "white"], "horizontal tricolor with emblem", "2:3",
+          {"blue": 0.2, "red": 0.6, "white": 0.2}, "horizontal", 2),  # 3 stripes means 2 lines
+    _flag("laos", ["blue", "red", "white"], "horizontal tricolor with circle", "2:3",
+          {"blue": 0.25, "red": 0.5, "white": 0.25}, "horizontal", 2),
+)})
+
+FLAG_NAMES = tuple(FLAGS)
+FLAG_DISPLAY_NAMES = tuple(spec.display_name for spec in FLAGS.values())
+
+
+@functools.lru_cache(maxsize=None)
+def flag_palette_arrays(color_names):
+    """
+    Expected palettes of all flags as matrices over `color_names` (a tuple).
+
+    Returns:
+        tuple: (distribution, palette, expected_columns), all read-only.
+        distribution is (len(FLAGS), len(color_names)) with the expected share
+        of each color, palette is 1.0 where the color belongs to the flag, and
+        expected_columns lists each flag's distribution colors as column
+        indices in registry order, padded with -1.
+    """
+    import numpy as np
+
+    distribution = np.zeros((len(FLAGS), len(color_names)))
+    palette = np.zeros((len(FLAGS), len(color_names)))
+    widest = max(len(spec.expected_color_distribution) for spec in FLAGS.values())
+    expected_columns = np.full((len(FLAGS), widest), -1, dtype=np.intp)
+    columns = {color: i for i, color in enumerate(color_names)}
+    for row, spec in enumerate(FLAGS.values()):
+        for position, (color, share) in enumerate(spec.expected_color_distribution.items()):
+            distribution[row, columns[color]] = share
+            expected_columns[row, position] = columns[color]
+        for color in spec.colors:
+            palette[row, columns[color]] = 1.0
+
+    for array in (distribution, palette, expected_columns):
+        array.flags.writeable = False
+    return distribution, palette, expected_columns
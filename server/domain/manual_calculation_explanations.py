@@ -0,0 +1,44 @@
+"""
+Static explanatory text of the manual calculation.
+
+Kept apart from the calculation so full responses can embed it while compact
+responses leave it out and clients fetch it once from
+GET /api/admin/manual-calculation/explanations. Importing this module doesn't
+load the vision stack.
+"""
+
+# Keyed like the stages of the manual_calculation result; pattern_matching
+# is a template formatted with the predicted class
+STAGE_EXPLANATIONS = {
+    "convolution": "Convolution detects features like edges by applying filter kernels to the image. " +
+                   "In a real CNN, hundreds of learned filters detect complex patterns.",
+    "feature_maps": "Feature maps capture patterns like edges, textures, and color transitions. " +
+                    "In a real CNN, early layers detect simple features while deeper layers detect " +
+                    "more complex patterns. Pooling reduces dimensionality while preserving important features.",
+    "bounding_box": "Grid cell: Location in 13x13 feature map. (x,y)_center: Position relative to grid cell. " +
+                    "width/height: Size relative to image. YOLOv8 predicts bounding boxes by learning " +
+                    "offsets from anchor boxes in each grid cell.",
+    "class_probabilities": "Probabilities are calculated based on color distribution match with known flags. " +
+                           "Both HSV color classification and dominant color clustering are used to improve accuracy.",
+    "pattern_matching": "Pattern score evaluates how well the image matches the expected pattern for {predicted_class} flag using Hough line detection for identifying stripes and geometric patterns, and the color purity of each expected stripe band.",
+    "shape_analysis": "Shape analysis evaluates geometric properties of the detected flag using contour analysis, aspect ratio comparison, color-layout symmetry, and edge detection.",
+    "nms": "Non-Maximum Suppression removes overlapping boxes, keeping only the highest confidence detections. " +
+           "In object detection, NMS prevents duplicate detections of the same object.",
+    "final_confidence": "Final confidence is calculated using a weighted geometric mean of all component scores, " +
+                        "similar to how neural networks combine feature confidences but in a much simplified form."
+}
+
+CONFIDENCE_COMPONENT_EXPLANATIONS = {
+    "Objectness Score": "Confidence from bounding box detection",
+    "Class Probability": "Probability of the detected flag class",
+    "Pattern Score": "Score for pattern matching",
+    "Shape Score": "Score for shape characteristics"
+}
+
+EDUCATIONAL_NOTE = {
+    "title": "Educational Simulation Note",
+    "description": "This is a simplified educational simulation of how CNN-based models like YOLOv8 work. " +
+                  "It doesn't represent an actual neural network implementation but rather illustrates the " +
+                  "concepts behind object detection for learning purposes. The actual CNN process is more " +
+                  "complex and involves millions of parameters trained on large datasets."
+}
@@ -0,0 +1,16 @@
+from infrastructure.database import db
+
+class DailyUsage(db.Model):
+    """
+    Detection requests charged to a client's daily quota, one row per client
+    and UTC day, bumped before each request is served
+    """
+    __tablename__ = 'daily_usage'
+    
+    # 'user:<id>' or 'ip:<address>' (see core.rate_limit.client_key)
+    client_key = db.Column(db.String(64), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DailyUsage {self.client_key}/{self.day}: {self.count}>'
@@ -0,0 +1,22 @@
+from infrastructure.database import db
+
+class Detection(db.Model):
+    """A single predicted box; one DetectionLog row owns every box of its request"""
+    __tablename__ = 'detections'
+    __table_args__ = (
+        # Covers GROUP BY class_name with AVG/MIN/MAX(confidence) without touching the table
+        db.Index('ix_detections_class_name_confidence', 'class_name', 'confidence'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    detection_log_id = db.Column(db.Integer, db.ForeignKey('detection_logs.id'), nullable=False, index=True)
+    class_name = db.Column(db.String(64), nullable=False)
+    confidence = db.Column(db.Float, nullable=False)
+    # Box centre and size in pixels of the submitted image, as returned by the model
+    x = db.Column(db.Float)
+    y = db.Column(db.Float)
+    width = db.Column(db.Float)
+    height = db.Column(db.Float)
+    
+    def __repr__(self):
+        return f'<Detection {self.id}: {self.class_name} ({self.confidence:.2f})>'
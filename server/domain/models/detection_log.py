@@ -1,8 +1,13 @@
 from datetime import datetime
 from infrastructure.database import db
+from domain.models.detection import Detection
 
 class DetectionLog(db.Model):
     __tablename__ = 'detection_logs'
+    __table_args__ = (
+        # Serves a user's history pages, newest first
+        db.Index('ix_detection_logs_user_id_timestamp', 'user_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     flag_detected = db.Column(db.String(64))
@@ -11,6 +16,18 @@ class DetectionLog(db.Model):
     user_agent = db.Column(db.String(255))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    # 64-bit perceptual hash (hex) and size of the submitted image, for near-duplicate reuse
+    image_hash = db.Column(db.String(16), nullable=True, index=True)
+    image_width = db.Column(db.Integer, nullable=True)
+    image_height = db.Column(db.Integer, nullable=True)
+    # Mean Lab colour of a 12x12 grid (hex), which confirms a hash match before reuse
+    image_color = db.Column(db.String(864), nullable=True)
+    # Flag class confirmed by the user (or 'none' for no flag), for live precision/recall
+    confirmed_label = db.Column(db.String(64), nullable=True)
+    
+    # Every predicted box of the request; flag_detected/confidence above keep the top one
+    detections = db.relationship('Detection', backref='detection_log', lazy='select',
+                                 order_by='Detection.confidence.desc()')
     
     def __repr__(self):
         return f'<DetectionLog {self.id}: {self.flag_detected}>'
\ No newline at end of file
@@ -0,0 +1,21 @@
+from infrastructure.database import db
+
+class DriftWindow(db.Model):
+    """
+    Detection counts per hour, class and confidence bin, bumped as detection
+    logs are written; summed over ranges of hours to compare recent traffic
+    with a baseline without rescanning detection_logs
+    """
+    __tablename__ = 'drift_windows'
+    
+    # Hours since the Unix epoch (UTC)
+    hour = db.Column(db.Integer, primary_key=True)
+    # Top predicted class, '' for requests where nothing was detected
+    class_name = db.Column(db.String(64), primary_key=True)
+    # Confidence bin, or a shard number for the '' rows
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f'<DriftWindow {self.hour}/{self.class_name}/{self.bucket}: {self.count}>'
@@ -0,0 +1,20 @@
+from infrastructure.database import db
+
+class MetricCounter(db.Model):
+    """
+    One streaming aggregate over detection_logs: a count and a sum, bumped in
+    the same transaction that writes (or labels) a log, so live metrics are
+    read from a few rows per class instead of scanning the logs
+    """
+    __tablename__ = 'metric_counters'
+    
+    # 'requests' (bucket = shard), 'confidence' (bucket = histogram bin), 'confusion' (bucket = confirmed label)
+    # or 'labels' (label changes, a version for cached pages showing confirmed labels)
+    metric = db.Column(db.String(32), primary_key=True)
+    class_name = db.Column(db.String(64), primary_key=True)
+    bucket = db.Column(db.String(64), primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+    value_sum = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f'<MetricCounter {self.metric}/{self.class_name}/{self.bucket}: {self.count}>'
@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
+from sqlalchemy import func
 from domain.models.user import User
+from domain.models.detection import Detection
 from domain.models.detection_log import DetectionLog
+from domain.services.model_metrics_service import ModelMetricsService
 from infrastructure.database import db
-from core.exceptions import ValidationError
+from core.events import event_bus
+from core.exceptions import NotFoundError, ValidationError
 
 class AdminService:
     @staticmethod
@@ -23,12 +27,57 @@ class AdminService:
             'recent_detections': recent_detections
         }
         
+    @staticmethod
+    def get_detection_logs_version():
+        # Latest log id and log count, both answered from the primary key index,
+        # plus the label version so relabelled logs are not served from cache
+        last_id, total = db.session.query(
+            func.max(DetectionLog.id), func.count(DetectionLog.id)
+        ).one()
+        return last_id or 0, total, ModelMetricsService.label_version()
+        
     @staticmethod
     def get_detection_logs(page=1, per_page=20):
         return DetectionLog.query.order_by(
             DetectionLog.timestamp.desc()
         ).paginate(page=page, per_page=per_page)
         
+    @staticmethod
+    def get_detection_log(log_id):
+        log = DetectionLog.query.get(log_id)
+        if log is None:
+            raise NotFoundError("Detection log not found")
+        return log
+        
+    @staticmethod
+    def get_detections_by_class(days=None):
+        # Aggregates over every predicted box, not just the top one per request;
+        # served from the (class_name, confidence) index
+        count = func.count(Detection.id)
+        query = db.session.query(
+            Detection.class_name,
+            count,
+            func.avg(Detection.confidence),
+            func.min(Detection.confidence),
+            func.max(Detection.confidence)
+        )
+        
+        if days:
+            since = datetime.utcnow() - timedelta(days=days)
+            query = query.join(DetectionLog).filter(DetectionLog.timestamp >= since)
+        
+        rows = query.group_by(Detection.class_name).order_by(count.desc()).all()
+        return [
+            {
+                'class_name': class_name,
+                'count': total,
+                'avg_confidence': round(avg_conf, 4) if avg_conf is not None else None,
+                'min_confidence': min_conf,
+                'max_confidence': max_conf
+            }
+            for class_name, total, avg_conf, min_conf, max_conf in rows
+        ]
+        
     @staticmethod
     def get_all_users():
         return User.query.all()
@@ -52,6 +101,7 @@ class AdminService:
         
         db.session.add(user)
         db.session.commit()
+        event_bus.publish('counters', {'total_users': 1})
         
         return user
         
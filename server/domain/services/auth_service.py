@@ -1,5 +1,6 @@
 from domain.models.user import User
 from infrastructure.database import db
+from core.events import event_bus
 from werkzeug.security import generate_password_hash
 from flask_login import login_user, logout_user
 from datetime import datetime
@@ -27,6 +28,7 @@ class AuthService:
         # Save to database
         db.session.add(user)
         db.session.commit()
+        event_bus.publish('counters', {'total_users': 1})
         
         return True, "Registration successful"
     
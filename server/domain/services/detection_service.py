@@ -1,46 +1,366 @@
 import os
+import tempfile
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func
+from core.events import event_bus
+from core.exceptions import NotFoundError, ValidationError
+from core.tracing import traced, tracer
+from domain.models.detection import Detection
 from domain.models.detection_log import DetectionLog
+from domain.services.drift_monitor_service import DriftMonitorService
+from domain.services.model_metrics_service import ModelMetricsService
 from infrastructure.database import db
-from infrastructure.external.roboflow_client import RoboflowClient
+from infrastructure.external.inference_client import create_inference_client
+from infrastructure.micro_batcher import MicroBatcher
+from infrastructure.prediction_cache import prediction_cache_key
+from infrastructure.single_flight import SingleFlight
+from presentation.schemas.detection_schema import detection_log_to_dict
 
 class DetectionService:
     def __init__(self):
-        self.roboflow_client = RoboflowClient()
+        # RoboflowClient or LocalInferenceClient, depending on INFERENCE_BACKEND
+        self.roboflow_client = create_inference_client()
+        # Near-duplicate index over detection_logs.image_hash, built on first use
+        self._hash_index = None
+        self._hash_index_last_id = 0
+        self._hash_index_refreshed_at = 0
+        # Ids this worker added itself since the last refresh, which skips them
+        self._hash_index_local_ids = set()
+        self._hash_index_lock = threading.Lock()
+        # Concurrent requests for the same image share one upstream inference
+        self.inflight = SingleFlight()
+        # Micro-batcher for INFERENCE_BATCHING_ENABLED, built from config on first use
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
     
-    def detect_flag(self, image_file, ip_address="", user_agent="", user_id=None):
-        temp_path = "temp_image.jpg"
-        image_file.save(temp_path)
+    def detect_flag(self, image_file, ip_address="", user_agent="", user_id=None, tiled=None):
+        tiled = self.use_tiling(tiled)
+        with tracer.span('upload.read') as span:
+            image_bytes = image_file.read()
+            if span is not None:
+                span.set_attribute('image.bytes', len(image_bytes))
         
+        # Re-compressed or resized copies of an already processed image reuse its prediction
+        # (tiled requests skip this, the stored result may come from a whole-image pass)
+        with tracer.span('image.hash'):
+            image_info = self._hash_image(image_bytes)
+        with tracer.span('near_duplicate.lookup') as span:
+            result = None if tiled else self._find_near_duplicate(image_info)
+            if span is not None:
+                span.set_attribute('near_duplicate.hit', result is not None)
+        if result is not None:
+            self.log_detection(result, ip_address, user_agent, user_id, image_info)
+            return result
+        
+        infer = self._infer_tiled if tiled else self._infer
+        with tracer.span('inference', tiled=tiled) as span:
+            if current_app.config.get('DETECTION_COALESCING_ENABLED', False):
+                result, shared = self.inflight.do(self.inflight_key(image_bytes, tiled), lambda: infer(image_bytes))
+                if span is not None:
+                    span.set_attribute('inference.coalesced', shared)
+            else:
+                result = infer(image_bytes)
+        
+        # Every request gets its own log row, including those that shared an inference
+        log = self.log_detection(result, ip_address, user_agent, user_id, image_info)
+        if log is not None and image_info is not None:
+            self.add_to_hash_index(image_info[0], log.id)
+        
+        return result
+    
+    def inflight_key(self, image_bytes, tiled=False):
+        """Single-flight key: the model plus a digest of the exact upload bytes"""
+        key = prediction_cache_key(self.roboflow_client.model_id, image_bytes)
+        return f"{key}:tiled" if tiled else key
+    
+    def use_tiling(self, tiled=None):
+        """Resolve the `tiled` request parameter (bool, 'true'/'false', or None for the default)"""
+        if tiled is None or tiled == '':
+            return current_app.config.get('TILED_INFERENCE_DEFAULT', False)
+        if isinstance(tiled, bool):
+            return tiled
+        
+        value = str(tiled).lower()
+        if value not in ('true', 'false', '1', '0'):
+            raise ValidationError("tiled must be 'true' or 'false'")
+        return value in ('true', '1')
+    
+    def _infer(self, image_bytes):
+        """Send the upload to Roboflow through a temp file private to this call"""
+        fd, temp_path = tempfile.mkstemp(suffix='.jpg')
         try:
-            # Send to Roboflow API
-            result = self.roboflow_client.detect_flag(temp_path)
-            
-            # Log the detection
-            if 'predictions' in result and len(result['predictions']) > 0:
-                # Log only the highest confidence prediction
-                prediction = max(result['predictions'], key=lambda x: x.get('confidence', 0))
-                log = DetectionLog(
-                    flag_detected=prediction.get('class', 'unknown'),
-                    confidence=prediction.get('confidence', 0),
-                    ip_address=ip_address,
-                    user_agent=user_agent,
-                    user_id=user_id
+            with os.fdopen(fd, 'wb') as f:
+                f.write(image_bytes)
+            if current_app.config.get('INFERENCE_BATCHING_ENABLED', False):
+                return self.batcher().run(temp_path)
+            return self.roboflow_client.detect_flag(temp_path)
+        finally:
+            os.remove(temp_path)
+    
+    def _infer_tiled(self, image_bytes):
+        """
+        Sliced inference for large photos with small flags: the whole image plus
+        overlapping model-sized tiles, except tiles with almost no flag colors,
+        in one detect_flags call, merged back into image coordinates.
+        """
+        # Imported here so CRUD-only workers don't load OpenCV
+        import cv2
+        import numpy as np
+        from domain.vision.tiling import flag_color_pixels, merge_tile_predictions, tile_grid
+        
+        config = current_app.config
+        with tracer.span('image.decode'):
+            image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValidationError("Failed to decode image")
+        
+        height, width = image.shape[:2]
+        tile_size = config.get('TILE_SIZE', 640)
+        tiles = tile_grid(width, height, tile_size, config.get('TILE_OVERLAP', 0.2)) \
+            if max(width, height) > tile_size else []
+        with tracer.span('tiling.prefilter', tiles=len(tiles)):
+            color_pixels = flag_color_pixels(image, tiles)
+        active = [tile for tile, pixels in zip(tiles, color_pixels)
+                  if pixels >= config.get('TILE_MIN_FLAG_COLOR_PIXELS', 64)]
+        
+        # The whole-image pass still finds flags larger than a tile
+        inputs = [image] + [np.ascontiguousarray(image[y1:y2, x1:x2]) for x1, y1, x2, y2 in active]
+        with tracer.span('inference.batch', batch_size=len(inputs)):
+            results = self.roboflow_client.detect_flags(inputs)
+        
+        offsets = [(0, 0)] + [(x1, y1) for x1, y1, _, _ in active]
+        return {
+            'predictions': merge_tile_predictions(results, offsets, config.get('TILE_MERGE_THRESHOLD', 0.5)),
+            'image': {'width': width, 'height': height},
+            'tiling': {
+                'tile_size': tile_size,
+                'tiles': len(tiles),
+                'skipped_tiles': len(tiles) - len(active),
+                'inference_calls': len(inputs)
+            }
+        }
+    
+    def batcher(self):
+        """The MicroBatcher sending grouped detections to the inference client's detect_flags"""
+        with self._batcher_lock:
+            if self._batcher is None:
+                config = current_app.config
+                self._batcher = MicroBatcher(
+                    self.roboflow_client.detect_flags,
+                    max_batch_size=config.get('INFERENCE_BATCH_MAX_SIZE', 8),
+                    max_latency_ms=config.get('INFERENCE_BATCH_MAX_LATENCY_MS', 10),
+                    workers=config.get('INFERENCE_BATCH_WORKERS', 1)
                 )
-                db.session.add(log)
-                db.session.commit()
+            return self._batcher
+    
+    def _hash_image(self, image_bytes):
+        """Return (hash, width, height, colour signature) for the upload, or None when disabled or undecodable"""
+        if not current_app.config.get('NEAR_DUPLICATE_ENABLED', False):
+            return None
+        
+        # Imported here so CRUD-only workers don't load OpenCV
+        from domain.vision.image_hash import compute_image_hash
+        
+        return compute_image_hash(image_bytes, current_app.config.get('IMAGE_HASH_ALGORITHM', 'dhash'))
+    
+    def _refresh_hash_index(self):
+        """
+        Load hashes written since the last refresh by other workers. Runs at
+        most every NEAR_DUPLICATE_REFRESH_SECONDS; this worker's own writes are
+        added right away by add_to_hash_index.
+        """
+        config = current_app.config
+        with self._hash_index_lock:
+            if self._hash_index is None:
+                from domain.vision.hash_index import HammingIndex
+                self._hash_index = HammingIndex(max_distance=config.get('NEAR_DUPLICATE_MAX_DISTANCE', 4))
             
-            # Remove temp file
-            os.remove(temp_path)
+            now = time.time()
+            if now - self._hash_index_refreshed_at < config.get('NEAR_DUPLICATE_REFRESH_SECONDS', 30):
+                return self._hash_index
             
-            return result
-        except Exception as e:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            raise e
+            rows = db.session.query(DetectionLog.id, DetectionLog.image_hash).filter(
+                DetectionLog.id > self._hash_index_last_id,
+                DetectionLog.image_hash.isnot(None)
+            ).order_by(DetectionLog.id).all()
+            
+            for log_id, image_hash in rows:
+                if log_id not in self._hash_index_local_ids:
+                    self._hash_index.add(int(image_hash, 16), log_id)
+            if rows:
+                self._hash_index_last_id = rows[-1][0]
+            self._hash_index_local_ids = {i for i in self._hash_index_local_ids if i > self._hash_index_last_id}
+            self._hash_index_refreshed_at = now
+            
+            return self._hash_index
+    
+    def add_to_hash_index(self, image_hash, log_id):
+        """Index a hash this worker just stored, instead of reloading the index for it"""
+        with self._hash_index_lock:
+            # Not built yet: its first refresh loads this row with the others
+            if self._hash_index is not None:
+                self._hash_index.add(image_hash, log_id)
+                self._hash_index_local_ids.add(log_id)
+    
+    def _find_near_duplicate(self, image_info):
+        """
+        Rebuild a previous result for a near-identical image, scaled to this image's size.
+
+        Hash neighbours are only candidates: flags sharing a stripe layout hash
+        alike, so the closest candidate with the same aspect ratio and colour
+        signature is the one reused.
+        """
+        if image_info is None:
+            return None
+        
+        from domain.vision.image_hash import color_difference
+        
+        config = current_app.config
+        image_hash, width, height, color = image_info
+        candidates = self._refresh_hash_index().lookup_all(image_hash)
+        if not candidates:
+            return None
+        
+        logs = {log.id: log for log in DetectionLog.query.filter(
+            DetectionLog.id.in_([log_id for log_id, _ in candidates]),
+            DetectionLog.image_color.isnot(None)
+        )}
+        for log_id, distance in candidates:
+            log = logs.get(log_id)
+            if log is None or not log.image_width or not log.image_height:
+                continue
+            aspect, stored_aspect = width / height, log.image_width / log.image_height
+            if abs(aspect - stored_aspect) > config.get('NEAR_DUPLICATE_MAX_ASPECT_DIFFERENCE', 0.05) * stored_aspect:
+                continue
+            if color_difference(color, log.image_color) > config.get('NEAR_DUPLICATE_MAX_COLOR_DIFFERENCE', 16):
+                continue
+            if log.detections:
+                break
+        else:
+            return None
+        
+        scale_x = width / log.image_width if log.image_width else 1
+        scale_y = height / log.image_height if log.image_height else 1
+        
+        return {
+            'predictions': [
+                {
+                    'class': d.class_name,
+                    'confidence': d.confidence,
+                    'x': d.x * scale_x if d.x is not None else None,
+                    'y': d.y * scale_y if d.y is not None else None,
+                    'width': d.width * scale_x if d.width is not None else None,
+                    'height': d.height * scale_y if d.height is not None else None
+                }
+                for d in log.detections
+            ],
+            'image': {'width': width, 'height': height},
+            'near_duplicate_of': {'detection_log_id': log_id, 'hamming_distance': distance}
+        }
+    
+    @traced('db.write')
+    def log_detection(self, result, ip_address="", user_agent="", user_id=None, image_info=None,
+                      record_inference=True):
+        """
+        Store an inference result: one DetectionLog row for the request (holding
+        the highest confidence prediction) plus one Detection row per predicted box,
+        written with a single bulk insert. image_info is the (hash, width, height, colour signature)
+        of the submitted image, if computed. record_inference=False skips the
+        live metrics and drift counters, for results that are not one inference
+        (video tracks, whose frames are counted by record_inference).
+        """
+        predictions = result.get('predictions') or []
+        if not predictions:
+            if record_inference:
+                # Still counted, as the denominator of the live detection rates
+                self._record_metrics()
+                db.session.commit()
+            return None
+        
+        top = max(predictions, key=lambda x: x.get('confidence', 0))
+        log = DetectionLog(
+            flag_detected=top.get('class', 'unknown'),
+            confidence=top.get('confidence', 0),
+            ip_address=ip_address,
+            user_agent=user_agent,
+            user_id=user_id
+        )
+        if image_info is not None:
+            image_hash, log.image_width, log.image_height, log.image_color = image_info
+            log.image_hash = f"{image_hash:016x}"
+        db.session.add(log)
+        # Assigns log.id without committing so the boxes can reference it
+        db.session.flush()
+        
+        db.session.execute(
+            Detection.__table__.insert(),
+            [
+                {
+                    'detection_log_id': log.id,
+                    'class_name': pred.get('class', 'unknown'),
+                    'confidence': pred.get('confidence', 0),
+                    'x': pred.get('x'),
+                    'y': pred.get('y'),
+                    'width': pred.get('width'),
+                    'height': pred.get('height')
+                }
+                for pred in predictions
+            ]
+        )
+        if record_inference:
+            self._record_metrics(log.flag_detected, log.confidence)
+        # Taken before the commit expires the attributes, so no reload is needed
+        event = {'log': detection_log_to_dict(log), 'counters': {'total_detections': 1}}
+        with tracer.span('db.commit'):
+            db.session.commit()
+        event_bus.publish('detection', event)
+        return log
+    
+    def record_inference(self, predictions):
+        """Count one inference that is not logged on its own (e.g. a video frame) in the live metrics and drift counters"""
+        if predictions:
+            top = max(predictions, key=lambda x: x.get('confidence', 0))
+            self._record_metrics(top.get('class', 'unknown'), top.get('confidence', 0))
+        else:
+            self._record_metrics()
+        db.session.commit()
+    
+    def _record_metrics(self, class_name=None, confidence=None):
+        # class_name None when nothing was detected; caller commits
+        ModelMetricsService.record_request(class_name, confidence)
+        DriftMonitorService.record(class_name, confidence)
+    
+    def confirm_detection_label(self, log_id, label, user):
+        """
+        Record the flag a user confirms a detection showed (or 'none'); users may
+        label their own detections, admins any. Feeds the live confusion matrix.
+        """
+        # Locked so concurrent relabels of one log move its confusion cell once
+        log = DetectionLog.query.filter_by(id=log_id).with_for_update().first()
+        if log is None or (log.user_id != user.id and not user.is_admin):
+            raise NotFoundError("Detection log not found")
+        
+        ModelMetricsService.record_label(log, label)
+        db.session.commit()
+        return log
+    
+    def get_user_detection_logs_version(self, user_id):
+        """
+        Latest log id and log count for a user, read from the (user_id, timestamp)
+        index, plus the label version; together they change whenever the
+        user's history does, relabelling included
+        """
+        last_id, total = db.session.query(
+            func.max(DetectionLog.id), func.count(DetectionLog.id)
+        ).filter(DetectionLog.user_id == user_id).one()
+        return last_id or 0, total, ModelMetricsService.label_version()
     
-    def get_user_detection_logs(self, user_id, page=1, per_page=10):
+    def get_user_detection_logs(self, user_id, page=1, per_page=10, total=None):
         """
         Get detection logs for a specific user with pagination
+        (pass total when already known from get_user_detection_logs_version)
         """
         # Calculate offset for pagination
         offset = (page - 1) * per_page
@@ -51,7 +371,8 @@ class DetectionService:
             .limit(per_page).offset(offset).all()
             
         # Get total count for pagination
-        total = DetectionLog.query.filter_by(user_id=user_id).count()
+        if total is None:
+            total = DetectionLog.query.filter_by(user_id=user_id).count()
         
         # Calculate total pages
         pages = (total + per_page - 1) // per_page  # Ceiling division
@@ -0,0 +1,229 @@
+import math
+import time
+from flask import current_app
+from sqlalchemy import func
+from domain.models.drift_window import DriftWindow
+from infrastructure.database import bump_counter, counter_shard, db
+from core.exceptions import ValidationError
+
+# Confidence bins of width 1 / DRIFT_BINS; sampling noise alone gives a PSI of
+# about (DRIFT_BINS - 1) * (1/n + 1/m), so more bins need larger windows
+DRIFT_BINS = 10
+# Class frequency key of requests where nothing was detected
+NO_DETECTION = ''
+# Pseudo-count added to every bin before PSI, so empty bins stay finite and
+# sparse windows are not read as drift
+PSI_SMOOTHING = 0.5
+# Two-sample KS critical value coefficient at alpha = 0.05
+KS_ALPHA_COEFFICIENT = 1.358
+
+# Hour this process last deleted expired counters in; see DriftMonitorService.record
+_pruned_hour = None
+
+
+def current_hour(now=None):
+    return int((time.time() if now is None else now) // 3600)
+
+
+class DriftMonitorService:
+    """
+    Confidence and class-frequency drift of the detection stream.
+
+    Every detection request bumps an hourly (class, confidence bin) counter;
+    a report sums the counters of the recent window and of the baseline
+    period before it (one grouped query each) and compares the two
+    distributions with the population stability index and a binned
+    two-sample Kolmogorov-Smirnov statistic.
+    """
+
+    @staticmethod
+    def record(class_name=None, confidence=None, now=None):
+        """Count one detection request (class_name None when nothing was detected); caller commits"""
+        if class_name is None:
+            # The no-detection row has no confidence bin, so its bucket is a shard
+            # number instead and no single row is bumped by every such request
+            key, confidence = {'class_name': NO_DETECTION, 'bucket': counter_shard()}, 0.0
+        else:
+            confidence = confidence or 0.0
+            key = {'class_name': class_name, 'bucket': min(DRIFT_BINS - 1, max(0, int(confidence * DRIFT_BINS)))}
+        hour = current_hour(now)
+        bump_counter(DriftWindow, dict(key, hour=hour), count=1, confidence_sum=confidence)
+
+        # Expired counters are deleted by the first request of each new hour
+        # (per process), in its transaction, rather than by report reads
+        global _pruned_hour
+        if hour != _pruned_hour:
+            _pruned_hour = hour
+            DriftMonitorService.prune(current_app.config.get('DRIFT_RETENTION_DAYS', 60), now)
+
+    @staticmethod
+    def get_report(window_hours=24, baseline_days=7, trend_windows=14, psi_warning=0.1, psi_alert=0.25,
+                   min_samples=200, now=None):
+        """
+        Compare the last `window_hours` with the `baseline_days` before them.
+
+        Returns the overall and per-class confidence drift, the class frequency
+        drift, the alerts raised, and one trend point per earlier window (each
+        compared with the same baseline).
+        """
+        if window_hours < 1 or baseline_days < 1 or trend_windows < 0:
+            raise ValidationError("window_hours and baseline_days must be positive")
+
+        end = current_hour(now) + 1
+        window_start = end - window_hours
+        baseline_start = window_start - baseline_days * 24
+        thresholds = (psi_warning, psi_alert, min_samples)
+
+        current = _window_counts(window_start, end)
+        baseline = _window_counts(baseline_start, window_start)
+
+        confidence = _compare(_confidence_histogram(baseline), _confidence_histogram(current), thresholds)
+        confidence['mean_baseline'] = _mean_confidence(baseline)
+        confidence['mean_current'] = _mean_confidence(current)
+
+        classes = sorted(({c for c, _ in baseline} | {c for c, _ in current}) - {NO_DETECTION})
+        by_class = {}
+        for name in classes:
+            drift = _compare(_confidence_histogram(baseline, name), _confidence_histogram(current, name), thresholds)
+            drift['mean_baseline'] = _mean_confidence(baseline, name)
+            drift['mean_current'] = _mean_confidence(current, name)
+            by_class[name] = drift
+
+        frequency_labels = classes + [NO_DETECTION]
+        frequency = _compare(_class_frequencies(baseline, frequency_labels),
+                             _class_frequencies(current, frequency_labels), thresholds, ks=False)
+        frequency['share_baseline'] = _shares(_class_frequencies(baseline, frequency_labels), frequency_labels)
+        frequency['share_current'] = _shares(_class_frequencies(current, frequency_labels), frequency_labels)
+
+        alerts = []
+        for metric, class_name, drift in [('confidence', None, confidence), ('class_frequency', None, frequency)] + \
+                [('confidence', name, drift) for name, drift in by_class.items()]:
+            if drift['status'] in ('warning', 'alert'):
+                alerts.append({
+                    'metric': metric,
+                    'class_name': class_name,
+                    'severity': drift['status'],
+                    'psi': drift['psi'],
+                    'ks_significant': drift.get('ks_significant')
+                })
+
+        trend = []
+        for k in range(1, trend_windows + 1):
+            start = window_start - k * window_hours
+            counts = _window_counts(start, start + window_hours)
+            trend.append({
+                'start': _hour_to_iso(start),
+                'requests': sum(count for count, _ in counts.values()),
+                'mean_confidence': _mean_confidence(counts),
+                'confidence_psi': _psi(_confidence_histogram(baseline), _confidence_histogram(counts)),
+                'class_frequency_psi': _psi(_class_frequencies(baseline, frequency_labels),
+                                            _class_frequencies(counts, frequency_labels))
+            })
+
+        return {
+            'window': {'start': _hour_to_iso(window_start), 'end': _hour_to_iso(end),
+                       'requests': sum(count for count, _ in current.values())},
+            'baseline': {'start': _hour_to_iso(baseline_start), 'end': _hour_to_iso(window_start),
+                         'requests': sum(count for count, _ in baseline.values())},
+            'thresholds': {'psi_warning': psi_warning, 'psi_alert': psi_alert, 'min_samples': min_samples},
+            'confidence': confidence,
+            'confidence_by_class': by_class,
+            'class_frequency': frequency,
+            'alerts': alerts,
+            'trend': trend
+        }
+
+    @staticmethod
+    def prune(retention_days, now=None):
+        """Delete hourly counters older than retention_days; caller commits"""
+        cutoff = current_hour(now) - retention_days * 24
+        return DriftWindow.query.filter(DriftWindow.hour < cutoff).delete(synchronize_session=False)
+
+
+def _window_counts(start_hour, end_hour):
+    """{(class_name, bucket): (count, confidence_sum)} summed over [start_hour, end_hour)"""
+    rows = db.session.query(
+        DriftWindow.class_name, DriftWindow.bucket,
+        func.sum(DriftWindow.count), func.sum(DriftWindow.confidence_sum)
+    ).filter(
+        DriftWindow.hour >= start_hour, DriftWindow.hour < end_hour
+    ).group_by(DriftWindow.class_name, DriftWindow.bucket).all()
+    return {(class_name, bucket): (int(count), float(total)) for class_name, bucket, count, total in rows}
+
+
+def _confidence_histogram(counts, class_name=None):
+    histogram = [0] * DRIFT_BINS
+    for (name, bucket), (count, _) in counts.items():
+        if name != NO_DETECTION and (class_name is None or name == class_name):
+            histogram[bucket] += count
+    return histogram
+
+
+def _class_frequencies(counts, labels):
+    frequencies = dict.fromkeys(labels, 0)
+    for (name, _), (count, _) in counts.items():
+        frequencies[name] = frequencies.get(name, 0) + count
+    return [frequencies[label] for label in labels]
+
+
+def _shares(frequencies, labels):
+    total = sum(frequencies)
+    return {label or 'none': round(f / total, 4) if total else None for label, f in zip(labels, frequencies)}
+
+
+def _mean_confidence(counts, class_name=None):
+    total = detections = 0
+    for (name, _), (count, confidence_sum) in counts.items():
+        if name != NO_DETECTION and (class_name is None or name == class_name):
+            detections += count
+            total += confidence_sum
+    return round(total / detections, 4) if detections else None
+
+
+def _psi(expected, actual):
+    """Population stability index of two histograms over the same bins; None when either is empty"""
+    n, m = sum(expected), sum(actual)
+    if not n or not m:
+        return None
+    bins = len(expected)
+    psi = 0.0
+    for e, a in zip(expected, actual):
+        p = (e + PSI_SMOOTHING) / (n + PSI_SMOOTHING * bins)
+        q = (a + PSI_SMOOTHING) / (m + PSI_SMOOTHING * bins)
+        psi += (q - p) * math.log(q / p)
+    return round(psi, 4)
+
+
+def _ks(expected, actual):
+    """Binned two-sample KS statistic and its critical value; bins make it a lower bound of the exact D"""
+    n, m = sum(expected), sum(actual)
+    if not n or not m:
+        return None, None
+    d = cdf_e = cdf_a = 0.0
+    for e, a in zip(expected, actual):
+        cdf_e += e / n
+        cdf_a += a / m
+        d = max(d, abs(cdf_e - cdf_a))
+    return round(d, 4), round(KS_ALPHA_COEFFICIENT * math.sqrt((n + m) / (n * m)), 4)
+
+
+def _compare(expected, actual, thresholds, ks=True):
+    psi_warning, psi_alert, min_samples = thresholds
+    drift = {'baseline_count': sum(expected), 'current_count': sum(actual), 'psi': _psi(expected, actual)}
+    if ks:
+        drift['ks'], drift['ks_critical'] = _ks(expected, actual)
+        drift['ks_significant'] = drift['ks'] is not None and drift['ks'] > drift['ks_critical']
+
+    if min(drift['baseline_count'], drift['current_count']) < min_samples:
+        drift['status'] = 'insufficient_data'
+    elif drift['psi'] >= psi_alert:
+        drift['status'] = 'alert'
+    elif drift['psi'] >= psi_warning or drift.get('ks_significant'):
+        drift['status'] = 'warning'
+    else:
+        drift['status'] = 'ok'
+    return drift
+
+
+def _hour_to_iso(hour):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(hour * 3600))
@@ -2,9 +2,57 @@ import os
 import cv2
 import numpy as np
 import math
-from core.exceptions import ApiError
-from infrastructure.external.roboflow_client import RoboflowClient
-from sklearn.cluster import KMeans  # Add this import for color clustering
+import atexit
+import multiprocessing
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from core.exceptions import ApiError, ValidationError
+from core.tracing import traced, tracer
+from infrastructure.external.inference_client import create_inference_client
+from infrastructure.prediction_cache import prediction_cache_key
+from domain.flag_registry import FLAGS, flag_palette_arrays
+from domain.manual_calculation_explanations import (
+    CONFIDENCE_COMPONENT_EXPLANATIONS, EDUCATIONAL_NOTE, STAGE_EXPLANATIONS
+)
+from domain.vision.class_scoring import class_probabilities, color_histograms, dominant_color_counts
+from domain.vision.color_lut import HSV_COLOR_RANGES, get_color_lookup
+from domain.vision.integral import IntegralImage, band_rects, color_integral, grid_rects
+from domain.vision.nms import boxes_from_predictions, nms, soft_nms
+
+# "full" runs every stage on the 640x640 image, "fast" runs the geometric
+# stages (Hough lines, contours, edge maps) at the service's analysis_size
+QUALITY_MODES = ("fast", "full")
+DEFAULT_ANALYSIS_SIZE = 320
+
+# Service instance owned by each vision pool process (see create_vision_process_pool)
+_worker_service = None
+
+def _init_vision_worker(analysis_size=DEFAULT_ANALYSIS_SIZE):
+    global _worker_service
+    _worker_service = ManualCalculationService(analysis_size=analysis_size)
+
+def _calculate_steps_in_worker(image, model_results, quality):
+    return _worker_service._calculate_steps(image, model_results, quality)
+
+def create_vision_process_pool(max_workers, analysis_size=DEFAULT_ANALYSIS_SIZE):
+    """
+    Create a process pool for the CPU-bound calculation stages.
+    
+    KMeans, Hough, Canny and contour analysis then run outside the web
+    worker's GIL, so I/O-bound requests served by the same worker's threads
+    are not stalled behind them. Processes are spawned rather than forked
+    because the web worker is already multi-threaded.
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_vision_worker,
+        initargs=(analysis_size,)
+    )
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
 
 class ManualCalculationService:
     """
@@ -17,176 +65,191 @@ class ManualCalculationService:
     The calculations are approximations to help visualize the process.
     """
     
-    def __init__(self):
-        self.roboflow_client = RoboflowClient()
-        # Flag metadata remains the same as before
-        self.flag_metadata = {
-            "indonesia": {
-                "colors": ["red", "white"],
-                "pattern": "2 horizontal stripes (red-white)",
-                "aspect_ratio": "3:2",
-                "expected_color_distribution": {"red": 0.5, "white": 0.5},
-                "orientation": "horizontal",
-                "line_pattern": "horizontal",
-                "expected_lines": 1  # One line separating two stripes
-            },
-            "malaysia": {
-                "colors": ["blue", "red", "white", "yellow"],
-                "pattern": "14 horizontal stripes with canton",
-                "aspect_ratio": "2:1",
-                "expected_color_distribution": {"blue": 0.25, "red": 0.40, "white": 0.25, "yellow": 0.1},
-                "orientation": "horizontal",
-                "line_pattern": "horizontal",
-                "expected_lines": 13  # 14 stripes means 13 lines
-            },
-            "singapore": {
-                "colors": ["red", "white"],
-                "pattern": "2 horizontal stripes with crescent and stars",
-                "aspect_ratio": "3:2",
-                "expected_color_distribution": {"red": 0.5, "white": 0.5},
-                "orientation": "horizontal",
-                "line_pattern": "horizontal",
-                "expected_lines": 1
-            },
-            "thailand": {
-                "colors": ["red", "white", "blue"],
-                "pattern": "5 horizontal stripes",
-                "aspect_ratio": "3:2",
-                "expected_color_distribution": {"red": 0.33, "white": 0.33, "blue": 0.33},
-                "orientation": "horizontal",
-                "line_pattern": "horizontal", 
-                "expected_lines": 4  # 5 stripes means 4 lines
-            },
-            "vietnam": {
-                "colors": ["red", "yellow"],
-                "pattern": "red with yellow star",
-                "aspect_ratio": "3:2",
-                "expected_color_distribution": {"red": 0.95, "yellow": 0.05},
-                "orientation": "horizontal",
-                "line_pattern": "none",
-                "expected_lines": 0
-            },
-            "philippines": {
-                "colors": ["blue", "red", "white", "yellow"],
-                "pattern": "horizontal bicolor with triangle",
-                "aspect_ratio": "1:2",
-                "expected_color_distribution": {"blue": 0.5, "red": 0.5, "white": 0.1, "yellow": 0.05},
-                "orientation": "horizontal",
-                "line_pattern": "horizontal+diagonal",
-                "expected_lines": 2  # 1 horizontal + 1 diagonal
-            },
-            "myanmar": {
-                "colors": ["yellow", "green", "red"],
-                "pattern": "3 horizontal stripes with star",
-                "aspect_ratio": "3:2",
-                "expected_color_distribution": {"yellow": 0.33, "green": 0.33, "red": 0.33},
-                "orientation": "horizontal",
-                "line_pattern": "horizontal",
-                "expected_lines": 2  # 3 stripes means 2 lines
-            },
-            "brunei": {
-                "colors": ["yellow", "white", "black"],
-                "pattern": "yellow with diagonal stripes and emblem",
-                "aspect_ratio": "1:2",
-                "expected_color_distribution": {"yellow": 0.8, "white": 0.1, "black": 0.1},
-                "orientation": "horizontal",
-                "line_pattern": "diagonal",
-                "expected_lines": 2  # Diagonal stripes
-            },
-            "cambodia": {
-                "colors": ["blue", "red", "white"],
-                "pattern": "horizontal tricolor with emblem",
-                "aspect_ratio": "2:3",
-                "expected_color_distribution": {"blue": 0.2, "red": 0.6, "white": 0.2},
-                "orientation": "horizontal",
-                "line_pattern": "horizontal",
-                "expected_lines": 2  # 3 stripes means 2 lines
-            },
-            "laos": {
-                "colors": ["blue", "red", "white"],
-                "pattern": "horizontal tricolor with circle",
-                "aspect_ratio": "2:3",
-                "expected_color_distribution": {"blue": 0.25, "red": 0.5, "white": 0.25},
-                "orientation": "horizontal",
-                "line_pattern": "horizontal",
-                "expected_lines": 2  # 3 stripes means 2 lines
-            }
-        }
-        
-        # Define HSV color thresholds for better color classification
-        self.hsv_color_ranges = {
-            "red": [
-                {"lower": np.array([0, 100, 100]), "upper": np.array([10, 255, 255])},
-                {"lower": np.array([160, 100, 100]), "upper": np.array([180, 255, 255])}  # Red wraps around in HSV
-            ],
-            "green": [{"lower": np.array([35, 100, 100]), "upper": np.array([85, 255, 255])}],
-            "blue": [{"lower": np.array([100, 100, 100]), "upper": np.array([130, 255, 255])}],
-            "yellow": [{"lower": np.array([20, 100, 100]), "upper": np.array([35, 255, 255])}],
-            "white": [{"lower": np.array([0, 0, 200]), "upper": np.array([180, 30, 255])}],
-            "black": [{"lower": np.array([0, 0, 0]), "upper": np.array([180, 255, 30])}]
-        }
+    def __init__(self, process_pool_workers=0, analysis_size=DEFAULT_ANALYSIS_SIZE, prediction_cache=None):
+        # RoboflowClient or LocalInferenceClient, depending on INFERENCE_BACKEND
+        self.roboflow_client = create_inference_client()
+        # Optional store of inference results keyed by image digest (see infrastructure.prediction_cache)
+        self.prediction_cache = prediction_cache
+        # Longest side of the image used by the geometric stages in "fast" mode
+        self.analysis_size = analysis_size
+        # Optional process pool running _calculate_steps off the request thread,
+        # created lazily so a preloaded master never forks a live pool
+        self.process_pool_workers = process_pool_workers
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        # Process-wide registry and color table, shared by every instance
+        self.flag_metadata = FLAGS
+        self.hsv_color_ranges = HSV_COLOR_RANGES
+        self.color_lookup = get_color_lookup()
     
-    def process_flag_image(self, image_file_storage):
+    def process_flag_image(self, image_file_storage, quality="full"):
         """Process the image and return manual calculation steps"""
-        # Save temporary file
-        standardized_image_path = "temp_standardized_for_processing.jpg"
+        self._validate_quality(quality)
         
-        try:
-            # 1. Read file image from FileStorage to memory as NumPy array
+        # 1. Read file image from FileStorage to memory
+        with tracer.span('upload.read'):
             image_bytes = image_file_storage.read()
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            
-            # 2. Decode NumPy array to OpenCV image (BGR by default)
-            img_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-            if img_bgr is None:
-                raise ApiError("Failed to decode image. The file might be corrupted or not a valid image format.")
-
-            # 3. (Optional but recommended) Ensure the image is a 3-channel BGR
-            if len(img_bgr.shape) == 2:  # Grayscale
-                img_bgr = cv2.cvtColor(img_bgr, cv2.COLOR_GRAY2BGR)
-            elif img_bgr.shape[2] == 4:  # BGRA (with alpha channel)
-                img_bgr = cv2.cvtColor(img_bgr, cv2.COLOR_BGRA2BGR)
+        with tracer.span('image.decode'):
+            img_bgr = self._decode_image(image_bytes)
+        
+        # 2. Get model prediction for the standardized image (or a cached one)
+        with tracer.span('inference') as span:
+            model_results, cached = self._get_model_results(image_bytes, img_bgr)
+            if span is not None:
+                span.set_attribute('inference.cached', cached)
+        
+        # 3. For manual calculation, resize the in-memory image
+        # This is more efficient than rereading from disk
+        image_resized_for_manual = cv2.resize(img_bgr, (640, 640))
+        
+        # 4. Calculate the manual steps (in the vision process pool when configured;
+        # stage spans are only recorded when they run in this process)
+        with tracer.span('manual_calculation', quality=quality, process_pool=self.process_pool_workers > 0):
+            if self.process_pool_workers > 0:
+                calculation_steps = self._get_executor().submit(
+                    _calculate_steps_in_worker, image_resized_for_manual, model_results, quality
+                ).result()
+            else:
+                calculation_steps = self._calculate_steps(image_resized_for_manual, model_results, quality)
+        
+        # 5. Add educational explanation to make simulation purpose clear
+        calculation_steps["educational_note"] = dict(EDUCATIONAL_NOTE)
+        
+        return {
+            "model_prediction": model_results,
+            "manual_calculation": calculation_steps
+        }
+    
+    def process_batch(self, images, quality="full", max_in_flight=None):
+        """
+        Run the manual calculation over an iterable of (name, image_bytes).
+        
+        Yields one record per image, in input order, as soon as it is ready:
+        {"image", "cached_prediction", "model_prediction", "manual_calculation"}
+        or {"image", "error"} when that image fails. Inference runs in the
+        calling thread (skipped on cache hits) while the calculation stages of
+        earlier images run in the vision process pool; at most max_in_flight
+        images are held at a time, so memory stays flat for any batch size.
+        """
+        # Validated here rather than in the generator so bad input fails before streaming starts
+        self._validate_quality(quality)
+        return self._iter_batch(images, quality, max_in_flight)
+    
+    def _iter_batch(self, images, quality, max_in_flight):
+        executor = self._get_executor() if self.process_pool_workers > 0 else None
+        max_in_flight = max_in_flight or max(2, 2 * self.process_pool_workers)
+        
+        pending = deque()
+        for name, image_bytes in images:
+            try:
+                img_bgr = self._decode_image(image_bytes)
+                model_results, cached = self._get_model_results(image_bytes, img_bgr)
+                image_resized_for_manual = cv2.resize(img_bgr, (640, 640))
+                
+                if executor is not None:
+                    steps = executor.submit(_calculate_steps_in_worker, image_resized_for_manual, model_results, quality)
+                else:
+                    steps = self._calculate_steps(image_resized_for_manual, model_results, quality)
+                pending.append((name, cached, model_results, steps, None))
+            except Exception as e:
+                pending.append((name, False, None, None, e))
             
-            # 4. Save the standardized image for sending to Roboflow
-            # and as the basis for manual calculation
+            while len(pending) >= max_in_flight:
+                yield self._batch_record(*pending.popleft())
+        
+        while pending:
+            yield self._batch_record(*pending.popleft())
+    
+    def _batch_record(self, name, cached, model_results, steps, error):
+        if error is None and hasattr(steps, "result"):
+            try:
+                steps = steps.result()
+            except Exception as e:
+                error = e
+        
+        if error is not None:
+            return {"image": name, "error": str(error)}
+        return {
+            "image": name,
+            "cached_prediction": cached,
+            "model_prediction": model_results,
+            "manual_calculation": steps
+        }
+    
+    def _validate_quality(self, quality):
+        if quality not in QUALITY_MODES:
+            raise ValidationError(f"Invalid quality '{quality}', expected one of: {', '.join(QUALITY_MODES)}")
+    
+    def _decode_image(self, image_bytes):
+        """Decode upload bytes to a 3-channel BGR image"""
+        # Decode NumPy array to OpenCV image (BGR by default)
+        img_bgr = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        
+        if img_bgr is None:
+            raise ApiError("Failed to decode image. The file might be corrupted or not a valid image format.")
+        
+        # Ensure the image is a 3-channel BGR
+        if len(img_bgr.shape) == 2:  # Grayscale
+            img_bgr = cv2.cvtColor(img_bgr, cv2.COLOR_GRAY2BGR)
+        elif img_bgr.shape[2] == 4:  # BGRA (with alpha channel)
+            img_bgr = cv2.cvtColor(img_bgr, cv2.COLOR_BGRA2BGR)
+        return img_bgr
+    
+    def _get_model_results(self, image_bytes, img_bgr):
+        """
+        Return (inference result, from_cache) for the image. Results are cached
+        by a digest of the uploaded bytes when a prediction cache is configured.
+        """
+        cache_key = None
+        if self.prediction_cache is not None:
+            cache_key = prediction_cache_key(self.roboflow_client.model_id, image_bytes)
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                return cached, True
+        
+        # Save the standardized image for sending to Roboflow
+        fd, standardized_image_path = tempfile.mkstemp(suffix=".jpg")
+        os.close(fd)
+        try:
             cv2.imwrite(standardized_image_path, img_bgr)
-            
-            # 5. Get model prediction using the standardized image
             model_results = self.roboflow_client.detect_flag(standardized_image_path)
-            
-            # 6. For manual calculation, resize the in-memory image
-            # This is more efficient than rereading from disk
-            image_resized_for_manual = cv2.resize(img_bgr, (640, 640))
-            
-            # 7. Calculate the manual steps
-            calculation_steps = self._calculate_steps(image_resized_for_manual, model_results)
-            
-            # 8. Add educational explanation to make simulation purpose clear
-            calculation_steps["educational_note"] = {
-                "title": "Educational Simulation Note",
-                "description": "This is a simplified educational simulation of how CNN-based models like YOLOv8 work. " +
-                              "It doesn't represent an actual neural network implementation but rather illustrates the " +
-                              "concepts behind object detection for learning purposes. The actual CNN process is more " +
-                              "complex and involves millions of parameters trained on large datasets."
-            }
-            
-            return {
-                "model_prediction": model_results,
-                "manual_calculation": calculation_steps
-            }
-            
-        except Exception as e:
-            # Ensure good error logging here
-            # import logging
-            # logging.exception("Error in process_flag_image")
-            raise e  # Re-throw error to be caught at higher level
         finally:
             # Clean up
             if os.path.exists(standardized_image_path):
                 os.remove(standardized_image_path)
+        
+        if cache_key is not None:
+            self.prediction_cache.set(cache_key, model_results)
+        return model_results, False
+    
+    def _get_executor(self):
+        """Return this process's vision pool, creating it on first use"""
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = create_vision_process_pool(self.process_pool_workers, self.analysis_size)
+                    self._executor_pid = os.getpid()
+        return self._executor
     
-    def _calculate_steps(self, image, model_results):
+    def warmup(self):
+        """
+        Run the full calculation pipeline once on a synthetic flag so that lazy
+        library initialisation (OpenCV kernels, sklearn/OpenMP thread pools) is
+        paid before the first real request instead of during it.
+        """
+        image = np.full((640, 640, 3), 255, dtype=np.uint8)
+        image[:320] = (0, 0, 255)  # Red over white, BGR
+        
+        model_results = {
+            "predictions": [
+                {"x": 320, "y": 320, "width": 600, "height": 400, "confidence": 0.9, "class": "indonesia"}
+            ]
+        }
+        for quality in QUALITY_MODES:
+            self._calculate_steps(image, model_results, quality)
+    
+    def _calculate_steps(self, image, model_results, quality="full"):
         """Calculate all manual calculation steps"""
         # Extract the top prediction if available
         top_prediction = None
@@ -201,6 +264,12 @@ class ManualCalculationService:
         # 2. Color Analysis - Now with improved HSV-based analysis
         color_analysis = self._analyze_colors(image, predicted_class)
         
+        # Inputs of the geometric stages, downsampled in fast mode
+        geometry_image, geometry_prediction, geometry_scale = self._geometry_inputs(image, top_prediction, quality)
+        
+        # Summed-area tables shared by the pattern and shape stages
+        region_stats = self._build_region_stats(geometry_image)
+        
         # 3. Convolution Simulation
         convolution = self._simulate_convolution(image)
         
@@ -214,10 +283,12 @@ class ManualCalculationService:
         class_probs = self._calculate_class_probabilities(color_analysis, predicted_class)
         
         # 7. Pattern Matching - Now with Hough line detection
-        pattern_matching = self._pattern_matching(image, color_analysis, predicted_class)
+        pattern_matching = self._pattern_matching(geometry_image, color_analysis, predicted_class,
+                                                  geometry_prediction, region_stats, geometry_scale)
         
         # 8. Shape Analysis - Now with contour analysis
-        shape_analysis = self._analyze_shape(image, top_prediction, predicted_class)
+        shape_analysis = self._analyze_shape(geometry_image, geometry_prediction, predicted_class,
+                                             region_stats, geometry_scale)
         
         # 9. NMS (using model results)
         nms_results = self._simulate_nms(model_results)
@@ -240,9 +311,36 @@ class ManualCalculationService:
             "pattern_matching": pattern_matching,
             "shape_analysis": shape_analysis,
             "nms": nms_results,
-            "final_confidence": final_confidence
+            "final_confidence": final_confidence,
+            "analysis": {
+                "quality": quality,
+                "geometry_resolution": f"{geometry_image.shape[1]}x{geometry_image.shape[0]}"
+            }
         }
     
+    def _geometry_inputs(self, image, prediction, quality):
+        """
+        Return (image, prediction, scale) for the geometric stages: unchanged in
+        full mode, otherwise resized so the longest side is analysis_size with
+        the prediction box scaled to match
+        """
+        height, width = image.shape[:2]
+        if quality == "full" or not self.analysis_size or max(height, width) <= self.analysis_size:
+            return image, prediction, 1.0
+        
+        scale = self.analysis_size / max(height, width)
+        small = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        
+        if prediction is not None:
+            prediction = dict(prediction)
+            for key in ("x", "y", "width", "height"):
+                if key in prediction:
+                    prediction[key] = prediction[key] * scale
+        
+        return small, prediction, scale
+    
+    @traced('manual_calculation.input_analysis')
     def _analyze_input_pixels(self, image):
         """Analyze a sample of key pixels in the image"""
         # Sample pixels at different positions (simplified)
@@ -288,6 +386,7 @@ class ManualCalculationService:
             "color_space": "RGB and HSV analyzed"
         }
     
+    @traced('manual_calculation.color_analysis')
     def _analyze_colors(self, image, predicted_class):
         """
         Analyze color distribution using HSV color space and k-means clustering
@@ -312,31 +411,27 @@ class ManualCalculationService:
             "other": 0
         }
         
-        # Sample for HSV-based classification
-        hsv_samples = []
-        for i in range(0, height * width, step):
-            y, x = i // width, i % width
-            hsv = image_hsv[y, x]
-            hsv_samples.append(hsv)
-            
-            color = self._classify_color_hsv(hsv)
+        # Sample for HSV-based classification, all samples classified in one table lookup
+        hsv_samples_array = image_hsv.reshape(-1, 3)[::step]
+        for color, count in self.color_lookup.counts(hsv_samples_array).items():
             if color in color_counts:
-                color_counts[color] += 1
+                color_counts[color] += count
             else:
-                color_counts["other"] += 1
+                color_counts["other"] += count
         
         # Color clustering for dominant colors
-        hsv_samples_array = np.array(hsv_samples)
-        
         # Determine optimal cluster count based on expected colors in the flag
         if predicted_class in self.flag_metadata:
-            expected_colors = self.flag_metadata[predicted_class].get("colors", [])
+            expected_colors = self.flag_metadata[predicted_class].colors
             n_clusters = min(len(expected_colors) + 1, 5)  # Cap at 5 clusters
         else:
             n_clusters = 3  # Default cluster count
         
         # Apply k-means clustering to find dominant colors
         if len(hsv_samples_array) > n_clusters:  # Ensure we have enough samples
+            # Imported here: sklearn is the slowest import of the vision stack
+            from sklearn.cluster import KMeans
+            
             kmeans = KMeans(n_clusters=n_clusters, random_state=42)
             kmeans.fit(hsv_samples_array)
             cluster_centers = kmeans.cluster_centers_
@@ -378,7 +473,7 @@ class ManualCalculationService:
         # Get expected color distribution for this flag if available
         expected_distribution = {}
         if predicted_class in self.flag_metadata:
-            expected_distribution = self.flag_metadata[predicted_class].get("expected_color_distribution", {})
+            expected_distribution = self.flag_metadata[predicted_class].expected_color_distribution
         
         return {
             "total_pixels": total_pixels,
@@ -391,29 +486,13 @@ class ManualCalculationService:
         }
     
     def _classify_color_hsv(self, hsv):
-        """Classify a pixel into a color category using HSV thresholds"""
-        h, s, v = hsv
-        
-        # Check for white and black first based on value and saturation
-        if v < 30:
-            return "black"
-        if s < 30 and v > 200:
-            return "white"
-            
-        # Check for specific colors using HSV ranges
-        for color, ranges in self.hsv_color_ranges.items():
-            for range_dict in ranges:
-                lower = range_dict["lower"]
-                upper = range_dict["upper"]
-                
-                # Check if the HSV value is within the range
-                if (lower[0] <= h <= upper[0] and 
-                    lower[1] <= s <= upper[1] and 
-                    lower[2] <= v <= upper[2]):
-                    return color
-        
-        return "other"
+        """
+        Classify a pixel into a color category using HSV thresholds: black
+        (v < 30), then white (s < 30 and v > 200), then hsv_color_ranges in order
+        """
+        return self.color_lookup.name(hsv)
     
+    @traced('manual_calculation.convolution')
     def _simulate_convolution(self, image):
         """Simulate the first convolution layer"""
         # Convert to grayscale for edge detection
@@ -470,10 +549,10 @@ class ManualCalculationService:
             },
             "sample_results": sample_results,
             "edge_statistics": edge_stats,
-            "explanation": "Convolution detects features like edges by applying filter kernels to the image. " +
-                           "In a real CNN, hundreds of learned filters detect complex patterns."
+            "explanation": STAGE_EXPLANATIONS["convolution"]
         }
     
+    @traced('manual_calculation.feature_maps')
     def _simulate_feature_maps(self, convolution_results):
         """Simulate feature maps and pooling operations"""
         # This is a simplified simulation
@@ -506,11 +585,10 @@ class ManualCalculationService:
             "feature_map_dimensions": "13x13 (downsampled from 640x640)",
             "pooling_results": pooling_results,
             "pooling_types": ["max", "average"],
-            "explanation": "Feature maps capture patterns like edges, textures, and color transitions. " +
-                          "In a real CNN, early layers detect simple features while deeper layers detect " +
-                          "more complex patterns. Pooling reduces dimensionality while preserving important features."
+            "explanation": STAGE_EXPLANATIONS["feature_maps"]
         }
     
+    @traced('manual_calculation.bounding_box')
     def _calculate_bounding_box(self, image, prediction):
         """Calculate bounding box information based on model prediction"""
         height, width = image.shape[:2]
@@ -579,96 +657,82 @@ class ManualCalculationService:
             "objectness": round(confidence, 2),
             "best_anchor": best_anchor,
             "anchor_iou": round(best_iou, 2),
-            "explanation": "Grid cell: Location in 13x13 feature map. (x,y)_center: Position relative to grid cell. " +
-                          "width/height: Size relative to image. YOLOv8 predicts bounding boxes by learning " +
-                          "offsets from anchor boxes in each grid cell."
+            "explanation": STAGE_EXPLANATIONS["bounding_box"]
         }
     
+    @traced('manual_calculation.class_probabilities')
     def _calculate_class_probabilities(self, color_analysis, predicted_class):
         """Calculate probabilities for each flag class based on color analysis"""
-        # Get dominant colors from improved color analysis
-        color_percentages = color_analysis.get("color_percentages", {})
-        dominant_colors = color_analysis.get("dominant_colors", [])
+        return self._calculate_class_probabilities_batch([color_analysis], [predicted_class])[0]
+    
+    def _calculate_class_probabilities_batch(self, color_analyses, predicted_classes):
+        """
+        Score every flag class for several images at once.
         
-        # Calculate class probabilities based on color match with known flags
-        class_probs = {}
-        notes = {}
+        Each image's observed color histogram is compared with the expected
+        distribution matrix of all flags (see domain.vision.class_scoring), so
+        the work is a few array operations however many images are scored.
+        """
+        color_names = self.color_lookup.color_names
+        distribution, palette, expected_columns = flag_palette_arrays(color_names)
+        
+        probabilities = class_probabilities(
+            color_histograms([a.get("color_percentages", {}) for a in color_analyses], color_names),
+            dominant_color_counts([a.get("dominant_colors", []) for a in color_analyses], color_names),
+            distribution,
+            palette,
+            expected_columns
+        )
         
-        for flag_class, metadata in self.flag_metadata.items():
-            expected_colors = metadata.get("colors", [])
-            expected_distribution = metadata.get("expected_color_distribution", {})
-            
-            # Calculate color match score using both pixel classification and dominant colors
-            color_match_score = 0
-            total_expected = 0
-            
-            # Method 1: Compare with expected color distribution
-            for color, expected_pct in expected_distribution.items():
-                actual_pct = color_percentages.get(color, 0) / 100  # Convert from percentage to proportion
-                match_quality = 1 - min(1, abs(expected_pct - actual_pct) / max(expected_pct, 0.01))
-                color_match_score += match_quality * expected_pct
-                total_expected += expected_pct
-            
-            # Normalize score
-            if total_expected > 0:
-                color_match_score = color_match_score / total_expected
-                
-            # Method 2: Check if dominant colors match expected colors
-            dominant_color_match = 0
-            if dominant_colors:
-                expected_color_count = len(expected_colors)
-                matched_colors = 0
-                
-                for color_info in dominant_colors:
-                    if color_info["color_name"] in expected_colors:
-                        matched_colors += 1
+        results = []
+        for row, predicted_class in zip(probabilities, predicted_classes):
+            class_probs = {}
+            notes = {}
+            for flag_class, probability in zip(self.flag_metadata, row.tolist()):
+                class_probs[flag_class] = round(probability, 2)
                 
-                if expected_color_count > 0:
-                    dominant_color_match = matched_colors / expected_color_count
+                # Add explanation for the predicted class
+                if flag_class == predicted_class:
+                    notes[flag_class] = "Highest match based on color distribution"
+                elif probability > 0.7:
+                    notes[flag_class] = "Very similar color profile"
+                elif probability > 0.5:
+                    notes[flag_class] = "Similar color profile"
+                elif probability > 0.3:
+                    notes[flag_class] = "Some color similarities"
+                else:
+                    notes[flag_class] = "Low color match"
             
-            # Combine both methods (weighted average)
-            final_match_score = 0.7 * color_match_score + 0.3 * dominant_color_match
+            # Sort by probability
+            sorted_probs = sorted(class_probs.items(), key=lambda x: x[1], reverse=True)
             
-            # Convert to probability (capped)
-            probability = min(0.95, max(0.05, final_match_score))
-            
-            # Add to results
-            class_probs[flag_class] = round(probability, 2)
-            
-            # Add explanation for the predicted class
-            if flag_class == predicted_class:
-                notes[flag_class] = "Highest match based on color distribution"
-            elif probability > 0.7:
-                notes[flag_class] = "Very similar color profile"
-            elif probability > 0.5:
-                notes[flag_class] = "Similar color profile"
-            elif probability > 0.3:
-                notes[flag_class] = "Some color similarities"
-            else:
-                notes[flag_class] = "Low color match"
-        
-        # Sort by probability
-        sorted_probs = sorted(class_probs.items(), key=lambda x: x[1], reverse=True)
+            results.append({
+                "probabilities": class_probs,
+                "sorted_probabilities": sorted_probs,
+                "notes": notes,
+                "explanation": STAGE_EXPLANATIONS["class_probabilities"]
+            })
         
-        return {
-            "probabilities": class_probs,
-            "sorted_probabilities": sorted_probs,
-            "notes": notes,
-            "explanation": "Probabilities are calculated based on color distribution match with known flags. " +
-                          "Both HSV color classification and dominant color clustering are used to improve accuracy."
-        }
+        return results
     
-    def _pattern_matching(self, image, color_analysis, predicted_class):
+    @traced('manual_calculation.pattern_matching')
+    def _pattern_matching(self, image, color_analysis, predicted_class, prediction=None, region_stats=None, scale=1.0):
         """
         Evaluate how well the image matches expected flag patterns 
-        using Hough line detection for stripe patterns
+        using Hough line detection and color purity of the expected stripe bands
+        
+        `scale` is the image size relative to the 640x640 input; the Hough
+        vote threshold and line lengths are given for 640x640 and scaled by it.
         """
         # 1. Prepare image for line detection
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         edges = cv2.Canny(gray, 50, 150)
         
-        # 2. Apply Hough Line Transform
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100, minLineLength=100, maxLineGap=10)
+        # 2. Apply Hough Line Transform (votes along a line grow with its length)
+        lines = cv2.HoughLinesP(edges, 1, np.pi/180,
+                                threshold=max(10, round(100 * scale)),
+                                minLineLength=max(10, round(100 * scale)),
+                                maxLineGap=max(1, round(10 * scale)))
         
         # Initialize pattern analysis results
         horizontal_lines = 0
@@ -697,15 +761,15 @@ class ManualCalculationService:
             expected_lines = 0
         else:
             flag_data = self.flag_metadata[predicted_class]
-            expected_pattern = flag_data.get("pattern", "unknown")
-            expected_line_pattern = flag_data.get("line_pattern", "unknown")
-            expected_lines = flag_data.get("expected_lines", 0)
+            expected_pattern = flag_data.pattern
+            expected_line_pattern = flag_data.line_pattern
+            expected_lines = flag_data.expected_lines
         
         # Calculate color distribution score
         color_pcts = color_analysis.get("color_percentages", {})
         expected_dist = {}
         if predicted_class in self.flag_metadata:
-            expected_dist = self.flag_metadata[predicted_class].get("expected_color_distribution", {})
+            expected_dist = self.flag_metadata[predicted_class].expected_color_distribution
         
         color_distribution_score = 0
         for color, expected in expected_dist.items():
@@ -741,6 +805,13 @@ class ManualCalculationService:
         else:
             line_pattern_score = 0.5  # Unknown pattern, neutral score
         
+        # Color purity of the expected stripes, from O(1) band sums
+        if region_stats is None:
+            region_stats = self._build_region_stats(image)
+        stripe_bands = self._stripe_band_analysis(
+            region_stats, self._region_of_interest(image, prediction), predicted_class
+        )
+        
         # Other pattern factors
         aspect_ratio_score = 0.95  # Assuming aspect ratio is close to expected
         orientation_score = 1.0    # Assuming orientation matches
@@ -753,11 +824,20 @@ class ManualCalculationService:
             "orientation": orientation_score
         }
         
-        # Weight the components for final score
-        overall_score = (color_distribution_score * 0.4 + 
-                         line_pattern_score * 0.4 + 
-                         aspect_ratio_score * 0.1 + 
-                         orientation_score * 0.1)
+        # Weight the components for final score; striped flags split the line
+        # weight between the Hough line count and the band purity
+        if stripe_bands is not None:
+            pattern_scores["stripe_bands"] = stripe_bands["score"]
+            overall_score = (color_distribution_score * 0.4 + 
+                             line_pattern_score * 0.2 + 
+                             stripe_bands["score"] * 0.2 + 
+                             aspect_ratio_score * 0.1 + 
+                             orientation_score * 0.1)
+        else:
+            overall_score = (color_distribution_score * 0.4 + 
+                             line_pattern_score * 0.4 + 
+                             aspect_ratio_score * 0.1 + 
+                             orientation_score * 0.1)
         
         # Line detection results for educational purposes
         line_detection = {
@@ -772,41 +852,34 @@ class ManualCalculationService:
         return {
             "expected_pattern": expected_pattern,
             "line_detection": line_detection,
+            "stripe_band_analysis": stripe_bands,
             "component_scores": pattern_scores,
             "pattern_score": round(overall_score, 2),
-            "explanation": f"Pattern score evaluates how well the image matches the expected pattern for {predicted_class} flag using Hough line detection for identifying stripes and geometric patterns."
+            "explanation": STAGE_EXPLANATIONS["pattern_matching"].format(predicted_class=predicted_class)
         }
     
-    def _analyze_shape(self, image, prediction, predicted_class):
+    @traced('manual_calculation.shape_analysis')
+    def _analyze_shape(self, image, prediction, predicted_class, region_stats=None, scale=1.0):
         """
         Analyze shape characteristics of the detected flag using contour analysis
+        
+        `scale` is the image size relative to the 640x640 input; areas and
+        edge density are reported in 640x640 units.
         """
+        if region_stats is None:
+            region_stats = self._build_region_stats(image)
+        
         # Extract bounding box for region of interest
         height, width = image.shape[:2]
-        
         if prediction is None:
-            # Use default values if no prediction
-            x_center = width // 2
-            y_center = height // 2
             w = int(width * 0.7)
             h = int(height * 0.5)
         else:
-            # Extract from prediction
-            x_center = int(prediction.get("x", width/2))
-            y_center = int(prediction.get("y", height/2))
             w = int(prediction.get("width", width*0.7))
             h = int(prediction.get("height", height*0.5))
         
-        # Calculate ROI coordinates
-        x1 = max(0, int(x_center - w/2))
-        y1 = max(0, int(y_center - h/2))
-        x2 = min(width, int(x_center + w/2))
-        y2 = min(height, int(y_center + h/2))
-        
-        # Extract ROI
+        x1, y1, x2, y2 = self._region_of_interest(image, prediction)
         roi = image[y1:y2, x1:x2]
-        if roi.size == 0:  # Check if ROI is valid
-            roi = image  # Use full image if ROI is invalid
         
         # Convert to grayscale and threshold for contour detection
         gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
@@ -842,7 +915,7 @@ class ManualCalculationService:
             
             contour_features = {
                 "contour_count": len(contours),
-                "largest_contour_area": float(largest_area),
+                "largest_contour_area": float(largest_area / scale ** 2),
                 "rectangularity": float(rectangularity),
                 "solidity": float(solidity)
             }
@@ -851,12 +924,9 @@ class ManualCalculationService:
         actual_aspect_ratio = w / h if h > 0 else 1
         expected_aspect_ratio = 1.5  # Default 3:2 for most flags
         
-        # Get expected aspect ratio from metadata
+        # Get expected aspect ratio from metadata (parsed once in the registry)
         if predicted_class in self.flag_metadata:
-            ratio_str = self.flag_metadata[predicted_class].get("aspect_ratio", "3:2")
-            if ":" in ratio_str:
-                w_ratio, h_ratio = map(int, ratio_str.split(":"))
-                expected_aspect_ratio = w_ratio / h_ratio if h_ratio > 0 else 1.5
+            expected_aspect_ratio = self.flag_metadata[predicted_class].aspect_ratio_value
         
         # Compare aspect ratios
         aspect_ratio_score = 1 - min(1, abs(actual_aspect_ratio - expected_aspect_ratio) / max(expected_aspect_ratio, 0.5))
@@ -864,13 +934,13 @@ class ManualCalculationService:
         # Calculate rectangularity score (most flags are rectangular)
         rectangularity_score = contour_features["rectangularity"]
         
-        # Calculate symmetry - simplified approximation
-        # For more accurate symmetry, we'd need to analyze pixel distributions
-        symmetry_score = 0.9  # Default assumption for flags
+        # Mirror symmetry of the color layout, from O(1) grid cell sums
+        symmetry = self._symmetry_analysis(region_stats, (x1, y1, x2, y2))
+        symmetry_score = symmetry["score"]
         
-        # Edge sharpness using Canny edge detection
-        edges = cv2.Canny(gray_roi, 100, 200)
-        edge_density = np.count_nonzero(edges) / edges.size
+        # Edge sharpness from the Canny edge map's summed-area table
+        # Edges are one pixel wide, so their density grows as 1/scale when downsampled
+        edge_density = float(region_stats["edges"].sum(x1, y1, x2, y2)) / max(1, (x2 - x1) * (y2 - y1)) * scale
         edge_sharpness = min(1.0, edge_density * 10)  # Normalize
         
         shape_features = {
@@ -888,15 +958,113 @@ class ManualCalculationService:
         
         return {
             "contour_analysis": contour_features,
+            "symmetry_analysis": symmetry,
             "actual_aspect_ratio": round(actual_aspect_ratio, 2),
             "expected_aspect_ratio": expected_aspect_ratio,
             "shape_features": shape_features,
             "shape_score": round(overall_score, 2),
-            "explanation": "Shape analysis evaluates geometric properties of the detected flag using contour analysis, aspect ratio comparison, and edge detection."
+            "explanation": STAGE_EXPLANATIONS["shape_analysis"]
+        }
+    
+    @traced('manual_calculation.region_stats')
+    def _build_region_stats(self, image):
+        """
+        Summed-area tables of the per-color masks and the Canny edge map, so
+        region statistics cost four lookups regardless of region size
+        """
+        color_codes = self.color_lookup.classify(cv2.cvtColor(image, cv2.COLOR_BGR2HSV))
+        edges = cv2.Canny(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), 100, 200)
+        return {
+            "colors": color_integral(color_codes, len(self.color_lookup.color_names)),
+            "edges": IntegralImage(edges > 0)
+        }
+    
+    def _region_of_interest(self, image, prediction):
+        """Pixel rectangle (x1, y1, x2, y2) of the prediction, or the full image if it is empty"""
+        height, width = image.shape[:2]
+        
+        if prediction is None:
+            # Use default values if no prediction
+            x_center = width // 2
+            y_center = height // 2
+            w = int(width * 0.7)
+            h = int(height * 0.5)
+        else:
+            # Extract from prediction
+            x_center = int(prediction.get("x", width/2))
+            y_center = int(prediction.get("y", height/2))
+            w = int(prediction.get("width", width*0.7))
+            h = int(prediction.get("height", height*0.5))
+        
+        x1 = max(0, int(x_center - w/2))
+        y1 = max(0, int(y_center - h/2))
+        x2 = min(width, int(x_center + w/2))
+        y2 = min(height, int(y_center + h/2))
+        
+        if x2 <= x1 or y2 <= y1:
+            return 0, 0, width, height
+        return x1, y1, x2, y2
+    
+    def _stripe_band_analysis(self, region_stats, roi, predicted_class):
+        """
+        Split the flag region into the expected number of equal stripes and
+        score how uniformly colored each band is and whether neighbouring
+        bands differ. Returns None for flags without a stripe pattern.
+        """
+        flag_data = self.flag_metadata.get(predicted_class)
+        if flag_data is None or flag_data.line_pattern not in ("horizontal", "vertical") or flag_data.expected_lines < 1:
+            return None
+        
+        line_pattern = flag_data.line_pattern
+        bands = flag_data.expected_lines + 1
+        axis = 0 if line_pattern == "horizontal" else 1
+        fractions = region_stats["colors"].means(*band_rects(*roi, bands, axis))
+        
+        dominant = fractions.argmax(axis=1)
+        purity = fractions.max(axis=1)
+        changes = float(np.mean(dominant[1:] != dominant[:-1]))
+        score = float(purity.mean()) * changes
+        
+        color_names = self.color_lookup.color_names
+        return {
+            "bands": bands,
+            "orientation": line_pattern,
+            "band_colors": [color_names[c] for c in dominant],
+            "band_purity": [round(float(p), 2) for p in purity],
+            "color_changes": round(changes, 2),
+            "score": round(score, 2)
         }
     
-    def _simulate_nms(self, model_results):
-        """Simulate Non-Maximum Suppression process"""
+    def _symmetry_analysis(self, region_stats, roi, grid=8):
+        """
+        Compare the color histograms of a grid over the region with its left-right
+        and top-bottom mirror images; 1.0 means a perfectly mirrored layout
+        """
+        x1, y1, x2, y2 = roi
+        rows = max(1, min(grid, y2 - y1))
+        cols = max(1, min(grid, x2 - x1))
+        cells = region_stats["colors"].means(*grid_rects(x1, y1, x2, y2, rows, cols)).reshape(rows, cols, -1)
+        
+        # Half the L1 distance between two color histograms is in [0, 1]
+        left_right = 1 - float(np.abs(cells - cells[:, ::-1]).sum(axis=2).mean()) / 2
+        top_bottom = 1 - float(np.abs(cells - cells[::-1, :]).sum(axis=2).mean()) / 2
+        
+        return {
+            "left_right": round(left_right, 2),
+            "top_bottom": round(top_bottom, 2),
+            "score": round(max(left_right, top_bottom), 2)
+        }
+    
+    @traced('manual_calculation.nms')
+    def _simulate_nms(self, model_results, method="standard"):
+        """
+        Simulate Non-Maximum Suppression process
+        
+        Args:
+            model_results: Inference API response
+            method: "standard", "class_aware" (only same-class boxes suppress
+                each other) or "soft" (Gaussian Soft-NMS score decay)
+        """
         # Extract predictions
         predictions = model_results.get("predictions", [])
         if not predictions:
@@ -905,88 +1073,41 @@ class ManualCalculationService:
                 "explanation": "No predictions to apply NMS"
             }
         
-        # Sort by confidence
-        sorted_preds = sorted(predictions, key=lambda x: x.get("confidence", 0), reverse=True)
-        
-        # Process boxes
-        nms_results = []
-        kept_boxes = []
+        boxes = boxes_from_predictions(predictions)
+        scores = [pred.get("confidence", 0) for pred in predictions]
+        classes = [pred.get("class", "unknown") for pred in predictions]
         threshold = 0.45  # IoU threshold for NMS
         
-        for i, pred in enumerate(sorted_preds):
-            pred_id = i + 1
-            confidence = pred.get("confidence", 0)
-            
-            # Calculate IoU with kept boxes
-            max_iou = 0
-            overlapping_with = None
-            
-            for j, kept_box in enumerate(kept_boxes):
-                iou = self._calculate_iou(pred, kept_box)
-                if iou > max_iou:
-                    max_iou = iou
-                    overlapping_with = j + 1
-            
-            # Decide whether to keep the box
-            keep = True
-            if max_iou > threshold:
-                keep = False
-            
-            if keep:
-                kept_boxes.append(pred)
-            
-            nms_results.append({
-                "box_id": pred_id,
-                "confidence": round(confidence, 2),
-                "iou_with_previous": round(max_iou, 2) if overlapping_with else "-",
-                "overlapping_with": overlapping_with,
+        if method == "soft":
+            result = soft_nms(boxes, scores)
+        else:
+            result = nms(boxes, scores, iou_threshold=threshold,
+                         classes=classes if method == "class_aware" else None)
+        
+        nms_results = []
+        for position, index in enumerate(result["order"]):
+            overlapping = int(result["overlapping_with"][position])
+            box = {
+                "box_id": position + 1,
+                "confidence": round(scores[index], 2),
+                "iou_with_previous": round(float(result["max_iou"][position]), 2) if overlapping >= 0 else "-",
+                "overlapping_with": overlapping + 1 if overlapping >= 0 else None,
                 "threshold": threshold,
-                "keep": keep
-            })
+                "keep": bool(result["keep"][position])
+            }
+            if method == "soft":
+                box["adjusted_confidence"] = round(float(result["scores"][position]), 2)
+            nms_results.append(box)
         
         return {
+            "method": method,
             "threshold": threshold,
             "boxes": nms_results,
-            "kept_boxes": len(kept_boxes),
-            "explanation": "Non-Maximum Suppression removes overlapping boxes, keeping only the highest confidence detections. " +
-                           "In object detection, NMS prevents duplicate detections of the same object."
+            "kept_boxes": int(np.count_nonzero(result["keep"])),
+            "explanation": STAGE_EXPLANATIONS["nms"]
         }
     
-    def _calculate_iou(self, box1, box2):
-        """Calculate Intersection over Union between two boxes"""
-        # Extract coordinates
-        x1_1 = box1.get("x", 0) - box1.get("width", 0) / 2
-        y1_1 = box1.get("y", 0) - box1.get("height", 0) / 2
-        x2_1 = box1.get("x", 0) + box1.get("width", 0) / 2
-        y2_1 = box1.get("y", 0) + box1.get("height", 0) / 2
-        
-        x1_2 = box2.get("x", 0) - box2.get("width", 0) / 2
-        y1_2 = box2.get("y", 0) - box2.get("height", 0) / 2
-        x2_2 = box2.get("x", 0) + box2.get("width", 0) / 2
-        y2_2 = box2.get("y", 0) + box2.get("height", 0) / 2
-        
-        # Calculate intersection area
-        x1_i = max(x1_1, x1_2)
-        y1_i = max(y1_1, y1_2)
-        x2_i = min(x2_1, x2_2)
-        y2_i = min(y2_1, y2_2)
-        
-        if x2_i < x1_i or y2_i < y1_i:
-            return 0.0  # No intersection
-        
-        intersection = (x2_i - x1_i) * (y2_i - y1_i)
-        
-        # Calculate box areas
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        
-        # Calculate IoU
-        union = area1 + area2 - intersection
-        if union <= 0:
-            return 0.0
-            
-        return intersection / union
-    
+    @traced('manual_calculation.final_confidence')
     def _calculate_final_confidence(self, objectness, class_prob, pattern_score, shape_score):
         """Calculate final confidence score using component scores"""
         # Weighted combination of scores
@@ -1011,16 +1132,13 @@ class ManualCalculationService:
         
         # Create component table
         components = [
-            {"component": "Objectness Score", "value": round(objectness, 2), "weight": weights[0], "explanation": "Confidence from bounding box detection"},
-            {"component": "Class Probability", "value": round(class_prob, 2), "weight": weights[1], "explanation": "Probability of the detected flag class"},
-            {"component": "Pattern Score", "value": round(pattern_score, 2), "weight": weights[2], "explanation": "Score for pattern matching"},
-            {"component": "Shape Score", "value": round(shape_score, 2), "weight": weights[3], "explanation": "Score for shape characteristics"},
+            {"component": name, "value": round(score, 2), "weight": weight, "explanation": CONFIDENCE_COMPONENT_EXPLANATIONS[name]}
+            for name, score, weight in zip(CONFIDENCE_COMPONENT_EXPLANATIONS, scores, weights)
         ]
         
         return {
             "component_scores": components,
             "confidence": final_confidence,
             "confidence_pct": f"{round(final_confidence * 100, 2)}%",
-            "explanation": "Final confidence is calculated using a weighted geometric mean of all component scores, " +
-                           "similar to how neural networks combine feature confidences but in a much simplified form."
+            "explanation": STAGE_EXPLANATIONS["final_confidence"]
         }
\ No newline at end of file
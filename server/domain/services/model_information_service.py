@@ -1,6 +1,7 @@
 import os
 import json
 from datetime import datetime
+from domain.flag_registry import FLAG_DISPLAY_NAMES
 
 class ModelInfoService:
     """Service to provide information about the flag detection model"""
@@ -18,15 +19,17 @@ class ModelInfoService:
             "mAP50": "85.3%",
             "training_date": "2024-04-15",
             "input_size": "640x640",
-            "classes": ["Brunei", "Cambodia", "Indonesia", "Laos", "Malaysia", 
-                      "Myanmar", "Philippines", "Singapore", "Thailand", "Vietnam"],
+            "classes": sorted(FLAG_DISPLAY_NAMES),
             "framework": "PyTorch",
             "description": "Custom YOLOv8 model trained to detect and classify ASEAN country flags"
         }
     
     @staticmethod
     def get_training_metrics():
-        """Get detailed training metrics"""
+        """
+        Get detailed training metrics (validation set figures from training time;
+        metrics of the live traffic come from ModelMetricsService)
+        """
         return {
             "epochs": 100,
             "batch_size": 16,
@@ -69,7 +72,7 @@ class ModelInfoService:
                 "Thailand": 0.81,
                 "Vietnam": 0.78
             },
-            "confusion_matrix": "confusion_matrix_data.json",
+            "live_metrics": "/api/admin/model-metrics/live",
             "augmentations_used": [
                 "Random rotation (±15°)",
                 "Random brightness (±20%)",
@@ -0,0 +1,121 @@
+from domain.flag_registry import FLAG_DISPLAY_NAMES
+from domain.models.metric_counter import MetricCounter
+from infrastructure.database import bump_counter, counter_shard
+from core.exceptions import ValidationError
+
+# Confidence histogram bins of width 1 / CONFIDENCE_BINS
+CONFIDENCE_BINS = 10
+# Confirmed label for a detection that was not a flag at all
+NO_FLAG_LABEL = 'none'
+LABELS = tuple(sorted(FLAG_DISPLAY_NAMES)) + (NO_FLAG_LABEL,)
+
+
+def confidence_bin(confidence):
+    return min(CONFIDENCE_BINS - 1, max(0, int(confidence * CONFIDENCE_BINS)))
+
+
+class ModelMetricsService:
+    """
+    Live model metrics maintained as streaming aggregates (metric_counters).
+
+    Every detection request bumps the request count and, when something was
+    detected, the confidence histogram of its top class; every confirmed label
+    moves its log into a (predicted, confirmed) confusion matrix cell and bumps
+    the label version that cached detection log pages are tagged with. The
+    counters are written in the caller's transaction and read back in one
+    query, so the metrics cost O(classes) however many logs there are.
+    """
+
+    @staticmethod
+    def record_request(class_name=None, confidence=None):
+        """Count one detection request (class_name None when nothing was detected); caller commits"""
+        # Sharded: every detection transaction bumps it
+        _bump('requests', '', str(counter_shard()))
+        if class_name is not None:
+            _bump('confidence', class_name, str(confidence_bin(confidence or 0)), value=confidence or 0)
+
+    @staticmethod
+    def record_label(log, label):
+        """Set log.confirmed_label and update the confusion matrix; caller commits"""
+        if label not in LABELS:
+            raise ValidationError(f"Invalid label '{label}', expected a flag class or '{NO_FLAG_LABEL}'")
+        if log.confirmed_label == label:
+            return
+        if log.confirmed_label is not None:
+            _bump('confusion', log.flag_detected, log.confirmed_label, count=-1)
+        _bump('confusion', log.flag_detected, label)
+        _bump('labels', '', '')
+        log.confirmed_label = label
+    
+    @staticmethod
+    def label_version():
+        """Number of label changes so far; part of the detection log page ETags"""
+        row = MetricCounter.query.get(('labels', '', ''))
+        return row.count if row is not None else 0
+
+    @staticmethod
+    def get_live_metrics():
+        rows = MetricCounter.query.all()
+
+        requests = 0
+        histograms = {}
+        confidence_sums = {}
+        confusion = {}
+        for row in rows:
+            if row.metric == 'requests':
+                requests += row.count
+            elif row.metric == 'confidence':
+                histogram = histograms.setdefault(row.class_name, [0] * CONFIDENCE_BINS)
+                histogram[int(row.bucket)] += row.count
+                confidence_sums[row.class_name] = confidence_sums.get(row.class_name, 0.0) + row.value_sum
+            elif row.metric == 'confusion' and row.count:
+                confusion[(row.class_name, row.bucket)] = row.count
+
+        # Classes seen as predictions or confirmations, in label order
+        seen = set(histograms) | {p for p, _ in confusion} | {t for _, t in confusion}
+        labels = [label for label in LABELS if label in seen] + sorted(seen - set(LABELS))
+
+        classes = {}
+        for name in labels:
+            if name == NO_FLAG_LABEL:
+                continue
+            histogram = histograms.get(name, [0] * CONFIDENCE_BINS)
+            detections = sum(histogram)
+            true_positives = confusion.get((name, name), 0)
+            labelled_as_predicted = sum(c for (p, _), c in confusion.items() if p == name)
+            labelled_as_actual = sum(c for (_, t), c in confusion.items() if t == name)
+            precision = _ratio(true_positives, labelled_as_predicted)
+            recall = _ratio(true_positives, labelled_as_actual)
+            classes[name] = {
+                'detections': detections,
+                'detection_rate': _ratio(detections, requests),
+                'mean_confidence': _ratio(confidence_sums.get(name, 0.0), detections),
+                'confidence_histogram': histogram,
+                'labelled': labelled_as_predicted,
+                'precision': precision,
+                'recall': recall,
+                'f1': _ratio(2 * precision * recall, precision + recall) if precision is not None and recall is not None else None
+            }
+
+        detected = sum(c['detections'] for c in classes.values())
+        return {
+            'requests': requests,
+            'detection_rate': _ratio(detected, requests),
+            'confidence_bins': [round(i / CONFIDENCE_BINS, 2) for i in range(CONFIDENCE_BINS + 1)],
+            'classes': classes,
+            'confusion_matrix': {
+                # rows are predicted classes, columns confirmed labels
+                'labels': labels,
+                'matrix': [[confusion.get((p, t), 0) for t in labels] for p in labels],
+                'labelled': sum(confusion.values())
+            }
+        }
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def _bump(metric, class_name, bucket, count=1, value=0.0):
+    bump_counter(MetricCounter, {'metric': metric, 'class_name': class_name, 'bucket': bucket},
+                 count=count, value_sum=value)
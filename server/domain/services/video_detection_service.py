@@ -0,0 +1,145 @@
+from core.exceptions import RateLimitError, ValidationError
+from domain.vision.tracking import IouTracker
+from domain.vision.video import ImageSequenceSource, SceneChangeDetector, VideoFrameSource
+
+
+class VideoDetectionService:
+    """
+    Flag detection over videos and frame sequences.
+
+    Frames are decoded one at a time. Only frames that differ enough from the
+    last inferred one (or that come max_interval_seconds after it) are sent to
+    the model; detections are linked into tracks by IoU, frames in between
+    reuse the active tracks' boxes, and each finished track is stored as one
+    DetectionLog through DetectionService.log_detection. The live metrics and
+    drift counters count inferred frames, empty ones included, not tracks.
+    """
+
+    def __init__(self, detection_service):
+        self.detection_service = detection_service
+
+    def open_video(self, path, stride=1, max_frames=None):
+        try:
+            return VideoFrameSource(path, stride=stride, max_frames=max_frames)
+        except ValueError:
+            raise ValidationError("Could not decode video")
+
+    def open_frames(self, images, fps=30.0, stride=1, max_frames=None):
+        if fps <= 0:
+            raise ValidationError("fps must be positive")
+        return ImageSequenceSource(images, fps=fps, stride=stride, max_frames=max_frames)
+
+    def process(self, source, ip_address="", user_agent="", user_id=None,
+                scene_threshold=0.08, max_interval_seconds=2.0, iou_threshold=0.3, max_misses=2,
+                charge_inference=None):
+        """
+        Detect flags in the frames of `source` (see open_video / open_frames).
+
+        Yields one record per examined frame as soon as it is processed:
+        {"frame", "timestamp_ms", "inferred", "scene_change", "detections"}
+        where each detection carries the track_id it belongs to, then a last
+        {"summary": {...}} record with the tracks and their detection log ids.
+
+        charge_inference, if given, is called before every inference; when it
+        raises RateLimitError the remaining frames are skipped and the summary
+        says why in "stopped".
+        """
+        tracker = IouTracker(iou_threshold=iou_threshold, max_misses=max_misses)
+        scenes = SceneChangeDetector()
+        max_interval_frames = max(1, int(round(max_interval_seconds * source.fps)))
+        client = self.detection_service.roboflow_client
+
+        examined = inferred = errors = 0
+        last_inferred = stopped = None
+        logged = []
+
+        def log_tracks(tracks):
+            for track in tracks:
+                log = self.detection_service.log_detection(
+                    {'predictions': [track.best_prediction]}, ip_address, user_agent, user_id,
+                    record_inference=False
+                )
+                logged.append(_track_to_dict(track, log.id if log is not None else None))
+
+        try:
+            for frame_index, timestamp_ms, frame in source:
+                change = scenes.score(frame)
+                due = last_inferred is None or frame_index - last_inferred >= max_interval_frames
+                record = {
+                    "frame": frame_index,
+                    "timestamp_ms": round(timestamp_ms, 1),
+                    "inferred": due or change >= scene_threshold,
+                    "scene_change": round(change, 4)
+                }
+
+                if record["inferred"] and charge_inference is not None:
+                    try:
+                        charge_inference()
+                    except RateLimitError as e:
+                        stopped = str(e)
+                        break
+                examined += 1
+
+                if record["inferred"]:
+                    try:
+                        predictions = client.detect_flag(frame).get("predictions") or []
+                    except Exception as e:
+                        # Keep going; the tracks carry on as if nothing was seen
+                        errors += 1
+                        record["error"] = str(e)
+                        predictions = []
+                    else:
+                        self.detection_service.record_inference(predictions)
+                    scenes.mark_keyframe()
+                    last_inferred = frame_index
+                    inferred += 1
+
+                    matches, closed = tracker.update(predictions, frame_index, timestamp_ms)
+                    log_tracks(closed)
+                    record["detections"] = [_detection(track, p) for track, p in matches]
+                else:
+                    record["detections"] = [_detection(track, track.prediction) for track in tracker.active]
+
+                yield record
+        finally:
+            # Also runs when the client disconnects mid-stream, so seen tracks are still logged
+            log_tracks(tracker.finish())
+
+        yield {
+            "summary": {
+                "frames_read": source.frames_read,
+                "frames_examined": examined,
+                "frames_inferred": inferred,
+                "inference_skipped_ratio": round(1 - inferred / examined, 4) if examined else 0.0,
+                "errors": errors,
+                "stopped": stopped,
+                "fps": source.fps,
+                "tracks": logged
+            }
+        }
+
+
+def _detection(track, prediction):
+    return {
+        "track_id": track.track_id,
+        "class": prediction.get("class"),
+        "confidence": prediction.get("confidence"),
+        "x": prediction.get("x"),
+        "y": prediction.get("y"),
+        "width": prediction.get("width"),
+        "height": prediction.get("height")
+    }
+
+
+def _track_to_dict(track, detection_log_id):
+    return {
+        "track_id": track.track_id,
+        "class": track.class_name,
+        "first_frame": track.first_frame,
+        "last_frame": track.last_frame,
+        "first_ms": round(track.first_ms, 1),
+        "last_ms": round(track.last_ms, 1),
+        "hits": track.hits,
+        "best_confidence": track.best_prediction.get("confidence"),
+        "detection_log_id": detection_log_id
+    }
@@ -0,0 +1,73 @@
+"""
+Color-based flag class scoring as matrix operations.
+
+Observed color histograms of M images are scored against the expected
+palettes of all F flags (see domain.flag_registry.flag_palette_arrays) in one
+batched computation:
+
+    color match     weighted closeness of each observed share to the expected
+                    share, (M, C) vs (F, C) -> (M, F)
+    dominant match  clusters whose color belongs to the flag, per palette size,
+                    (M, C) @ (C, F) -> (M, F)
+"""
+import numpy as np
+
+
+def color_histograms(color_percentages, color_names):
+    """Stack per-image {color: percentage} dicts into an (M, C) array of proportions"""
+    return np.array(
+        [[pcts.get(color, 0) for color in color_names] for pcts in color_percentages],
+        dtype=np.float64
+    ).reshape(len(color_percentages), len(color_names)) / 100
+
+
+def dominant_color_counts(dominant_colors, color_names):
+    """Count the k-means clusters named after each color, (M, C) for M lists of clusters"""
+    columns = {color: i for i, color in enumerate(color_names)}
+    counts = np.zeros((len(dominant_colors), len(color_names)))
+    for row, clusters in enumerate(dominant_colors):
+        for cluster in clusters:
+            column = columns.get(cluster["color_name"])
+            if column is not None:
+                counts[row, column] += 1
+    return counts
+
+
+def class_probabilities(observed, dominant_counts, distribution, palette, expected_columns=None,
+                        color_weight=0.7, dominant_weight=0.3, floor=0.05, cap=0.95):
+    """
+    Score M images against F flags.
+
+    Args:
+        observed: (M, C) observed color proportions
+        dominant_counts: (M, C) dominant clusters per color
+        distribution: (F, C) expected color proportions
+        palette: (F, C) 1.0 where a color belongs to the flag
+        expected_columns: optional (F, K) columns of each flag's expected colors
+            padded with -1; scoring only those (in that order) skips the zero
+            entries of `distribution` and sums in the same order as the
+            per-flag definition, so results round identically to it
+
+    Returns:
+        np.ndarray: (M, F) probabilities clipped to [floor, cap]
+    """
+    if expected_columns is None:
+        expected_columns = np.broadcast_to(np.arange(distribution.shape[1]), distribution.shape)
+
+    valid = expected_columns >= 0
+    columns = np.where(valid, expected_columns, 0)
+    expected = np.where(valid, np.take_along_axis(distribution, columns, axis=1), 0.0)  # (F, K)
+    actual = observed[:, columns]                                                       # (M, F, K)
+
+    # 1 - relative error of every observed share, weighted by the expected share
+    closeness = 1 - np.minimum(1, np.abs(expected - actual) / np.maximum(expected, 0.01))
+    total_expected = expected.sum(axis=1)
+    color_match = np.divide((closeness * expected).sum(axis=2), total_expected,
+                            out=np.zeros((observed.shape[0], distribution.shape[0])),
+                            where=total_expected > 0)
+
+    palette_sizes = palette.sum(axis=1)
+    dominant_match = np.divide(dominant_counts @ palette.T, palette_sizes,
+                               out=np.zeros_like(color_match), where=palette_sizes > 0)
+
+    return np.clip(color_weight * color_match + dominant_weight * dominant_match, floor, cap)
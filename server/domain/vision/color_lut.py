@@ -0,0 +1,84 @@
+"""
+HSV color-name lookup table.
+
+The HSV threshold rules of the manual calculation are compiled once into a
+256x256x256 uint8 table of color codes, so classifying any number of pixels
+is a single fancy-index operation instead of a Python loop over the ranges.
+The hue axis covers the full uint8 range (OpenCV hues stop at 179) so the
+table agrees with the rules for every possible input.
+"""
+import functools
+import numpy as np
+
+OTHER = 'other'
+
+# HSV thresholds (OpenCV scale: H 0-180, S and V 0-255) used to name colors
+HSV_COLOR_RANGES = {
+    "red": [
+        {"lower": np.array([0, 100, 100]), "upper": np.array([10, 255, 255])},
+        {"lower": np.array([160, 100, 100]), "upper": np.array([180, 255, 255])}  # Red wraps around in HSV
+    ],
+    "green": [{"lower": np.array([35, 100, 100]), "upper": np.array([85, 255, 255])}],
+    "blue": [{"lower": np.array([100, 100, 100]), "upper": np.array([130, 255, 255])}],
+    "yellow": [{"lower": np.array([20, 100, 100]), "upper": np.array([35, 255, 255])}],
+    "white": [{"lower": np.array([0, 0, 200]), "upper": np.array([180, 30, 255])}],
+    "black": [{"lower": np.array([0, 0, 0]), "upper": np.array([180, 255, 30])}]
+}
+for _ranges in HSV_COLOR_RANGES.values():
+    for _range in _ranges:
+        _range["lower"].flags.writeable = False
+        _range["upper"].flags.writeable = False
+
+
+class HsvColorLookup:
+    """Maps HSV pixels to color names with the same precedence as the threshold rules"""
+
+    def __init__(self, hsv_color_ranges, black_max_value=30, white_max_saturation=30, white_min_value=200):
+        # Code 0 is 'other'; the rest follow the order of hsv_color_ranges
+        color_names = [OTHER] + [c for c in hsv_color_ranges if c != OTHER]
+        for color in ('black', 'white'):
+            if color not in color_names:
+                color_names.append(color)
+        self.color_names = tuple(color_names)
+        self._codes = {name: code for code, name in enumerate(self.color_names)}
+
+        axis = np.arange(256)
+        table = np.zeros((256, 256, 256), dtype=np.uint8)
+
+        # Assign from lowest to highest precedence so earlier rules win:
+        # ranges in reverse dict order, then white, then black
+        for color in reversed(list(hsv_color_ranges)):
+            for range_dict in reversed(hsv_color_ranges[color]):
+                lower, upper = range_dict["lower"], range_dict["upper"]
+                h = (axis >= lower[0]) & (axis <= upper[0])
+                s = (axis >= lower[1]) & (axis <= upper[1])
+                v = (axis >= lower[2]) & (axis <= upper[2])
+                table[h[:, None, None] & s[None, :, None] & v[None, None, :]] = self._codes[color]
+
+        white = (axis < white_max_saturation)[:, None] & (axis > white_min_value)[None, :]
+        table[:, white] = self._codes['white']
+        table[:, :, axis < black_max_value] = self._codes['black']
+
+        self.table = table
+
+    def classify(self, hsv_pixels):
+        """Return the color codes of an (..., 3) array of HSV pixels"""
+        hsv_pixels = np.asarray(hsv_pixels)
+        if hsv_pixels.dtype != np.uint8:
+            hsv_pixels = np.clip(hsv_pixels, 0, 255).astype(np.uint8)
+        return self.table[hsv_pixels[..., 0], hsv_pixels[..., 1], hsv_pixels[..., 2]]
+
+    def name(self, hsv):
+        """Return the color name of a single HSV pixel"""
+        return self.color_names[int(self.classify(hsv))]
+
+    def counts(self, hsv_pixels):
+        """Return {color_name: pixel count} for an (..., 3) array of HSV pixels"""
+        codes = np.bincount(self.classify(hsv_pixels).ravel(), minlength=len(self.color_names))
+        return {name: int(count) for name, count in zip(self.color_names, codes)}
+
+
+@functools.lru_cache(maxsize=None)
+def get_color_lookup():
+    """The HSV_COLOR_RANGES table, built once per process"""
+    return HsvColorLookup(HSV_COLOR_RANGES)
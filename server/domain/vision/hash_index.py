@@ -0,0 +1,105 @@
+"""
+Multi-index hashing (MIH) over 64-bit perceptual hashes.
+
+The hash is split into max_distance + 1 chunks. If two hashes differ in at
+most max_distance bits, at least one chunk must be identical (pigeonhole), so
+a lookup only has to check the ids sharing a chunk value with the query
+instead of every stored hash.
+"""
+import threading
+import numpy as np
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(values):
+        return np.bitwise_count(values)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _BYTE_POPCOUNT[values.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+class HammingIndex:
+    """In-memory near-duplicate index mapping 64-bit hashes to record ids"""
+
+    def __init__(self, max_distance=4, initial_capacity=1024):
+        self.max_distance = max_distance
+        num_chunks = max_distance + 1
+        # Split the 64 bits as evenly as possible
+        bounds = np.linspace(0, 64, num_chunks + 1).astype(int)
+        self._chunks = [(int(lo), (1 << int(hi - lo)) - 1) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self._tables = [{} for _ in self._chunks]
+
+        self._hashes = np.zeros(initial_capacity, dtype=np.uint64)
+        self._ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def _chunk_values(self, value):
+        return [(value >> shift) & mask for shift, mask in self._chunks]
+
+    def add(self, value, record_id):
+        with self._lock:
+            if self._size == len(self._hashes):
+                self._hashes = np.resize(self._hashes, 2 * len(self._hashes))
+                self._ids = np.resize(self._ids, 2 * len(self._ids))
+
+            position = self._size
+            self._hashes[position] = value
+            self._ids[position] = record_id
+            self._size += 1
+
+            for table, chunk in zip(self._tables, self._chunk_values(value)):
+                table.setdefault(chunk, []).append(position)
+
+    def add_many(self, values, record_ids):
+        for value, record_id in zip(values, record_ids):
+            self.add(value, record_id)
+
+    def lookup_all(self, value, max_distance=None):
+        """Every stored (record_id, distance) within max_distance bits, closest first"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+
+        with self._lock:
+            candidate_lists = [
+                table[chunk] for table, chunk in zip(self._tables, self._chunk_values(value))
+                if chunk in table
+            ]
+            if not candidate_lists:
+                return []
+
+            positions = np.unique(np.concatenate([np.asarray(c, dtype=np.int64) for c in candidate_lists]))
+            distances = _popcount(self._hashes[positions] ^ np.uint64(value))
+            ids = self._ids[positions]
+
+        order = np.argsort(distances, kind='stable')
+        return [(int(ids[i]), int(distances[i])) for i in order if distances[i] <= max_distance]
+
+    def lookup(self, value, max_distance=None):
+        """
+        Find the closest stored hash within max_distance bits.
+
+        Returns:
+            tuple: (record_id, distance) or None when nothing is close enough
+        """
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+
+        with self._lock:
+            candidate_lists = [
+                table[chunk] for table, chunk in zip(self._tables, self._chunk_values(value))
+                if chunk in table
+            ]
+            if not candidate_lists:
+                return None
+
+            positions = np.unique(np.concatenate([np.asarray(c, dtype=np.int64) for c in candidate_lists]))
+            distances = _popcount(self._hashes[positions] ^ np.uint64(value))
+            ids = self._ids[positions]
+
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance:
+            return None
+        return int(ids[best]), int(distances[best])
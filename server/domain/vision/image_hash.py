@@ -0,0 +1,73 @@
+"""
+Perceptual image hashes.
+
+Both hashes are 64-bit integers that change little when an image is
+re-compressed or resized, so near-duplicates are found by Hamming distance.
+They only see brightness, though, and flags sharing a stripe layout (France
+and Italy, Indonesia and Thailand) hash alike; a colour signature, the mean
+Lab colour of a 12x12 grid, confirms a candidate before it counts as the
+same image.
+"""
+import cv2
+import numpy as np
+
+# Cells per side of the colour signature grid; 12 is fine enough that a small
+# emblem (Singapore's crescent on Indonesia's stripes) moves some cell a lot
+COLOR_GRID = 12
+# Length of a colour signature as hex (one byte per Lab channel per cell)
+COLOR_SIGNATURE_LENGTH = COLOR_GRID * COLOR_GRID * 3 * 2
+
+_BIT_WEIGHTS = (1 << np.arange(63, -1, -1, dtype=np.uint64)).astype(np.uint64)
+
+
+def _bits_to_int(bits):
+    return int(np.bitwise_or.reduce(_BIT_WEIGHTS[bits.ravel()]) if bits.any() else 0)
+
+
+def dhash(gray):
+    """Difference hash: sign of horizontal gradients on a 9x8 thumbnail"""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(gray):
+    """DCT hash: low-frequency 8x8 DCT coefficients compared to their median"""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low_freq = cv2.dct(small)[:8, :8]
+    return _bits_to_int(low_freq > np.median(low_freq))
+
+
+def color_signature(image):
+    """Mean Lab colour of each cell of a COLOR_GRID x COLOR_GRID grid over a BGR image, as hex"""
+    small = cv2.resize(image, (COLOR_GRID, COLOR_GRID), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2LAB).tobytes().hex()
+
+
+def color_difference(signature, other):
+    """Largest difference of one Lab channel in one cell between two colour signatures"""
+    a = np.frombuffer(bytes.fromhex(signature), np.uint8).astype(np.int16)
+    b = np.frombuffer(bytes.fromhex(other), np.uint8).astype(np.int16)
+    return int(np.abs(a - b).max())
+
+
+HASH_FUNCTIONS = {
+    'dhash': dhash,
+    'phash': phash
+}
+
+
+def compute_image_hash(image_bytes, algorithm='dhash'):
+    """
+    Hash encoded image bytes.
+
+    Returns:
+        tuple: (hash as int, width, height, colour signature), or None if the
+        bytes can't be decoded
+    """
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+
+    height, width = image.shape[:2]
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return HASH_FUNCTIONS[algorithm](gray), width, height, color_signature(image)
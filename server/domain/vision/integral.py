@@ -0,0 +1,90 @@
+"""
+Integral images (summed-area tables).
+
+After one O(H*W) pass, the sum of any axis-aligned rectangle is four table
+reads, so band, grid and sliding-window statistics over color masks and edge
+maps cost O(1) per region instead of a pass over the region's pixels.
+Rectangles are half-open pixel ranges: x1 <= x < x2, y1 <= y < y2.
+"""
+import cv2
+import numpy as np
+
+
+class IntegralImage:
+    """Summed-area table over one 2-D channel or a list of equally sized channels"""
+
+    def __init__(self, channels):
+        single = not isinstance(channels, (list, tuple))
+        channels = [channels] if single else channels
+        self.single = single
+        self.height, self.width = channels[0].shape[:2]
+        # cv2.integral prepends a row and column of zeros, so region sums need
+        # no edge cases; tables are stacked channel-first to keep each contiguous
+        self.table = np.stack([self._integral(c) for c in channels])
+
+    @staticmethod
+    def _integral(channel):
+        channel = np.asarray(channel)
+        if channel.dtype == np.bool_:
+            channel = channel.view(np.uint8)
+        # 32-bit sums are exact while the total fits, which covers any 0/1 mask
+        # and 8-bit maps below ~8 megapixels
+        if channel.dtype == np.uint8 and channel.size * 255 < 2**31:
+            return cv2.integral(channel, sdepth=cv2.CV_32S)
+        return cv2.integral(channel.astype(np.float64), sdepth=cv2.CV_64F)
+
+    def _lookup(self, x1, y1, x2, y2):
+        t = self.table
+        totals = t[:, y2, x2] - t[:, y1, x2] - t[:, y2, x1] + t[:, y1, x1]
+        # Channel axis last: (N, K) for rectangle arrays, (K,) for a single one
+        totals = np.moveaxis(totals, 0, -1)
+        return totals[..., 0] if self.single else totals
+
+    def sum(self, x1, y1, x2, y2):
+        """Sum over one rectangle (a (K,) vector for several channels)"""
+        return self._lookup(x1, y1, x2, y2)
+
+    def sums(self, x1, y1, x2, y2):
+        """Sums over N rectangles given as equal-length coordinate arrays, shape (N[, K])"""
+        return self._lookup(*(np.asarray(c, dtype=np.intp) for c in (x1, y1, x2, y2)))
+
+    def means(self, x1, y1, x2, y2):
+        """Per-pixel means over N rectangles; empty rectangles give 0"""
+        x1, y1, x2, y2 = (np.asarray(c, dtype=np.intp) for c in (x1, y1, x2, y2))
+        areas = np.maximum((x2 - x1) * (y2 - y1), 0).astype(np.float64)
+        totals = self.sums(x1, y1, x2, y2).astype(np.float64)
+        if totals.ndim > 1:
+            areas = np.broadcast_to(areas[:, None], totals.shape)
+        return np.divide(totals, areas, out=np.zeros_like(totals), where=areas > 0)
+
+
+def color_integral(color_codes, num_colors):
+    """Integral image with one 0/1 mask channel per color code of a (H, W) code array"""
+    return IntegralImage([color_codes == code for code in range(num_colors)])
+
+
+def band_rects(x1, y1, x2, y2, bands, axis):
+    """
+    Split a rectangle into equal bands.
+
+    Args:
+        axis: 0 for horizontal bands stacked top to bottom, 1 for vertical bands left to right
+
+    Returns:
+        tuple: (x1s, y1s, x2s, y2s) arrays of length `bands`
+    """
+    ones = np.ones(bands, dtype=np.intp)
+    if axis == 0:
+        edges = np.linspace(y1, y2, bands + 1).round().astype(np.intp)
+        return x1 * ones, edges[:-1], x2 * ones, edges[1:]
+    edges = np.linspace(x1, x2, bands + 1).round().astype(np.intp)
+    return edges[:-1], y1 * ones, edges[1:], y2 * ones
+
+
+def grid_rects(x1, y1, x2, y2, rows, cols):
+    """Split a rectangle into a rows x cols grid; arrays are row-major of length rows*cols"""
+    ys = np.linspace(y1, y2, rows + 1).round().astype(np.intp)
+    xs = np.linspace(x1, x2, cols + 1).round().astype(np.intp)
+    cy1, cx1 = np.meshgrid(ys[:-1], xs[:-1], indexing='ij')
+    cy2, cx2 = np.meshgrid(ys[1:], xs[1:], indexing='ij')
+    return cx1.ravel(), cy1.ravel(), cx2.ravel(), cy2.ravel()
@@ -0,0 +1,164 @@
+"""
+Vectorized IoU and Non-Maximum Suppression.
+
+Shared by the manual calculation explanation and any local inference decode
+path. Boxes are NumPy arrays of shape (N, 4) in corner format (x1, y1, x2, y2);
+predictions from the inference API use centre format and can be converted
+with boxes_from_predictions.
+"""
+import numpy as np
+
+
+def boxes_from_predictions(predictions):
+    """Convert API predictions ({x, y, width, height} centres) to an (N, 4) xyxy array"""
+    if not predictions:
+        return np.zeros((0, 4), dtype=np.float64)
+
+    centres = np.array(
+        [[p.get("x", 0), p.get("y", 0), p.get("width", 0), p.get("height", 0)] for p in predictions],
+        dtype=np.float64
+    )
+    half_sizes = centres[:, 2:] / 2
+    return np.concatenate([centres[:, :2] - half_sizes, centres[:, :2] + half_sizes], axis=1)
+
+
+def iou_matrix(boxes_a, boxes_b, metric="iou"):
+    """
+    Pairwise Intersection over Union.
+
+    Args:
+        boxes_a: (N, 4) xyxy array
+        boxes_b: (M, 4) xyxy array
+        metric: "iou", or "ios" for intersection over the smaller box's area,
+            which stays high when one box is a cropped part of the other
+
+    Returns:
+        np.ndarray: (N, M) IoU values, 0 where boxes don't overlap
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float64)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64)
+    ax1, ay1, ax2, ay2 = (boxes_a[:, k:k + 1] for k in range(4))
+    bx1, by1, bx2, by2 = (boxes_b[:, k] for k in range(4))
+
+    # Work on 2-D (N, M) planes per coordinate; an (N, M, 2) intermediate is
+    # several times slower for large N
+    inter_w = np.minimum(ax2, bx2) - np.maximum(ax1, bx1)
+    np.clip(inter_w, 0, None, out=inter_w)
+    inter_h = np.minimum(ay2, by2) - np.maximum(ay1, by1)
+    np.clip(inter_h, 0, None, out=inter_h)
+    intersection = inter_w * inter_h
+
+    area_a = (ax2 - ax1) * (ay2 - ay1)
+    area_b = (bx2 - bx1) * (by2 - by1)
+    if metric == "ios":
+        union = np.minimum(area_a, area_b)
+    else:
+        union = area_a + area_b - intersection
+
+    iou = np.zeros_like(intersection)
+    np.divide(intersection, union, out=iou, where=union > 0)
+    return iou
+
+
+def nms(boxes, scores, iou_threshold=0.45, classes=None, metric="iou"):
+    """
+    Greedy NMS, optionally class-aware, with per-box explanation data.
+
+    Boxes are visited in descending score order (stable for equal scores). A
+    box is kept unless its IoU with an already kept box exceeds the threshold.
+    With `classes`, only boxes of the same class suppress each other.
+    `metric` is passed to iou_matrix.
+
+    Returns:
+        dict with arrays indexed by position in visiting order:
+            order: indices into the input arrays
+            keep: whether the box survives
+            max_iou: highest IoU with any box kept before it
+            overlapping_with: 0-based position in the kept list of that box, -1 if none
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind='stable')
+    n = len(order)
+
+    keep = np.zeros(n, dtype=bool)
+    max_iou = np.zeros(n, dtype=np.float64)
+    overlapping_with = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return {"order": order, "keep": keep, "max_iou": max_iou, "overlapping_with": overlapping_with}
+
+    ious = iou_matrix(np.asarray(boxes)[order], np.asarray(boxes)[order], metric)
+    if classes is not None:
+        sorted_classes = np.asarray(classes)[order]
+        ious = np.where(sorted_classes[:, None] == sorted_classes[None, :], ious, 0.0)
+
+    # max_iou[j] always holds the best overlap of box j with the boxes kept so
+    # far, so each box is decided in O(1) and each kept box costs one vector update
+    kept_count = 0
+    for i in range(n):
+        if max_iou[i] > iou_threshold:
+            continue
+
+        keep[i] = True
+        row = ious[i, i + 1:]
+        # Strict comparison keeps the earliest kept box on ties
+        better = row > max_iou[i + 1:]
+        max_iou[i + 1:][better] = row[better]
+        overlapping_with[i + 1:][better] = kept_count
+        kept_count += 1
+
+    return {"order": order, "keep": keep, "max_iou": max_iou, "overlapping_with": overlapping_with}
+
+
+def soft_nms(boxes, scores, sigma=0.5, score_threshold=0.001, classes=None):
+    """
+    Gaussian Soft-NMS: overlapping boxes have their score decayed instead of
+    being removed outright.
+
+    Returns:
+        dict with arrays indexed by selection order:
+            order: indices into the input arrays
+            scores: decayed score of each box at selection time
+            keep: whether the decayed score is still above score_threshold
+            max_iou: highest IoU with any previously selected box
+            overlapping_with: 0-based selection position of that box, -1 if none
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)
+    remaining_scores = np.asarray(scores, dtype=np.float64).copy()
+    n = len(remaining_scores)
+
+    ious = iou_matrix(boxes, boxes) if n else np.zeros((0, 0))
+    if classes is not None and n:
+        classes = np.asarray(classes)
+        ious = np.where(classes[:, None] == classes[None, :], ious, 0.0)
+
+    order = np.zeros(n, dtype=np.int64)
+    final_scores = np.zeros(n, dtype=np.float64)
+    max_iou = np.zeros(n, dtype=np.float64)
+    overlapping_with = np.full(n, -1, dtype=np.int64)
+    best_iou = np.zeros(n, dtype=np.float64)
+    best_position = np.full(n, -1, dtype=np.int64)
+    selected = np.zeros(n, dtype=bool)
+
+    for position in range(n):
+        candidates = np.where(selected, -np.inf, remaining_scores)
+        i = int(np.argmax(candidates))
+        selected[i] = True
+
+        order[position] = i
+        final_scores[position] = remaining_scores[i]
+        max_iou[position] = best_iou[i]
+        overlapping_with[position] = best_position[i]
+
+        row = ious[i]
+        remaining_scores = np.where(selected, remaining_scores, remaining_scores * np.exp(-(row ** 2) / sigma))
+        better = (row > best_iou) & ~selected
+        best_iou[better] = row[better]
+        best_position[better] = position
+
+    return {
+        "order": order,
+        "scores": final_scores,
+        "keep": final_scores >= score_threshold,
+        "max_iou": max_iou,
+        "overlapping_with": overlapping_with
+    }
@@ -0,0 +1,108 @@
+"""
+Sliced inference for high-resolution images.
+
+A large photo is covered with overlapping square tiles at the model's input
+size, so small flags keep enough pixels to be detected. Tiles with almost no
+saturated flag colors (by the shared HSV lookup table, on a downscaled copy
+and an integral image, so each tile costs four reads) are skipped. Per-tile
+predictions are shifted back to image coordinates and merged with the
+full-image predictions by class-aware NMS on intersection over the smaller
+box, which also removes the partial boxes left where a tile cut a flag.
+"""
+import cv2
+import numpy as np
+from domain.vision.color_lut import get_color_lookup
+from domain.vision.integral import IntegralImage
+from domain.vision.nms import boxes_from_predictions, nms
+
+# Saturated colors that every flag in the registry contains at least one of;
+# white and black are left out because walls, sky and shadows are full of them
+FLAG_SIGNAL_COLORS = ("red", "green", "blue", "yellow")
+
+
+def tile_origins(length, tile_size, overlap):
+    """Start offsets along one axis: stride tile_size * (1 - overlap), last tile flush with the end"""
+    if length <= tile_size:
+        return [0]
+    stride = max(1, int(tile_size * (1 - overlap)))
+    origins = list(range(0, length - tile_size, stride))
+    origins.append(length - tile_size)
+    return origins
+
+
+def tile_grid(width, height, tile_size=640, overlap=0.2):
+    """Overlapping tiles covering the image, as (x1, y1, x2, y2) tuples in row-major order"""
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in tile_origins(height, tile_size, overlap)
+        for x in tile_origins(width, tile_size, overlap)
+    ]
+
+
+def flag_color_pixels(image, tiles, downscale=4):
+    """
+    Approximate number of each tile's pixels that fall in FLAG_SIGNAL_COLORS.
+
+    Args:
+        image: BGR image the tiles refer to
+        tiles: (x1, y1, x2, y2) tuples in image pixels
+        downscale: the color mask is computed on every downscale-th pixel in each axis
+
+    Returns:
+        np.ndarray: one pixel count per tile, in full-resolution pixels
+    """
+    if not tiles:
+        return np.zeros(0)
+
+    height, width = image.shape[:2]
+    # Point sampling rather than area averaging: it is cheaper and doesn't blend a
+    # small flag's colors into the background until they fall below the saturation rule
+    small = np.ascontiguousarray(image[::downscale, ::downscale])
+    lookup = get_color_lookup()
+    codes = lookup.classify(cv2.cvtColor(small, cv2.COLOR_BGR2HSV))
+    signal_codes = [lookup.color_names.index(c) for c in FLAG_SIGNAL_COLORS]
+    integral = IntegralImage(np.isin(codes, signal_codes))
+
+    # A count rather than a share: a distant flag is a few hundred pixels of a 640x640 tile
+    scale_x, scale_y = small.shape[1] / width, small.shape[0] / height
+    rects = np.array(tiles, dtype=np.float64)
+    x1 = np.floor(rects[:, 0] * scale_x)
+    y1 = np.floor(rects[:, 1] * scale_y)
+    x2 = np.maximum(np.ceil(rects[:, 2] * scale_x), x1 + 1).clip(max=small.shape[1])
+    y2 = np.maximum(np.ceil(rects[:, 3] * scale_y), y1 + 1).clip(max=small.shape[0])
+    return integral.sums(x1, y1, x2, y2) / (scale_x * scale_y)
+
+
+def merge_tile_predictions(results, offsets, merge_threshold=0.5):
+    """
+    Combine per-tile inference responses into one list of predictions.
+
+    Args:
+        results: one inference response per tile (the full image counts as a tile at (0, 0))
+        offsets: (x, y) of each tile's top-left corner in the image
+        merge_threshold: intersection over the smaller box above which two
+            same-class boxes are the same flag
+
+    Returns:
+        list: surviving predictions in image coordinates, highest confidence first
+    """
+    predictions = []
+    for result, (offset_x, offset_y) in zip(results, offsets):
+        for prediction in (result or {}).get("predictions", []):
+            shifted = dict(prediction)
+            shifted["x"] = prediction.get("x", 0) + offset_x
+            shifted["y"] = prediction.get("y", 0) + offset_y
+            shifted.pop("detection_id", None)
+            predictions.append(shifted)
+
+    if not predictions:
+        return []
+
+    result = nms(
+        boxes_from_predictions(predictions),
+        [p.get("confidence", 0) for p in predictions],
+        iou_threshold=merge_threshold,
+        classes=[p.get("class") for p in predictions],
+        metric="ios"
+    )
+    return [predictions[i] for i in result["order"][result["keep"]]]
@@ -0,0 +1,102 @@
+"""
+Lightweight IoU tracker for video detection.
+
+Detections of consecutive inferred frames are linked into tracks by greedy
+same-class IoU matching, so a flag that stays in view is one track (and one
+detection log) instead of one result per frame, and frames between
+inferences can reuse the tracks' last boxes.
+"""
+import numpy as np
+from domain.vision.nms import boxes_from_predictions, iou_matrix
+
+
+class Track:
+    """One flag followed across frames"""
+
+    def __init__(self, track_id, prediction, frame_index, timestamp_ms):
+        self.track_id = track_id
+        self.class_name = prediction.get("class", "unknown")
+        self.prediction = prediction
+        self.best_prediction = prediction
+        self.first_frame = self.last_frame = frame_index
+        self.first_ms = self.last_ms = timestamp_ms
+        self.hits = 1
+        self.misses = 0
+
+    def update(self, prediction, frame_index, timestamp_ms):
+        self.prediction = prediction
+        if prediction.get("confidence", 0) > self.best_prediction.get("confidence", 0):
+            self.best_prediction = prediction
+        self.last_frame = frame_index
+        self.last_ms = timestamp_ms
+        self.hits += 1
+        self.misses = 0
+
+
+class IouTracker:
+    """
+    Greedy IoU tracker.
+
+    Args:
+        iou_threshold: minimum IoU between a track's last box and a detection of the same class
+        max_misses: inferred frames a track may go unmatched before it is closed
+    """
+
+    def __init__(self, iou_threshold=0.3, max_misses=2):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.active = []
+        self._next_id = 1
+
+    def update(self, predictions, frame_index, timestamp_ms):
+        """
+        Match the detections of an inferred frame to the active tracks.
+
+        Returns:
+            tuple: (matches, closed) where matches is [(track, prediction)] for
+            every detection of this frame and closed the tracks that just ended
+        """
+        matches = []
+        unmatched = list(range(len(predictions)))
+
+        if self.active and predictions:
+            ious = iou_matrix(
+                boxes_from_predictions([t.prediction for t in self.active]),
+                boxes_from_predictions(predictions)
+            )
+            same_class = np.array([[t.class_name == p.get("class", "unknown") for p in predictions]
+                                   for t in self.active])
+            ious = np.where(same_class, ious, 0.0)
+
+            while ious.size:
+                t, p = np.unravel_index(np.argmax(ious), ious.shape)
+                if ious[t, p] < self.iou_threshold:
+                    break
+                track = self.active[t]
+                track.update(predictions[p], frame_index, timestamp_ms)
+                matches.append((track, predictions[p]))
+                unmatched.remove(p)
+                ious[t, :] = 0
+                ious[:, p] = 0
+
+        matched_tracks = {id(track) for track, _ in matches}
+        closed = []
+        for track in self.active:
+            if id(track) not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    closed.append(track)
+        self.active = [t for t in self.active if t not in closed]
+
+        for p in unmatched:
+            track = Track(self._next_id, predictions[p], frame_index, timestamp_ms)
+            self._next_id += 1
+            self.active.append(track)
+            matches.append((track, predictions[p]))
+
+        return matches, closed
+
+    def finish(self):
+        """Close and return every active track"""
+        closed, self.active = self.active, []
+        return closed
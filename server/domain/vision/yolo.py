@@ -0,0 +1,88 @@
+"""
+Pre- and post-processing for YOLOv8 detection models run locally.
+
+letterbox() prepares a BGR image the way the exported model expects
+(aspect-preserving resize, grey padding, RGB, CHW float32 in [0, 1]) and
+decode_yolov8() turns the raw (4 + classes, anchors) output back into
+predictions in the same centre-format dicts the Roboflow API returns, in
+original image pixels.
+"""
+import cv2
+import numpy as np
+from domain.vision.nms import nms
+
+PAD_VALUE = 114
+
+
+def letterbox(image, size=640):
+    """
+    Resize to fit a size x size square and pad the rest.
+
+    Returns:
+        tuple: (chw_float32, scale, (pad_x, pad_y))
+    """
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+    canvas = np.full((size, size, 3), PAD_VALUE, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+        image, (new_w, new_h), interpolation=cv2.INTER_LINEAR
+    )
+    tensor = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB).transpose(2, 0, 1).astype(np.float32)
+    tensor *= 1 / 255
+    return tensor, scale, (pad_x, pad_y)
+
+
+def decode_yolov8(output, class_names, scale, padding, image_size,
+                  confidence_threshold=0.4, iou_threshold=0.5, max_detections=100):
+    """
+    Decode one image's raw YOLOv8 output.
+
+    Args:
+        output: (4 + len(class_names), anchors) array of cx, cy, w, h and class scores
+        class_names: class name per model output index
+        scale, padding: values returned by letterbox() for this image
+        image_size: (width, height) of the original image
+
+    Returns:
+        list: predictions sorted by confidence, {x, y, width, height, confidence, class, class_id}
+    """
+    output = np.asarray(output, dtype=np.float32)
+    class_scores = output[4:]
+    class_ids = class_scores.argmax(axis=0)
+    confidences = class_scores[class_ids, np.arange(class_scores.shape[1])]
+
+    candidates = np.flatnonzero(confidences >= confidence_threshold)
+    if candidates.size == 0:
+        return []
+
+    # Undo the letterbox: model pixels -> original image pixels
+    cx = (output[0, candidates] - padding[0]) / scale
+    cy = (output[1, candidates] - padding[1]) / scale
+    w = output[2, candidates] / scale
+    h = output[3, candidates] / scale
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+    width, height = image_size
+    np.clip(boxes[:, 0::2], 0, width, out=boxes[:, 0::2])
+    np.clip(boxes[:, 1::2], 0, height, out=boxes[:, 1::2])
+
+    result = nms(boxes, confidences[candidates], iou_threshold=iou_threshold, classes=class_ids[candidates])
+    kept = result["order"][result["keep"]][:max_detections]
+
+    predictions = []
+    for index in kept:
+        x1, y1, x2, y2 = (float(v) for v in boxes[index])
+        class_id = int(class_ids[candidates[index]])
+        predictions.append({
+            "x": (x1 + x2) / 2,
+            "y": (y1 + y2) / 2,
+            "width": x2 - x1,
+            "height": y2 - y1,
+            "confidence": float(confidences[candidates[index]]),
+            "class": class_names[class_id] if class_id < len(class_names) else str(class_id),
+            "class_id": class_id
+        })
+    return predictions
@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+# Read .env here too (config.py does the same later), so it can set the
+# worker settings below and the defaults derived from them
+load_dotenv()
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Import and warm the app once in the master, then fork
+preload_app = True
+
+# Run one pool per APP_ROLE so heavy manual calculations never queue in front
+# of cheap JSON routes, e.g.
+#   APP_ROLE=api    gunicorn -c gunicorn.conf.py --bind 0.0.0.0:5001
+#   APP_ROLE=vision gunicorn -c gunicorn.conf.py --bind 0.0.0.0:5002
+# with the reverse proxy sending /api/admin/manual-calculation and /api/detect/video
+# to the vision pool
+role = os.environ.get('APP_ROLE', 'all')
+if role == 'vision':
+    # CPU-bound: one single-threaded worker per core
+    default_workers, default_threads = multiprocessing.cpu_count(), 1
+else:
+    default_workers, default_threads = multiprocessing.cpu_count() * 2 + 1, 4
+
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers))
+# A memory:// event broker only reaches dashboard streams on the worker that
+# wrote the detection, so several workers share events through a file in the
+# app's instance folder instead (written only while a dashboard is open).
+# Set before the app is preloaded, since config.py reads it at import
+if workers > 1 and not os.environ.get('EVENT_BROKER_URI'):
+    os.environ['EVENT_BROKER_URI'] = 'sqlite:///events.db'
+# Each open admin dashboard stream holds one thread for up to ADMIN_STREAM_MAX_SECONDS,
+# and a worker keeps at most ADMIN_STREAM_MAX_PER_WORKER (default 1) of them open, so
+# at least threads - 1 threads per worker stay free for other requests
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', default_threads))
+# Manual calculation plus an upstream inference can take several seconds
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def when_ready(server):
+    if server.cfg.workers > 1 and os.environ.get('EVENT_BROKER_URI') == 'memory://':
+        server.log.warning(
+            "EVENT_BROKER_URI is memory:// with %d workers: each admin dashboard stream "
+            "only sees detections written by its own worker, so its counters drift "
+            "from the real totals; use sqlite:///path instead", server.cfg.workers
+        )
+
+def post_fork(server, worker):
+    # Connections opened in the master during warmup must not be shared
+    # between processes; each worker opens its own pool on first use
+    from wsgi import app
+    from infrastructure.database import db
+    
+    with app.app_context():
+        db.engine.dispose(close=False)
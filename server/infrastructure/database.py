@@ -1,11 +1,39 @@
+import random
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
+from sqlalchemy.exc import IntegrityError
 
 db = SQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
 
+# Rows a counter bumped by every request is spread over; readers sum them
+COUNTER_SHARDS = 16
+
+def bump_counter(model, key, **increments):
+    """
+    Atomically add `increments` to the columns of the `model` row whose primary
+    key is `key`, creating the row on first use; runs in the caller's transaction
+    """
+    values = {getattr(model, column): getattr(model, column) + amount for column, amount in increments.items()}
+    query = model.query.filter_by(**key)
+    if query.update(values, synchronize_session=False):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(model(**key, **increments))
+    except IntegrityError:
+        # Another worker created the row in the meantime
+        query.update(values, synchronize_session=False)
+
+def counter_shard():
+    """
+    Random shard for a counter every request bumps, so concurrent transactions
+    lock different rows instead of queueing on one until commit
+    """
+    return random.randrange(COUNTER_SHARDS)
+
 def init_app(app):
     db.init_app(app)
     migrate.init_app(app, db)
@@ -0,0 +1,237 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+class Subscription:
+    """
+    One listener's queue of (event_id, event_type, data) tuples.
+
+    A listener that falls `max_pending` events behind is marked overflowed
+    and receives nothing more; it should drop the subscription and resync.
+    """
+
+    def __init__(self, broker, max_pending=256):
+        self._broker = broker
+        self._events = queue.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def deliver(self, event):
+        if self.overflowed:
+            return
+        try:
+            self._events.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout=None):
+        """Next event, or None when none arrived within `timeout` seconds"""
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class InMemoryEventBroker:
+    """Events fanned out to the subscribers of the current process (one feed per worker)"""
+
+    def __init__(self, max_pending=256):
+        self.max_pending = max_pending
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = (self._next_id, event_type, data)
+            self._next_id += 1
+        self.deliver(event)
+
+    def deliver(self, event):
+        """Hand an already numbered event to every current subscriber"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+class SqliteEventBroker:
+    """
+    Events shared between worker processes through a SQLite file.
+
+    Local stand-in for Redis pub/sub: publishers append rows to an events
+    table and one poller thread per process reads the new rows and fans them
+    out to that process's subscribers, so the database sees one poll per
+    worker however many listeners are connected. Rows older than `retention`
+    seconds are pruned as new events are written.
+
+    Nothing is written while nobody listens: each running poller keeps a
+    heartbeat row in a listeners table, publishers check it at most every
+    `listener_check_interval` seconds and drop events when it is stale, and
+    a poller stops once its process has no subscribers left.
+    """
+
+    def __init__(self, path, poll_interval=0.5, retention=300, max_pending=256, listener_check_interval=1.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.listener_check_interval = listener_check_interval
+        self._fanout = InMemoryEventBroker(max_pending)
+        self._local = threading.local()
+        self._poller = None
+        self._poller_pid = None
+        self._poller_lock = threading.Lock()
+        # (checked_at, any listener) cached for listener_check_interval
+        self._listeners_checked = (0.0, False)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Use a throwaway connection so nothing is inherited by forked workers
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, event_type TEXT NOT NULL, "
+                "data TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS listeners (pid INTEGER PRIMARY KEY, seen_at REAL NOT NULL)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def _has_listeners(self, now):
+        checked_at, active = self._listeners_checked
+        if now - checked_at >= self.listener_check_interval:
+            active = self._connection().execute(
+                "SELECT 1 FROM listeners WHERE seen_at > ? LIMIT 1", (now - self._listener_timeout(),)
+            ).fetchone() is not None
+            self._listeners_checked = (now, active)
+        return active
+
+    def _listener_timeout(self):
+        # A poller beats every poll_interval; a few missed beats mean it is gone
+        return max(5 * self.poll_interval, 2 * self.listener_check_interval)
+
+    def publish(self, event_type, data):
+        now = time.time()
+        if not self._has_listeners(now):
+            return
+        conn = self._connection()
+        cursor = conn.execute(
+            "INSERT INTO events (event_type, data, created_at) VALUES (?, ?, ?)",
+            (event_type, json.dumps(data), now)
+        )
+        if cursor.lastrowid % 100 == 0:
+            conn.execute("DELETE FROM events WHERE created_at < ?", (now - self.retention,))
+        conn.commit()
+
+    def subscribe(self):
+        # Subscribed before the poller starts, so it does not stop right away
+        subscription = self._fanout.subscribe()
+        try:
+            self._ensure_poller()
+        except Exception:
+            subscription.close()
+            raise
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._fanout.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        return self._fanout.subscriber_count()
+
+    def _ensure_poller(self):
+        # Threads do not survive fork, so each worker starts its own
+        with self._poller_lock:
+            if self._poller is not None and self._poller_pid == os.getpid() and self._poller.is_alive():
+                return
+            # Handed to the poller thread, which is its only user from then on
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+            others_listening = self._beat(conn)
+            self._poller = threading.Thread(target=self._poll, args=(conn, last_id),
+                                            name='event-broker-poller', daemon=True)
+            self._poller_pid = os.getpid()
+            self._poller.start()
+        if not others_listening:
+            # Publishers may have cached "no listeners" just before the beat; once
+            # this passes they have all seen it, so the caller's snapshot misses nothing
+            time.sleep(self.listener_check_interval)
+
+    def _beat(self, conn):
+        """Record this process as listening; returns whether another process already was"""
+        now = time.time()
+        pid = os.getpid()
+        others = conn.execute(
+            "SELECT 1 FROM listeners WHERE pid != ? AND seen_at > ? LIMIT 1", (pid, now - self._listener_timeout())
+        ).fetchone() is not None
+        conn.execute("INSERT OR REPLACE INTO listeners (pid, seen_at) VALUES (?, ?)", (pid, now))
+        conn.commit()
+        return others
+
+    def _poll(self, conn, last_id):
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                with self._poller_lock:
+                    if self._fanout.subscriber_count() == 0:
+                        conn.execute("DELETE FROM listeners WHERE pid = ?", (os.getpid(),))
+                        conn.commit()
+                        self._poller = None
+                        return
+                self._beat(conn)
+                rows = conn.execute(
+                    "SELECT id, event_type, data FROM events WHERE id > ? ORDER BY id", (last_id,)
+                ).fetchall()
+                for event_id, event_type, data in rows:
+                    self._fanout.deliver((event_id, event_type, json.loads(data)))
+                    last_id = event_id
+        finally:
+            conn.close()
+
+
+def create_event_broker(uri, base_dir=None):
+    """
+    Build an event broker from a URI.
+
+    Supported URIs:
+        memory://              listeners only see events published by their own worker
+        sqlite:///path/to.db   events published by any worker on the host (a relative
+                               path is taken from base_dir, e.g. the app's instance folder)
+    """
+    if not uri or uri == 'memory://':
+        return InMemoryEventBroker()
+    if uri.startswith('sqlite:///'):
+        return SqliteEventBroker(os.path.join(base_dir or '', uri[len('sqlite:///'):]))
+
+    raise ValueError(f"Unsupported event broker URI: {uri}")
@@ -0,0 +1,19 @@
+import os
+from infrastructure.external.local_inference_client import LocalInferenceClient
+from infrastructure.external.roboflow_client import RoboflowClient
+
+
+def create_inference_client():
+    """
+    The detection backend for this process, chosen by INFERENCE_BACKEND:
+
+        roboflow   hosted (or self-hosted) inference API, the default
+        local      exported ONNX model run by ONNX Runtime on this machine
+    """
+    backend = os.environ.get('INFERENCE_BACKEND', 'roboflow')
+    if backend == 'roboflow':
+        return RoboflowClient()
+    if backend == 'local':
+        return LocalInferenceClient()
+
+    raise ValueError(f"Unsupported INFERENCE_BACKEND: {backend}")
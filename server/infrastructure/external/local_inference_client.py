@@ -0,0 +1,189 @@
+import ast
+import asyncio
+import os
+import threading
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PRECISIONS = ('fp32', 'int8')
+
+
+def quantized_model_path(model_path):
+    """Where quantize_model.py writes the INT8 variant of `model_path`"""
+    stem, extension = os.path.splitext(model_path)
+    return f"{stem}.int8{extension or '.onnx'}"
+
+
+class LocalInferenceClient:
+    """
+    Runs the exported YOLOv8 flag model on this machine with ONNX Runtime.
+
+    Same interface as RoboflowClient (detect_flag, detect_flags,
+    detect_flag_async, model_id) and the same response shape, so the
+    services don't care which one they were given. Selected with
+    INFERENCE_BACKEND=local; onnxruntime is only needed in that case.
+    """
+
+    def __init__(self, model_path=None, precision=None, intra_op_threads=None, inter_op_threads=None):
+        """Arguments left as None are read from the environment"""
+        self.precision = precision or os.environ.get('LOCAL_MODEL_PRECISION', 'fp32')
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"LOCAL_MODEL_PRECISION must be one of {', '.join(PRECISIONS)}")
+        self.model_path = model_path or self._default_model_path(self.precision)
+
+        # Threads per worker process; 0 lets ONNX Runtime use one per physical core,
+        # which oversubscribes the CPU when several workers share a node
+        self.intra_op_threads = intra_op_threads if intra_op_threads is not None \
+            else int(os.environ.get('INFERENCE_INTRA_OP_THREADS', 0))
+        self.inter_op_threads = inter_op_threads if inter_op_threads is not None \
+            else int(os.environ.get('INFERENCE_INTER_OP_THREADS', 0))
+        # Idle intra-op threads busy-wait for work by default; turn off when workers share cores
+        self.allow_spinning = os.environ.get('INFERENCE_ALLOW_SPINNING', 'true').lower() == 'true'
+
+        # Defaults of the hosted API, so local and remote predictions are comparable
+        self.confidence_threshold = float(os.environ.get('LOCAL_MODEL_CONFIDENCE', 0.4))
+        self.iou_threshold = float(os.environ.get('LOCAL_MODEL_OVERLAP', 0.3))
+        self.input_size = int(os.environ.get('LOCAL_MODEL_INPUT_SIZE', 640))
+        classes = os.environ.get('LOCAL_MODEL_CLASSES')
+        self.class_names = [c.strip() for c in classes.split(',')] if classes else None
+
+        self.model_id = f"local:{os.path.basename(self.model_path)}"
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_model_path(precision):
+        model_path = os.environ.get('LOCAL_MODEL_PATH', os.path.join(SERVER_DIR, 'models', 'flag_yolov8n.onnx'))
+        if precision == 'int8':
+            # Written by quantize_model.py next to the fp32 model
+            return os.environ.get('LOCAL_MODEL_INT8_PATH', quantized_model_path(model_path))
+        return model_path
+
+    @property
+    def client(self):
+        """
+        The onnxruntime InferenceSession, created on first use in each process.
+
+        Session thread pools don't survive a fork, so a session loaded by the
+        preloading master is rebuilt in each worker.
+        """
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                self._session = self._create_session()
+                self._session_pid = os.getpid()
+            return self._session
+
+    def _create_session(self):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("INFERENCE_BACKEND=local requires onnxruntime (pip install onnxruntime)")
+
+        if not os.path.exists(self.model_path):
+            raise RuntimeError(f"Model file not found: {self.model_path}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        if self.inter_op_threads > 1:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        if not self.allow_spinning:
+            options.add_session_config_entry('session.intra_op.allow_spinning', '0')
+
+        session = ort.InferenceSession(self.model_path, sess_options=options,
+                                       providers=['CPUExecutionProvider'])
+
+        if self.class_names is None:
+            # Ultralytics exports store {index: name} in the model metadata
+            names = session.get_modelmeta().custom_metadata_map.get('names')
+            self.class_names = self._parse_class_names(names)
+        return session
+
+    @staticmethod
+    def _parse_class_names(names):
+        if names:
+            mapping = ast.literal_eval(names)
+            return [mapping[i] for i in sorted(mapping)]
+
+        # Roboflow exports keep classes in alphabetical order
+        from domain.flag_registry import FLAG_DISPLAY_NAMES
+        return sorted(FLAG_DISPLAY_NAMES)
+
+    def _load(self, image):
+        import cv2
+
+        if isinstance(image, (str, os.PathLike)):
+            loaded = cv2.imread(os.fspath(image), cv2.IMREAD_COLOR)
+            if loaded is None:
+                raise ValueError(f"Could not read image: {image}")
+            return loaded
+        return image
+
+    def detect_flag(self, image_path):
+        """
+        Detect flag in the given image with the local model
+
+        Args:
+            image_path: Path to the image file or decoded BGR image (NumPy array)
+
+        Returns:
+            dict: Response in the Roboflow API format
+        """
+        return self.detect_flags([image_path])[0]
+
+    def detect_flags(self, images):
+        """
+        Detect flags in several images with batched forward passes
+
+        Args:
+            images: List of image paths or decoded BGR images
+
+        Returns:
+            list: One response per image, in input order
+        """
+        import numpy as np
+        from domain.vision.yolo import decode_yolov8, letterbox
+
+        session = self.client
+        input_meta = session.get_inputs()[0]
+        # Models exported with a fixed batch dimension run one image per call
+        fixed_batch = input_meta.shape[0]
+        batch_limit = fixed_batch if isinstance(fixed_batch, int) and fixed_batch > 0 else max(1, len(images))
+
+        loaded = [self._load(image) for image in images]
+        prepared = [letterbox(image, self.input_size) for image in loaded]
+
+        responses = []
+        for start in range(0, len(prepared), batch_limit):
+            chunk = prepared[start:start + batch_limit]
+            started = time.perf_counter()
+            outputs = session.run(None, {input_meta.name: np.stack([tensor for tensor, _, _ in chunk])})[0]
+            elapsed = (time.perf_counter() - started) / len(chunk)
+
+            for offset, (output, (_, scale, padding)) in enumerate(zip(outputs, chunk)):
+                height, width = loaded[start + offset].shape[:2]
+                responses.append({
+                    "time": elapsed,
+                    "image": {"width": width, "height": height},
+                    "predictions": decode_yolov8(
+                        output, self.class_names, scale, padding, (width, height),
+                        confidence_threshold=self.confidence_threshold,
+                        iou_threshold=self.iou_threshold
+                    )
+                })
+        return responses
+
+    async def detect_flag_async(self, image):
+        """
+        Detect flag without blocking the event loop (ONNX Runtime releases the GIL)
+
+        Args:
+            image: Path to the image file or decoded image (NumPy array)
+
+        Returns:
+            dict: Response in the Roboflow API format
+        """
+        return await asyncio.to_thread(self.detect_flag, image)
+
@@ -1,11 +1,30 @@
-from inference_sdk import InferenceHTTPClient
+import os
 
 class RoboflowClient:
     def __init__(self):
-        self.client = InferenceHTTPClient(
-            api_url="https://serverless.roboflow.com",
-            api_key="NyScm6U7q8NSjb6mo9ZC"
-        )
+        # The URL can point at a self-hosted server or a local stub for load tests
+        self.api_url = os.environ.get('ROBOFLOW_API_URL', "https://serverless.roboflow.com")
+        self.api_key = os.environ.get('ROBOFLOW_API_KEY', "NyScm6U7q8NSjb6mo9ZC")
+        self.model_id = os.environ.get('ROBOFLOW_MODEL_ID', "flag_project-d3hjr/15")
+        self._client = None
+    
+    @property
+    def client(self):
+        """
+        The underlying InferenceHTTPClient, created on first use.
+        
+        inference_sdk pulls in cv2, numpy and supervision, so it is only imported
+        once a worker actually runs an inference.
+        """
+        if self._client is None:
+            from inference_sdk import InferenceHTTPClient
+            
+            # v0 is the protocol spoken by the serverless endpoint, so pin it for all URLs
+            self._client = InferenceHTTPClient(
+                api_url=self.api_url,
+                api_key=self.api_key
+            ).select_api_v0()
+        return self._client
     
     def detect_flag(self, image_path):
         """
@@ -17,4 +36,30 @@ class RoboflowClient:
         Returns:
             dict: Roboflow API response
         """
-        return self.client.infer(image_path, model_id="flag_project-d3hjr/15")
\ No newline at end of file
+        return self.client.infer(image_path, model_id=self.model_id)
+    
+    def detect_flags(self, images):
+        """
+        Detect flags in several images with one client call
+        
+        Args:
+            images: List of image paths or decoded images (NumPy arrays)
+            
+        Returns:
+            list: One Roboflow API response per image, in input order
+        """
+        results = self.client.infer(list(images), model_id=self.model_id)
+        # The SDK unwraps single-element lists into a bare response
+        return results if isinstance(results, list) else [results]
+    
+    async def detect_flag_async(self, image):
+        """
+        Detect flag without blocking the event loop
+        
+        Args:
+            image: Path to the image file or decoded image (NumPy array)
+            
+        Returns:
+            dict: Roboflow API response
+        """
+        return await self.client.infer_async(image, model_id=self.model_id)
@@ -0,0 +1,46 @@
+import os
+import zipfile
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def _is_image_name(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS) and not os.path.basename(name).startswith('.')
+
+
+def iter_image_directory(path):
+    """Yield (relative path, bytes) for every image under `path`, in sorted order, one file at a time"""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if _is_image_name(name):
+                full_path = os.path.join(root, name)
+                with open(full_path, 'rb') as f:
+                    yield os.path.relpath(full_path, path), f.read()
+
+
+def zip_image_names(archive):
+    """Image member names of an open ZipFile, in archive order"""
+    return [info.filename for info in archive.infolist() if not info.is_dir() and _is_image_name(info.filename)]
+
+
+def iter_image_zip(file):
+    """Yield (member name, bytes) for every image in a zip archive path or seekable file object"""
+    with zipfile.ZipFile(file) as archive:
+        for name in zip_image_names(archive):
+            yield name, archive.read(name)
+
+
+def count_images(source):
+    """Number of images a directory or zip source (path or file object) will yield"""
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        return sum(1 for root, _, files in os.walk(source) for name in files if _is_image_name(name))
+    with zipfile.ZipFile(source) as archive:
+        return len(zip_image_names(archive))
+
+
+def iter_images(source):
+    """Yield (name, bytes) from a directory path or a zip archive (path or file object)"""
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        return iter_image_directory(source)
+    return iter_image_zip(source)
@@ -0,0 +1,112 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a batched inference function.
+
+    Callers submit one item each; worker threads take the first waiting
+    item, keep collecting until `max_batch_size` items are gathered or
+    `max_latency_ms` has passed since that first item, then make a single
+    run_batch(items) call and hand each caller its own result.
+
+    run_batch must return one result per item, in order. An exception fails
+    every caller in that batch.
+
+    Worker threads are started on first submit and again after a fork, so a
+    batcher created at import time is safe to use in pre-forked workers.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_latency_ms=10, workers=1):
+        if max_batch_size < 1 or workers < 1:
+            raise ValueError("max_batch_size and workers must be at least 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.workers = workers
+        self._queue = None
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._full_batches = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads don't survive a fork, so start a fresh queue and workers per process
+            self._queue = queue.Queue()
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"micro-batcher-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, item):
+        """Queue one item, returning a Future of its result"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def run(self, item, timeout=None):
+        """Submit one item and block until its result is ready"""
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        """Block for the first item, then gather more until the batch is full or the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_latency
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            # Skip callers that cancelled while waiting in the queue
+            pending = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            items = [item for item, _ in pending]
+            futures = [future for _, future in pending]
+
+            try:
+                results = self.run_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"run_batch returned {len(results)} results for {len(items)} items")
+            except BaseException as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(items)
+                self._full_batches += len(items) == self.max_batch_size
+
+    def stats(self):
+        """Batch counters since startup, for this process"""
+        with self._lock:
+            return {
+                'batches': self._batches,
+                'items': self._items,
+                'mean_batch_size': round(self._items / self._batches, 2) if self._batches else 0.0,
+                'full_batches': self._full_batches,
+                'queued': self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0
+            }
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def prediction_cache_key(model_id, image_bytes):
+    """Cache key of an inference result: the model plus a digest of the exact image bytes"""
+    return f"{model_id}:{hashlib.sha256(image_bytes).hexdigest()}"
+
+
+class InMemoryPredictionCache:
+    """Most recently used inference results kept in the current process"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def set(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SqlitePredictionCache:
+    """
+    Inference results persisted in a SQLite file, so repeated audit runs over
+    the same images don't call the inference API again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Use a throwaway connection so nothing is inherited by forked workers
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute("SELECT result FROM predictions WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, result):
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO predictions (key, result) VALUES (?, ?)", (key, json.dumps(result)))
+        conn.commit()
+
+
+def create_prediction_cache(uri):
+    """
+    Build a prediction cache from a URI.
+
+    Supported URIs:
+        memory://              per-process LRU of recent results
+        sqlite:///path/to.db   results shared by all workers and CLI runs on the host
+    """
+    if not uri or uri == 'memory://':
+        return InMemoryPredictionCache()
+    if uri.startswith('sqlite:///'):
+        return SqlitePredictionCache(uri[len('sqlite:///'):])
+
+    raise ValueError(f"Unsupported prediction cache URI: {uri}")
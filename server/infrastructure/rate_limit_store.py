@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+def _refill(tokens, updated_at, capacity, refill_rate, now):
+    """Return the token count of a bucket after refilling it up to `now`"""
+    elapsed = max(0.0, now - updated_at)
+    return min(capacity, tokens + elapsed * refill_rate)
+
+
+def _take(tokens, capacity, refill_rate, cost):
+    """
+    Try to take `cost` tokens from a bucket holding `tokens`.
+
+    Returns:
+        tuple: (allowed, tokens_left, retry_after_seconds)
+    """
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+
+    retry_after = (cost - tokens) / refill_rate if refill_rate > 0 else float('inf')
+    return False, tokens, retry_after
+
+
+class InMemoryRateLimitStore:
+    """Token buckets kept in the current process (one set per worker)"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, cost=1, now=None):
+        """
+        Take `cost` tokens from the bucket identified by `key`
+
+        Returns:
+            tuple: (allowed, tokens_left, retry_after_seconds)
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, capacity, refill_rate, now)
+            allowed, tokens, retry_after = _take(tokens, capacity, refill_rate, cost)
+            self._buckets[key] = (tokens, now)
+
+        return allowed, tokens, retry_after
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SqliteRateLimitStore:
+    """
+    Token buckets shared between worker processes through a SQLite file.
+
+    Local stand-in for a Redis backend: every consume runs in a single
+    `BEGIN IMMEDIATE` transaction, so the read-refill-write cycle is atomic
+    across processes the same way a Redis Lua script would be.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # With gunicorn's preload_app the store is built in the master before the
+        # workers fork, so the schema is set up on a throwaway connection that no
+        # worker inherits (a SQLite connection must not cross a fork); WAL mode is
+        # stored in the file, so the per-thread connections no longer set it
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None lets us issue BEGIN IMMEDIATE ourselves
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, capacity, refill_rate, cost=1, now=None):
+        """
+        Take `cost` tokens from the bucket identified by `key`
+
+        Returns:
+            tuple: (allowed, tokens_left, retry_after_seconds)
+        """
+        now = time.time() if now is None else now
+        conn = self._connection()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (capacity, now)
+
+            tokens = _refill(tokens, updated_at, capacity, refill_rate, now)
+            allowed, tokens, retry_after = _take(tokens, capacity, refill_rate, cost)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return allowed, tokens, retry_after
+
+    def reset(self):
+        self._connection().execute("DELETE FROM rate_limit_buckets")
+
+
+def create_rate_limit_store(uri):
+    """
+    Build a rate limit store from a URI.
+
+    Supported URIs:
+        memory://              per-process buckets
+        sqlite:///path/to.db   buckets shared by all workers on the host
+    """
+    if not uri or uri == 'memory://':
+        return InMemoryRateLimitStore()
+    if uri.startswith('sqlite:///'):
+        return SqliteRateLimitStore(uri[len('sqlite:///'):])
+
+    raise ValueError(f"Unsupported rate limit storage URI: {uri}")
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one execution.
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    while it is still in flight wait for it and receive the same result, or
+    the same exception. Nothing is kept once the call finishes, so this only
+    deduplicates overlapping requests (see prediction_cache for reuse over time).
+
+    Threads (WSGI workers) and coroutines (the ASGI route) are tracked
+    separately, each event loop with its own set of in-flight calls.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Run fn() unless a call for `key` is already in flight, then wait for that one.
+
+        Returns:
+            tuple: (result, shared) where shared is True when the result came
+            from another caller's execution
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def do_async(self, key, coroutine_fn):
+        """
+        Await coroutine_fn() unless a call for `key` is already in flight on this
+        event loop, then await that one instead.
+
+        Returns:
+            tuple: (result, shared)
+        """
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+
+        task = calls.get(key)
+        if task is not None:
+            with self._lock:
+                self._coalesced += 1
+            # shield() so a follower's disconnect doesn't cancel the shared call
+            return await asyncio.shield(task), True
+
+        with self._lock:
+            self._leaders += 1
+        task = calls[key] = loop.create_task(coroutine_fn())
+        task.add_done_callback(lambda _: calls.pop(key, None))
+        return await asyncio.shield(task), False
+
+    def stats(self):
+        """Counters since startup, for this process"""
+        with self._lock:
+            total = self._leaders + self._coalesced
+            return {
+                'in_flight': len(self._calls) + sum(len(c) for c in self._async_calls.values()),
+                'executions': self._leaders,
+                'coalesced': self._coalesced,
+                'coalesced_ratio': round(self._coalesced / total, 4) if total else 0.0
+            }
@@ -0,0 +1,159 @@
+import abc
+import json
+import os
+import queue
+import threading
+import urllib.request
+from collections import deque
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+# OTLP span kinds
+_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+
+
+def encode_otlp(spans, service_name):
+    """OTLP/JSON ExportTraceServiceRequest for a batch of finished spans"""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [_attribute('service.name', service_name)]},
+            'scopeSpans': [{
+                'scope': {'name': 'flag-detection'},
+                'spans': [
+                    {
+                        'traceId': span.trace_id,
+                        'spanId': span.span_id,
+                        'parentSpanId': span.parent_id or '',
+                        'name': span.name,
+                        'kind': _KINDS.get(span.kind, 1),
+                        'startTimeUnixNano': str(span.start_ns),
+                        'endTimeUnixNano': str(span.end_ns),
+                        'attributes': [_attribute(k, v) for k, v in span.attributes.items()],
+                        'status': {'code': 2, 'message': span.error} if span.error else {'code': 1}
+                    }
+                    for span in spans
+                ]
+            }]
+        }]
+    }
+
+
+class BatchSpanExporter(abc.ABC):
+    """
+    Queues finished spans and writes them in batches from a background thread,
+    so exporting never blocks a request; spans arriving while the queue is
+    full are dropped and counted. Subclasses implement write().
+    """
+
+    def __init__(self, service_name, max_queue=2048, max_batch=256, flush_interval=2.0):
+        self.service_name = service_name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._thread_pid = None
+        self._thread_lock = threading.Lock()
+
+    def export(self, span):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self):
+        # Threads do not survive fork, so each worker starts its own
+        if self._thread_pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                pass
+            try:
+                self.write(encode_otlp(batch, self.service_name))
+            except Exception:
+                # A collector outage loses those spans, never the request
+                self.dropped += len(batch)
+
+    @abc.abstractmethod
+    def write(self, payload):
+        """Send one OTLP/JSON request; called from the exporter thread only"""
+
+
+class FileSpanExporter(BatchSpanExporter):
+    """One OTLP/JSON request per line, e.g. for `otelcol`'s filereceiver or offline inspection"""
+
+    def __init__(self, path, service_name, **kwargs):
+        super().__init__(service_name, **kwargs)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(self, payload):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(payload, separators=(',', ':')) + '\n')
+
+
+class OtlpHttpSpanExporter(BatchSpanExporter):
+    """POSTs OTLP/JSON to a collector's /v1/traces endpoint"""
+
+    def __init__(self, url, service_name, timeout=5, **kwargs):
+        super().__init__(service_name, **kwargs)
+        self.url = url
+        self.timeout = timeout
+
+    def write(self, payload):
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        req = urllib.request.Request(self.url, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+class InMemorySpanExporter:
+    """Keeps the last `max_spans` finished spans of this process (development and debugging)"""
+
+    def __init__(self, service_name, max_spans=1000):
+        self.service_name = service_name
+        self.dropped = 0
+        self.spans = deque(maxlen=max_spans)
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+def create_span_exporter(uri, service_name):
+    """
+    Build a span exporter from a URI.
+
+    Supported URIs:
+        memory://                    last spans kept in the process
+        file://path/to/traces.jsonl  OTLP/JSON lines appended to a local file
+        http://host:4318/v1/traces   OTLP/HTTP (JSON) collector
+    """
+    if not uri or uri == 'memory://':
+        return InMemorySpanExporter(service_name)
+    if uri.startswith('file://'):
+        return FileSpanExporter(uri[len('file://'):], service_name)
+    if uri.startswith(('http://', 'https://')):
+        return OtlpHttpSpanExporter(uri, service_name)
+
+    raise ValueError(f"Unsupported trace exporter URI: {uri}")
@@ -1,9 +1,15 @@
-from flask import Blueprint, request, jsonify
+import threading
+import time
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_login import login_required
+from core.events import event_bus
+from core.http_cache import is_not_modified, not_modified, version_etag, with_version_etag
 from core.security import admin_required
+from core.serialization import dumps
 from domain.services.admin_service import AdminService
+from domain.services.drift_monitor_service import DriftMonitorService
 from presentation.schemas.user_schema import user_to_dict
-from presentation.schemas.detection_schema import detection_log_to_dict
+from presentation.schemas.detection_schema import detection_log_to_dict, detection_to_dict
 from core.exceptions import ApiError, ValidationError
 
 admin_bp = Blueprint('admin', __name__)
@@ -13,24 +19,113 @@ admin_bp = Blueprint('admin', __name__)
 @admin_required
 def admin_dashboard():
     try:
-        data = AdminService.get_dashboard_data()
-        
-        # Format recent detections for response
-        recent_data = [
-            detection_log_to_dict(log) for log in data['recent_detections']
-        ]
-        
-        return jsonify({
-            'total_users': data['total_users'],
-            'total_detections': data['total_detections'],
-            'recent_detections': recent_data
-        }), 200
+        return jsonify(_dashboard_payload()), 200
         
     except ApiError as e:
         return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
+def _dashboard_payload():
+    data = AdminService.get_dashboard_data()
+    
+    # Format recent detections for response
+    recent_data = [
+        detection_log_to_dict(log) for log in data['recent_detections']
+    ]
+    
+    return {
+        'total_users': data['total_users'],
+        'total_detections': data['total_detections'],
+        'recent_detections': recent_data
+    }
+
+def _sse(event_type, data):
+    return b"event: " + event_type.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+# Dashboard streams held open by this worker, each on one of its threads
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
+def _acquire_stream_slot(limit):
+    global _open_streams
+    with _open_streams_lock:
+        if _open_streams >= limit:
+            return False
+        _open_streams += 1
+        return True
+
+def _release_stream_slot():
+    global _open_streams
+    with _open_streams_lock:
+        _open_streams -= 1
+
+@admin_bp.route('/api/admin/dashboard/stream', methods=['GET'])
+@login_required
+@admin_required
+def admin_dashboard_stream():
+    """
+    Server-sent events feed for the dashboard.
+
+    Sends the dashboard data once ('snapshot'), then pushes every detection
+    log as it is written ('detection', with the counter increments) and new
+    user counts ('counters'), so open dashboards cost no queries after they
+    connect. The stream ends after ADMIN_STREAM_MAX_SECONDS, or when the
+    client falls too far behind, and EventSource reconnects with a fresh snapshot.
+
+    A stream holds a worker thread while open, so each worker keeps at most
+    ADMIN_STREAM_MAX_PER_WORKER open; past that, the response is the snapshot
+    alone and the browser reconnects after ADMIN_STREAM_POLL_SECONDS, polling
+    without holding a thread.
+    """
+    config = current_app.config
+    heartbeat = config.get('ADMIN_STREAM_HEARTBEAT_SECONDS', 15)
+    max_seconds = config.get('ADMIN_STREAM_MAX_SECONDS', 300)
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    
+    if not _acquire_stream_slot(config.get('ADMIN_STREAM_MAX_PER_WORKER', 1)):
+        try:
+            snapshot = _dashboard_payload()
+        except Exception as e:
+            return jsonify({'error': 'An unexpected error occurred'}), 500
+        retry_ms = int(config.get('ADMIN_STREAM_POLL_SECONDS', 30) * 1000)
+        body = f"retry: {retry_ms}\n".encode() + _sse('snapshot', snapshot)
+        return Response(body, mimetype='text/event-stream', headers=headers), 200
+    
+    # Subscribe before reading the snapshot so nothing written in between is missed
+    subscription = event_bus.subscribe()
+    def close():
+        subscription.close()
+        _release_stream_slot()
+    
+    try:
+        snapshot = _dashboard_payload()
+    except Exception as e:
+        close()
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+    # Detections already counted in the snapshot are skipped
+    seen_id = max((log['id'] for log in snapshot['recent_detections']), default=0)
+    
+    # Not wrapped in stream_with_context: the request context (and its database
+    # session) is released as soon as the view returns instead of being held open
+    def generate():
+        yield b"retry: 3000\n" + _sse('snapshot', snapshot)
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline and not subscription.overflowed:
+            event = subscription.get(timeout=heartbeat)
+            if event is None:
+                yield b": keep-alive\n\n"
+                continue
+            _, event_type, data = event
+            if event_type == 'detection' and data['log']['id'] <= seen_id:
+                continue
+            yield _sse(event_type, data)
+    
+    response = Response(generate(), mimetype='text/event-stream', headers=headers)
+    # Runs when the server closes the response, even if the stream never started
+    response.call_on_close(close)
+    return response, 200
+
 @admin_bp.route('/api/admin/detection-logs', methods=['GET'])
 @login_required
 @admin_required
@@ -39,15 +134,37 @@ def get_detection_logs():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
+        last_id, total, labels = AdminService.get_detection_logs_version()
+        etag = version_etag('logs', last_id, total, labels, page, per_page)
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
         logs = AdminService.get_detection_logs(page, per_page)
         
         log_data = [detection_log_to_dict(log) for log in logs.items]
         
-        return jsonify({
+        return with_version_etag(jsonify({
             'logs': log_data,
             'total': logs.total,
             'pages': logs.pages,
             'current_page': logs.page
+        }), etag), 200
+        
+    except ApiError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+@admin_bp.route('/api/admin/detection-logs/<int:log_id>/detections', methods=['GET'])
+@login_required
+@admin_required
+def get_log_detections(log_id):
+    try:
+        log = AdminService.get_detection_log(log_id)
+        
+        return jsonify({
+            'log': detection_log_to_dict(log),
+            'detections': [detection_to_dict(d) for d in log.detections]
         }), 200
         
     except ApiError as e:
@@ -55,6 +172,49 @@ def get_detection_logs():
     except Exception as e:
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
+@admin_bp.route('/api/admin/detections/by-class', methods=['GET'])
+@login_required
+@admin_required
+def get_detections_by_class():
+    try:
+        # Optional window in days; all time when omitted
+        days = request.args.get('days', None, type=int)
+        
+        classes = AdminService.get_detections_by_class(days)
+        
+        return jsonify({
+            'classes': classes,
+            'total_detections': sum(c['count'] for c in classes),
+            'days': days
+        }), 200
+        
+    except ApiError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+@admin_bp.route('/api/admin/drift', methods=['GET'])
+@login_required
+@admin_required
+def get_drift_report():
+    try:
+        config = current_app.config
+        report = DriftMonitorService.get_report(
+            window_hours=request.args.get('window_hours', config.get('DRIFT_WINDOW_HOURS', 24), type=int),
+            baseline_days=request.args.get('baseline_days', config.get('DRIFT_BASELINE_DAYS', 7), type=int),
+            trend_windows=min(request.args.get('trend', 14, type=int), 90),
+            psi_warning=config.get('DRIFT_PSI_WARNING', 0.1),
+            psi_alert=config.get('DRIFT_PSI_ALERT', 0.25),
+            min_samples=config.get('DRIFT_MIN_SAMPLES', 200)
+        )
+        
+        return jsonify(report), 200
+        
+    except ApiError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
 @admin_bp.route('/api/admin/users', methods=['GET'])
 @login_required
 @admin_required
@@ -0,0 +1,144 @@
+import asyncio
+import cv2
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from core.exceptions import ApiError, RateLimitError, ValidationError
+from core.rate_limit import rate_limiter, client_key, check_daily_quota
+from core.tracing import tracer
+from presentation.api.detection_routes import detection_service
+
+
+def _decode_image(image_bytes):
+    """Decode upload bytes to a BGR image (runs in a worker thread, cv2 releases the GIL)"""
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValidationError("Failed to decode image")
+    return img
+
+
+def build_async_detection_routes(flask_app):
+    """
+    Build the async /api/detect route for the ASGI server.
+
+    The request is handled on the event loop while the upstream inference is
+    awaited, so in-flight detections don't hold a thread each. Blocking work
+    (session lookup, quota count, DB write) is pushed to the threadpool inside
+    a Flask app context so it reuses the same models and services as the
+    WSGI blueprints.
+    """
+    def _current_user_id(request):
+        # Flask-Login keeps the user id in the signed Flask session cookie
+        session = flask_app.session_interface.open_session(flask_app, request)
+        user_id = session.get('_user_id') if session else None
+        return int(user_id) if user_id is not None else None
+
+    def _check_limits(user_id, ip_address):
+        with flask_app.app_context():
+            if flask_app.config.get('RATELIMIT_ENABLED', True):
+                rate_limiter.check('detect', client_key(user_id, ip_address))
+                check_daily_quota(user_id, ip_address)
+
+    def _find_near_duplicate(image_bytes, tiled):
+        with flask_app.app_context():
+            image_info = detection_service._hash_image(image_bytes)
+            return image_info, None if tiled else detection_service._find_near_duplicate(image_info)
+
+    def _use_tiling(value):
+        with flask_app.app_context():
+            return detection_service.use_tiling(value)
+
+    def _infer_tiled(image_bytes):
+        with flask_app.app_context():
+            return detection_service._infer_tiled(image_bytes)
+
+    async def _infer(image_bytes, tiled):
+        if tiled:
+            # Tiles go out in one detect_flags call from a worker thread
+            return await run_in_threadpool(_infer_tiled, image_bytes)
+        with tracer.span('image.decode'):
+            image = await run_in_threadpool(_decode_image, image_bytes)
+        if flask_app.config.get('INFERENCE_BATCHING_ENABLED', False):
+            with flask_app.app_context():
+                batcher = detection_service.batcher()
+            return await asyncio.wrap_future(batcher.submit(image))
+        return await detection_service.roboflow_client.detect_flag_async(image)
+
+    def _log_detection(result, ip_address, user_agent, user_id, image_info, index_hash):
+        with flask_app.app_context():
+            log = detection_service.log_detection(result, ip_address, user_agent, user_id, image_info)
+            if index_hash and log is not None and image_info is not None:
+                detection_service.add_to_hash_index(image_info[0], log.id)
+
+    async def detect_flag(request):
+        # The Flask before/after request hooks don't run here, so the root span is opened by hand
+        span = tracer.start_trace('POST /api/detect', request.headers.get('traceparent'),
+                                  {'http.method': 'POST', 'http.route': '/api/detect'})
+        if span is None:
+            return await _detect_flag(request)
+
+        token = tracer.activate(span)
+        try:
+            response = await _detect_flag(request)
+            span.set_attribute('http.status_code', response.status_code)
+            response.headers['traceresponse'] = span.traceparent
+            return response
+        finally:
+            tracer.deactivate(token)
+            span.end()
+
+    async def _detect_flag(request):
+        try:
+            ip_address = request.client.host if request.client else None
+            user_agent = request.headers.get('User-Agent', '')
+            user_id = _current_user_id(request)
+
+            # Before the body is read, so a throttled client can't make the server spool uploads
+            await run_in_threadpool(_check_limits, user_id, ip_address)
+
+            with tracer.span('upload.parse'):
+                form = await request.form()
+                if 'image' not in form:
+                    return JSONResponse({'error': 'No image provided'}, status_code=400)
+
+                image_bytes = await form['image'].read()
+            tiled = _use_tiling(form.get('tiled', request.query_params.get('tiled')))
+
+            image_info, result = await run_in_threadpool(_find_near_duplicate, image_bytes, tiled)
+            if result is None and flask_app.config.get('DETECTION_COALESCING_ENABLED', False):
+                # Identical uploads on this event loop share one decode and inference
+                key = await run_in_threadpool(detection_service.inflight_key, image_bytes, tiled)
+                with tracer.span('inference', tiled=tiled):
+                    result, _ = await detection_service.inflight.do_async(key, lambda: _infer(image_bytes, tiled))
+            elif result is None:
+                with tracer.span('inference', tiled=tiled):
+                    result = await _infer(image_bytes, tiled)
+
+            await run_in_threadpool(_log_detection, result, ip_address, user_agent, user_id,
+                                    image_info, 'near_duplicate_of' not in result)
+
+            return JSONResponse(result, status_code=200)
+
+        except RateLimitError as e:
+            return JSONResponse(
+                {'error': str(e), 'retry_after': e.retry_after},
+                status_code=e.status_code,
+                headers={'Retry-After': str(e.retry_after)}
+            )
+        except ValidationError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+        except ApiError as e:
+            return JSONResponse({'error': str(e)}, status_code=e.status_code)
+        except Exception as e:
+            return JSONResponse({'error': str(e)}, status_code=500)
+
+    # Same CORS policy as CORS(app, supports_credentials=True) on the Flask side
+    cors = Middleware(CORSMiddleware, allow_origin_regex='.*', allow_credentials=True,
+                      allow_methods=['*'], allow_headers=['*'])
+    
+    return [
+        Route('/api/detect', detect_flag, methods=['POST', 'OPTIONS'], middleware=[cors])
+    ]
@@ -1,19 +1,27 @@
-from flask import Blueprint, request, jsonify
-from flask_login import current_user
+import os
+from flask import Blueprint, current_app, request, jsonify
+from flask_login import current_user, login_required
+from core.security import admin_required
 from domain.services.detection_service import DetectionService
 from domain.services.admin_service import AdminService
 from core.exceptions import ApiError, ValidationError
+from core.rate_limit import rate_limit
+from core.tracing import tracer
 
 detection_bp = Blueprint('detection', __name__)
 detection_service = DetectionService()
 
 @detection_bp.route('/api/detect', methods=['POST'])
+@rate_limit('detect', daily_quota=True)
 def detect_flag():
     try:
-        if 'image' not in request.files:
+        # The multipart body is parsed on first access to request.files
+        with tracer.span('upload.parse'):
+            files = request.files
+        if 'image' not in files:
             return jsonify({'error': 'No image provided'}), 400
             
-        image_file = request.files['image']
+        image_file = files['image']
         
         # Get user ID if logged in
         user_id = current_user.id if current_user.is_authenticated else None
@@ -22,7 +30,8 @@ def detect_flag():
             image_file=image_file,
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent', ''),
-            user_id=user_id
+            user_id=user_id,
+            tiled=request.form.get('tiled', request.args.get('tiled'))
         )
         
         return jsonify(result), 200
@@ -34,6 +43,45 @@ def detect_flag():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@detection_bp.route('/api/admin/detection/coalescing', methods=['GET'])
+@login_required
+@admin_required
+def get_coalescing_stats():
+    """Single-flight counters of this worker process (each worker keeps its own)"""
+    try:
+        return jsonify({
+            'enabled': current_app.config.get('DETECTION_COALESCING_ENABLED', False),
+            'pid': os.getpid(),
+            **detection_service.inflight.stats()
+        }), 200
+        
+    except ApiError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+@detection_bp.route('/api/admin/detection/batching', methods=['GET'])
+@login_required
+@admin_required
+def get_batching_stats():
+    """Micro-batching counters of this worker process"""
+    try:
+        config = current_app.config
+        enabled = config.get('INFERENCE_BATCHING_ENABLED', False)
+        return jsonify({
+            'enabled': enabled,
+            'pid': os.getpid(),
+            'max_batch_size': config.get('INFERENCE_BATCH_MAX_SIZE'),
+            'max_latency_ms': config.get('INFERENCE_BATCH_MAX_LATENCY_MS'),
+            'workers': config.get('INFERENCE_BATCH_WORKERS'),
+            **(detection_service.batcher().stats() if enabled else {})
+        }), 200
+        
+    except ApiError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
 @detection_bp.route('/api/setup-admin', methods=['POST'])
 def setup_admin():
     # Existing code...
@@ -1,34 +1,101 @@
-from flask import Blueprint, request, jsonify
+import tempfile
+import threading
+import zipfile
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_login import login_required
-from domain.services.manual_calculation_service import ManualCalculationService
 from domain.services.model_information_service import ModelInfoService
-from core.exceptions import ApiError
+from domain.services.model_metrics_service import ModelMetricsService
+from core.exceptions import ApiError, ValidationError
+from core.security import admin_required
+from core.http_cache import static_json_response
+from core.rate_limit import rate_limit
+from core.serialization import dumps, json_response
+from domain.manual_calculation_explanations import (
+    CONFIDENCE_COMPONENT_EXPLANATIONS, EDUCATIONAL_NOTE, STAGE_EXPLANATIONS
+)
+from infrastructure.image_sources import count_images, iter_image_zip
+from infrastructure.prediction_cache import create_prediction_cache
+from presentation.schemas.manual_calculation_schema import DETAIL_LEVELS, manual_calculation_to_dict
 
+# Cheap JSON routes served by API workers
+model_info_bp = Blueprint('model_info', __name__)
+# CPU-heavy routes served by vision workers
 manual_calculation_bp = Blueprint('manual_calculation', __name__)
-manual_calc_service = ManualCalculationService()
 
-@manual_calculation_bp.route('/api/admin/model-info', methods=['GET'])
+_manual_calc_service = None
+_manual_calc_service_lock = threading.Lock()
+
+def get_manual_calc_service():
+    """
+    Return the shared ManualCalculationService, building it on first use.
+    
+    The service imports cv2, numpy and sklearn, so workers that never serve a
+    manual calculation never load the vision stack. When VISION_PROCESS_POOL_WORKERS
+    is set, the calculation stages are dispatched to a process pool.
+    """
+    global _manual_calc_service
+    if _manual_calc_service is None:
+        with _manual_calc_service_lock:
+            if _manual_calc_service is None:
+                from domain.services.manual_calculation_service import ManualCalculationService
+                
+                _manual_calc_service = ManualCalculationService(
+                    process_pool_workers=current_app.config.get('VISION_PROCESS_POOL_WORKERS', 0),
+                    analysis_size=current_app.config.get('MANUAL_CALCULATION_ANALYSIS_SIZE', 320),
+                    prediction_cache=create_prediction_cache(current_app.config.get('PREDICTION_CACHE_URI'))
+                )
+    return _manual_calc_service
+
+def _request_detail():
+    """'summary' or 'full' from the form, query string or MANUAL_CALCULATION_DETAIL"""
+    detail = request.form.get('detail') or request.args.get('detail') or \
+        current_app.config.get('MANUAL_CALCULATION_DETAIL', 'full')
+    if detail not in DETAIL_LEVELS:
+        raise ValidationError(f"Invalid detail '{detail}', expected one of: {', '.join(DETAIL_LEVELS)}")
+    return detail
+
+@model_info_bp.route('/api/admin/model-info', methods=['GET'])
 @login_required
 def get_model_info():
     """Get model metadata information"""
     try:
-        model_info = ModelInfoService.get_model_metadata()
-        return jsonify(model_info), 200
+        return static_json_response('model_info', ModelInfoService.get_model_metadata)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@manual_calculation_bp.route('/api/admin/model-metrics', methods=['GET'])
+@model_info_bp.route('/api/admin/model-metrics', methods=['GET'])
 @login_required
 def get_model_metrics():
     """Get detailed model training metrics"""
     try:
-        metrics = ModelInfoService.get_training_metrics()
-        return jsonify(metrics), 200
+        return static_json_response('model_metrics', ModelInfoService.get_training_metrics)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@model_info_bp.route('/api/admin/model-metrics/live', methods=['GET'])
+@login_required
+@admin_required
+def get_live_model_metrics():
+    """Per-class confidence distributions, detection rates and labelled precision/recall from the detection logs"""
+    try:
+        return jsonify(ModelMetricsService.get_live_metrics()), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@model_info_bp.route('/api/admin/manual-calculation/explanations', methods=['GET'])
+@login_required
+def get_manual_calculation_explanations():
+    """Static text left out of detail=summary manual calculation responses"""
+    # Only changes with a deploy, so clients fetch it once per day at most
+    return static_json_response('manual_calculation_explanations', lambda: {
+        "stages": STAGE_EXPLANATIONS,
+        "confidence_components": CONFIDENCE_COMPONENT_EXPLANATIONS,
+        "educational_note": EDUCATIONAL_NOTE
+    })
+
 @manual_calculation_bp.route('/api/admin/manual-calculation', methods=['POST'])
 @login_required
+@rate_limit('manual_calculation')
 def calculate_manually():
     """Process an image and return manual calculation steps"""
     try:
@@ -36,10 +103,73 @@ def calculate_manually():
             return jsonify({'error': 'No image provided'}), 400
             
         image_file = request.files['image']
+        detail = _request_detail()
+        # 'fast' runs the Hough/contour stages at MANUAL_CALCULATION_ANALYSIS_SIZE
+        quality = request.form.get('quality') or request.args.get('quality') or \
+            current_app.config.get('MANUAL_CALCULATION_QUALITY', 'full')
+        
+        result = get_manual_calc_service().process_flag_image(image_file, quality)
+        
+        return json_response(manual_calculation_to_dict(result, detail)), 200
+        
+    except ApiError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@manual_calculation_bp.route('/api/admin/manual-calculation/batch', methods=['POST'])
+@login_required
+@rate_limit('manual_calculation_batch')
+def calculate_batch():
+    """
+    Run the manual calculation over a zip of images for model auditing.
+    
+    Streams one JSON object per image (NDJSON) as results become ready, so
+    neither side holds the whole batch in memory.
+    """
+    try:
+        if 'archive' not in request.files:
+            return jsonify({'error': 'No archive provided'}), 400
+        
+        # Copied out of the upload, which is closed when the view returns and
+        # before the response has finished streaming
+        archive = tempfile.TemporaryFile()
+        request.files['archive'].save(archive)
+        archive.seek(0)
+        
+        quality = request.form.get('quality') or request.args.get('quality') or \
+            current_app.config.get('MANUAL_CALCULATION_QUALITY', 'full')
+        try:
+            detail = _request_detail()
+        except ValidationError:
+            archive.close()
+            raise
+        
+        try:
+            image_count = count_images(archive)
+            
+            max_images = current_app.config.get('MANUAL_CALCULATION_BATCH_MAX_IMAGES', 5000)
+            if image_count > max_images:
+                raise ValidationError(f"Archive contains {image_count} images, the limit is {max_images}")
+            
+            archive.seek(0)
+            records = get_manual_calc_service().process_batch(iter_image_zip(archive), quality)
+        except zipfile.BadZipFile:
+            archive.close()
+            raise ValidationError("Archive must be a zip file")
+        except Exception:
+            archive.close()
+            raise
         
-        result = manual_calc_service.process_flag_image(image_file)
+        def generate():
+            try:
+                for record in records:
+                    yield dumps(manual_calculation_to_dict(record, detail)) + b"\n"
+            finally:
+                archive.close()
         
-        return jsonify(result), 200
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                        headers={'X-Image-Count': str(image_count)}), 200
         
     except ApiError as e:
         return jsonify({'error': str(e)}), e.status_code
@@ -4,6 +4,7 @@ from domain.services.auth_service import AuthService
 from domain.services.detection_service import DetectionService
 from presentation.schemas.detection_schema import detection_log_to_dict
 from core.exceptions import ApiError, ValidationError
+from core.http_cache import is_not_modified, not_modified, version_etag, with_version_etag
 
 user_bp = Blueprint('user', __name__)
 auth_service = AuthService()
@@ -88,18 +89,44 @@ def get_user_logs():
         # Get page parameter, default to 1
         page = request.args.get('page', 1, type=int)
         
+        # Unchanged history (same latest log, count and labels) is answered without loading the rows
+        last_id, total, labels = detection_service.get_user_detection_logs_version(current_user.id)
+        etag = version_etag('user', current_user.id, last_id, total, labels, page)
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
         # Get logs for the current user
-        result = detection_service.get_user_detection_logs(current_user.id, page)
+        result = detection_service.get_user_detection_logs(current_user.id, page, total=total)
         
         # Convert logs to dictionaries
         logs_dict = [detection_log_to_dict(log) for log in result['logs']]
         
-        return jsonify({
+        return with_version_etag(jsonify({
             'logs': logs_dict,
             'total': result['total'],
             'pages': result['pages'],
             'current_page': result['current_page']
+        }), etag), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@user_bp.route('/api/user/detection-logs/<int:log_id>/label', methods=['POST'])
+@login_required
+def confirm_detection_label(log_id):
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get('label'):
+            raise ValidationError("label is required")
+        
+        log = detection_service.confirm_detection_label(log_id, data['label'], current_user)
+        
+        return jsonify({
+            'log': detection_log_to_dict(log),
+            'confirmed_label': log.confirmed_label
         }), 200
         
+    except ApiError as e:
+        return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
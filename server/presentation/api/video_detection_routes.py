@@ -0,0 +1,115 @@
+import os
+import tempfile
+import threading
+import zipfile
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_login import current_user
+from core.exceptions import ApiError, ValidationError
+from core.rate_limit import check_daily_quota, rate_limit
+from core.serialization import dumps
+from infrastructure.image_sources import iter_image_zip
+from presentation.api.detection_routes import detection_service
+
+# CPU-heavy (frame decoding), served by vision workers
+video_detection_bp = Blueprint('video_detection', __name__)
+
+_video_service = None
+_video_service_lock = threading.Lock()
+
+def get_video_detection_service():
+    """Return the shared VideoDetectionService, importing the OpenCV-based modules on first use"""
+    global _video_service
+    with _video_service_lock:
+        if _video_service is None:
+            from domain.services.video_detection_service import VideoDetectionService
+
+            _video_service = VideoDetectionService(detection_service)
+        return _video_service
+
+def _save_upload(file_storage):
+    """
+    Copy the upload to a named temp file (OpenCV opens videos by path, and the
+    upload is closed when the view returns, before the response has streamed)
+    """
+    suffix = os.path.splitext(file_storage.filename or '')[1] or '.mp4'
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, 'wb') as f:
+        file_storage.save(f)
+    return path
+
+@video_detection_bp.route('/api/detect/video', methods=['POST'])
+# The quota is charged per inferred frame while the video streams
+@rate_limit('detect_video', daily_quota=True, quota_cost=0)
+def detect_video():
+    """
+    Detect flags in a video ('video', any container OpenCV reads) or a zip of
+    frames ('frames', in name order, with 'fps').
+
+    Streams one JSON object per examined frame (NDJSON) while the video is
+    decoded, then a summary with one track per flag seen; each track is
+    stored as one detection log. Every inferred frame counts against the
+    daily detection quota, and the stream stops when the quota runs out.
+    """
+    config = current_app.config
+    service = get_video_detection_service()
+    user_id = current_user.id if current_user.is_authenticated else None
+    ip_address = request.remote_addr
+    charge_inference = None
+    if config.get('RATELIMIT_ENABLED', True):
+        charge_inference = lambda: check_daily_quota(user_id, ip_address)
+    stride = request.values.get('stride', config.get('VIDEO_FRAME_STRIDE', 2), type=int)
+    max_frames = config.get('VIDEO_MAX_FRAMES', 18000)
+    cleanup = []
+
+    try:
+        if 'video' in request.files:
+            path = _save_upload(request.files['video'])
+            cleanup.append(lambda: os.remove(path))
+            source = service.open_video(path, stride=stride, max_frames=max_frames)
+        elif 'frames' in request.files:
+            archive = tempfile.TemporaryFile()
+            cleanup.append(archive.close)
+            request.files['frames'].save(archive)
+            archive.seek(0)
+            if not zipfile.is_zipfile(archive):
+                raise ValidationError("frames must be a zip file")
+            archive.seek(0)
+            fps = request.values.get('fps', 30.0, type=float)
+            source = service.open_frames(iter_image_zip(archive), fps=fps, stride=stride, max_frames=max_frames)
+        else:
+            return jsonify({'error': 'No video provided'}), 400
+
+        records = service.process(
+            source,
+            ip_address=ip_address,
+            user_agent=request.headers.get('User-Agent', ''),
+            user_id=user_id,
+            scene_threshold=request.values.get(
+                'scene_threshold', config.get('VIDEO_SCENE_CHANGE_THRESHOLD', 0.08), type=float
+            ),
+            max_interval_seconds=config.get('VIDEO_MAX_INFERENCE_INTERVAL_SECONDS', 2.0),
+            charge_inference=charge_inference
+        )
+
+        def generate():
+            try:
+                for record in records:
+                    yield dumps(record) + b"\n"
+            finally:
+                records.close()
+                for step in cleanup:
+                    step()
+
+        headers = {'X-Frame-Rate': str(source.fps)}
+        if source.frame_count:
+            headers['X-Frame-Count'] = str(source.frame_count)
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers=headers), 200
+
+    except ApiError as e:
+        for step in cleanup:
+            step()
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        for step in cleanup:
+            step()
+        return jsonify({'error': str(e)}), 500
@@ -7,5 +7,19 @@ def detection_log_to_dict(log):
         'ip_address': log.ip_address,
         'user_agent': log.user_agent,
         'timestamp': log.timestamp.isoformat(),
-        'user_id': log.user_id
+        'user_id': log.user_id,
+        'confirmed_label': log.confirmed_label
+    }
+
+def detection_to_dict(detection):
+    """Convert Detection model to dictionary for JSON response"""
+    return {
+        'id': detection.id,
+        'detection_log_id': detection.detection_log_id,
+        'class_name': detection.class_name,
+        'confidence': detection.confidence,
+        'x': detection.x,
+        'y': detection.y,
+        'width': detection.width,
+        'height': detection.height
     }
\ No newline at end of file
@@ -0,0 +1,47 @@
+# Left out of summary responses: static text (served once by
+# GET /api/admin/manual-calculation/explanations), kernel matrices,
+# per-pixel samples and the simulated pooling tables
+SUMMARY_OMITTED_KEYS = frozenset({
+    'explanation', 'educational_note', 'notes', 'sorted_probabilities',
+    'kernels', 'sample_results', 'pixel_samples', 'pooling_results',
+    'color_analysis_method', 'color_space'
+})
+
+DETAIL_LEVELS = ('summary', 'full')
+
+def _compact(value):
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items() if k not in SUMMARY_OMITTED_KEYS}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+def prediction_summary(model_results):
+    """Top prediction and box count instead of the raw inference response"""
+    predictions = model_results.get('predictions', []) if model_results else []
+    top = max(predictions, key=lambda p: p.get('confidence', 0)) if predictions else None
+    return {
+        'prediction_count': len(predictions),
+        'top_prediction': {
+            key: top.get(key) for key in ('class', 'confidence', 'x', 'y', 'width', 'height')
+        } if top else None
+    }
+
+def manual_calculation_to_summary(result):
+    """
+    Convert a manual calculation result (single or batch record) to the
+    compact schema: every score and measurement, none of the static text
+    """
+    summary = dict(result)
+    if 'model_prediction' in result:
+        summary['model_prediction'] = prediction_summary(result['model_prediction'])
+    if 'manual_calculation' in result:
+        summary['manual_calculation'] = _compact(result['manual_calculation'])
+    summary['detail'] = 'summary'
+    return summary
+
+def manual_calculation_to_dict(result, detail='full'):
+    """Shape a manual calculation result for the requested detail level"""
+    if detail == 'summary':
+        return manual_calculation_to_summary(result)
+    return result
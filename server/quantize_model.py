@@ -0,0 +1,107 @@
+"""
+Write the INT8 variant of the exported ONNX flag model for CPU inference.
+
+Static quantization calibrates activation ranges on a directory or zip of
+representative flag images and produces a QDQ model that ONNX Runtime runs
+with integer kernels; dynamic quantization only needs the model but leaves
+activations in float, which helps convolutional models much less:
+
+    python quantize_model.py models/flag_yolov8n.onnx --calibration calibration_images/
+    python quantize_model.py models/flag_yolov8n.onnx --method dynamic
+
+The output goes next to the input as <name>.int8.onnx, where
+LOCAL_MODEL_PRECISION=int8 looks for it. Check the result with
+benchmarks/quantization_accuracy.py before deploying it.
+"""
+import os
+import sys
+import argparse
+
+# Set up command line argument parsing
+parser = argparse.ArgumentParser(description='Quantize the ONNX flag model to INT8')
+parser.add_argument('model', help='fp32 ONNX model exported from the training run')
+parser.add_argument('--output', '-o', help='Output path (default: <model>.int8.onnx)')
+parser.add_argument('--method', choices=['static', 'dynamic'], default='static')
+parser.add_argument('--calibration', help='Directory or .zip of calibration images (static only)')
+parser.add_argument('--calibration-images', type=int, default=200, help='Calibration images to use at most')
+parser.add_argument('--per-channel', action='store_true', help='Per-channel weight scales (usually more accurate)')
+parser.add_argument('--input-size', type=int, default=640)
+
+def calibration_reader(session_input, source, limit, input_size):
+    """CalibrationDataReader feeding letterboxed images, preprocessed exactly as at inference time"""
+    import cv2
+    import numpy as np
+    from onnxruntime.quantization import CalibrationDataReader
+    from domain.vision.yolo import letterbox
+    from infrastructure.image_sources import iter_images
+
+    class FlagCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.images = iter_images(source)
+            self.remaining = limit
+
+        def get_next(self):
+            while self.remaining > 0:
+                _, image_bytes = next(self.images, (None, None))
+                if image_bytes is None:
+                    return None
+                image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    continue
+                self.remaining -= 1
+                tensor, _, _ = letterbox(image, input_size)
+                return {session_input: tensor[None]}
+            return None
+
+    return FlagCalibrationReader()
+
+def main():
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"❌ Error: {args.model} does not exist", file=sys.stderr)
+        sys.exit(1)
+    if args.method == 'static' and not (args.calibration and os.path.exists(args.calibration)):
+        print("❌ Error: static quantization needs --calibration images", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        import onnxruntime as ort
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+    except ImportError:
+        print("❌ Error: quantization needs onnxruntime (pip install onnxruntime)", file=sys.stderr)
+        sys.exit(1)
+
+    from infrastructure.external.local_inference_client import quantized_model_path
+
+    output = args.output or quantized_model_path(args.model)
+
+    # Shape inference and graph fusion first, as recommended before quantizing
+    preprocessed = f"{os.path.splitext(output)[0]}.preprocessed.onnx"
+    quant_pre_process(args.model, preprocessed)
+
+    try:
+        if args.method == 'dynamic':
+            quantize_dynamic(preprocessed, output, weight_type=QuantType.QInt8, per_channel=args.per_channel)
+        else:
+            session_input = ort.InferenceSession(
+                preprocessed, providers=['CPUExecutionProvider']
+            ).get_inputs()[0].name
+            quantize_static(
+                preprocessed, output,
+                calibration_reader(session_input, args.calibration, args.calibration_images, args.input_size),
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=args.per_channel
+            )
+    finally:
+        os.remove(preprocessed)
+
+    size_in = os.path.getsize(args.model) / 1e6
+    size_out = os.path.getsize(output) / 1e6
+    print(f"✅ Wrote {output} ({size_in:.1f} MB -> {size_out:.1f} MB, {args.method})")
+
+if __name__ == "__main__":
+    main()
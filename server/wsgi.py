@@ -0,0 +1,25 @@
+"""
+Production WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py
+
+gunicorn.conf.py sets preload_app, so this module is imported once in the
+master: the app, inference client and ManualCalculationService tables are
+built and warmed up before forking and shared copy-on-write by the workers.
+Unlike `python app.py`, nothing here calls db.create_all(); apply schema
+changes with `flask db upgrade`.
+"""
+import time
+
+# Taken before the heavy imports so the reported cold start includes them
+_started_at = time.perf_counter()
+
+import logging
+import os
+from app import create_app
+from core.warmup import warmup_app
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))
+app.logger.setLevel(logging.INFO)
+
+warmup_app(app, started_at=_started_at)